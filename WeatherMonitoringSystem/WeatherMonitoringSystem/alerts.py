@@ -0,0 +1,291 @@
+"""Threshold alerting with indexed rule evaluation.
+
+Rules are compiled into one sorted index per (station scope, metric), so a
+reading only looks at the rules it actually crosses plus the few that are
+already active, however many rules exist.
+"""
+import bisect
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+
+from derived import REGISTRY, DerivedMetrics, derived_view
+from forecast import SlidingSlope
+from readings import METRICS, ReadingBatch
+
+# Metrics rules can watch: the raw readings, any registered derived metric
+# (see derived.REGISTRY) and each of those's rate of change per hour ('<metric>_rate')
+RATE_SUFFIX = '_rate'
+# Rates are least-squares slopes over this much reading time, not the change
+# between two readings, which sensor noise alone pushes past any threshold
+RATE_HOURS = 0.5
+FIRING, RESOLVED = 'firing', 'resolved'
+
+
+# --- Rules ---
+class Rule:
+    """Fires when `metric` is above (`op='>'`) or below (`op='<'`) `threshold`.
+
+    `for_seconds` requires the condition to hold that long (in reading time)
+    before firing; `hysteresis` keeps a firing alert active until the value
+    is that far back on the safe side. `station=None` applies to all stations.
+    """
+    __slots__ = ('name', 'metric', 'op', 'threshold', 'station', 'for_seconds', 'hysteresis', 'message')
+
+    def __init__(self, name: str, metric: str, op: str, threshold: float, station=None,
+                 for_seconds: float = 0.0, hysteresis: float = 0.0, message: str = None):
+        if op not in ('>', '<'):
+            raise ValueError(f"op must be '>' or '<', not {op!r}")
+        self.name = name
+        self.metric = metric
+        self.op = op
+        self.threshold = threshold
+        self.station = station
+        self.for_seconds = for_seconds
+        self.hysteresis = hysteresis
+        self.message = message or f"{name}: {metric} {op} {threshold:g}"
+
+    def holds(self, value: float) -> bool:
+        return value > self.threshold if self.op == '>' else value < self.threshold
+
+    def clears(self, value: float) -> bool:
+        """True once a firing alert may resolve (outside the hysteresis band)."""
+        if self.op == '>':
+            return value <= self.threshold - self.hysteresis
+        return value >= self.threshold + self.hysteresis
+
+
+def above(metric: str, threshold: float, name: str = None, **options) -> Rule:
+    return Rule(name or f"{metric} high", metric, '>', threshold, **options)
+
+
+def below(metric: str, threshold: float, name: str = None, **options) -> Rule:
+    return Rule(name or f"{metric} low", metric, '<', threshold, **options)
+
+
+def rate_of_change(metric: str, per_hour: float, name: str = None, **options) -> Rule:
+    """Fires when `metric` changes faster than `per_hour` units/h (negative: falls faster),
+    judged by its slope over the engine's `rate_hours`."""
+    op = '>' if per_hour >= 0 else '<'
+    return Rule(name or f"{metric} {'rising' if per_hour >= 0 else 'falling'} fast",
+                metric + RATE_SUFFIX, op, per_hour, **options)
+
+
+class Alert(NamedTuple):
+    rule: Rule
+    station: object
+    state: str           # FIRING or RESOLVED
+    value: float
+    timestamp: object    # datetime64[ms]
+
+
+# --- Index ---
+class _ThresholdIndex:
+    """Rules on one (scope, metric), sorted by threshold per direction.
+
+    '>' rules with threshold < v are a prefix of the ascending list and '<'
+    rules with threshold > v a suffix, so both come from a single bisect.
+    """
+    __slots__ = ('above', 'above_keys', 'below', 'below_keys')
+
+    def __init__(self, rules):
+        above = sorted((r for r in rules if r.op == '>'), key=lambda r: r.threshold)
+        below = sorted((r for r in rules if r.op == '<'), key=lambda r: r.threshold)
+        self.above, self.above_keys = above, [r.threshold for r in above]
+        self.below, self.below_keys = below, [r.threshold for r in below]
+
+    def triggered(self, value: float) -> list:
+        rules = self.above[:bisect.bisect_left(self.above_keys, value)]
+        return rules + self.below[bisect.bisect_right(self.below_keys, value):]
+
+    def could_trigger(self, low: float, high: float) -> bool:
+        """Whether any rule can fire for values within [low, high]."""
+        return bool((self.above_keys and self.above_keys[0] < high)
+                    or (self.below_keys and self.below_keys[-1] > low))
+
+
+class _RuleState:
+    __slots__ = ('since', 'firing')
+
+    def __init__(self, since: float):
+        self.since = since
+        self.firing = False
+
+
+# --- Engine ---
+class AlertEngine:
+    """Evaluates rules on every reading; an Observer for WeatherData and StationHub.
+
+    Alerts are deduplicated: each (rule, station) fires once when its
+    condition has held for `for_seconds` and resolves once when it clears.
+    Transitions go to `events` (most recent last) and to `on_alert` callbacks.
+    Rules are never modified, so one rule set can serve many engines.
+    """
+    def __init__(self, rules=(), history: int = 1_000, rate_hours: float = RATE_HOURS):
+        self.rules = []
+        self.rate_hours = rate_hours
+        self._indexes = {}
+        self._metrics = set()
+        self._derived = ()  # derived metrics some rule needs, directly or through its rate
+        self._rates = ()    # metrics some rule watches the rate of
+        self._holding = defaultdict(dict)  # (station, metric) -> {rule: _RuleState}
+        self._slopes = {}                  # (station, metric) -> SlidingSlope for rates
+        self.events = deque(maxlen=history)
+        self.on_alert = []
+        self._buffer = None  # collects a batch's alerts so they go out in time order
+        self.add_rules(rules)
+
+    def add_rules(self, rules):
+        self.rules.extend(rules)
+        grouped = defaultdict(list)
+        for rule in self.rules:
+            grouped[(rule.station, rule.metric)].append(rule)
+        self._indexes = {key: _ThresholdIndex(rules) for key, rules in grouped.items()}
+        self._metrics = {rule.metric for rule in self.rules}
+        self._rates = tuple(sorted({metric[:-len(RATE_SUFFIX)] for metric in self._metrics
+                                    if metric.endswith(RATE_SUFFIX)}))
+        watched = {metric[:-len(RATE_SUFFIX)] if metric.endswith(RATE_SUFFIX) else metric
+                   for metric in self._metrics}
+        self._derived = tuple(name for name in REGISTRY if name in watched)
+
+    # Observer interface
+    def update(self, subject):
+        station = getattr(subject, 'station_id', 'default')
+        self.evaluate(station, subject.temperature, subject.humidity, subject.pressure,
+                      getattr(subject, 'timestamp', None), derived_view(subject) if self._derived else None)
+
+    def update_batch(self, subject, batch: ReadingBatch):
+        self.evaluate_batch(getattr(subject, 'station_id', 'default'), batch,
+                            derived_view(subject, batch) if self._derived else None)
+
+    # Evaluation
+    def evaluate(self, station, temperature: float, humidity: float, pressure: float, timestamp=None,
+                 derived: DerivedMetrics = None):
+        """`derived` is the reading's shared view, if the caller has one."""
+        ms = _to_ms(timestamp)
+        values = {'temperature': temperature, 'humidity': humidity, 'pressure': pressure}
+        if self._derived:
+            derived = derived if derived is not None else DerivedMetrics(dict(values))
+            for name in self._derived:
+                values[name] = derived[name]
+        for metric in self._rates:
+            slope = self._slope(station, metric)
+            slope.add(ms / 3.6e6, values[metric])
+            values[metric + RATE_SUFFIX] = slope.slope
+        for metric, value in values.items():
+            if metric in self._metrics and value == value:  # skip NaN rates
+                self._check(station, metric, value, ms)
+
+    def _slope(self, station, metric: str) -> SlidingSlope:
+        slope = self._slopes.get((station, metric))
+        if slope is None:
+            slope = self._slopes[(station, metric)] = SlidingSlope(self.rate_hours, bins=30)
+        return slope
+
+    def evaluate_batch(self, station, batch: ReadingBatch, derived: DerivedMetrics = None):
+        """Vectorized pre-filter: metrics no rule can fire on (and with nothing
+        active) are skipped for the whole batch; the rest go reading by reading.
+
+        Alerts come out in the same order as evaluating the readings one by one.
+        """
+        n = len(batch)
+        if not n:
+            return
+        if batch.timestamp is None:
+            ms = np.full(n, _to_ms(None))
+        else:
+            ms = batch.timestamp.astype('datetime64[ms]').astype(np.int64)
+        columns = {metric: getattr(batch, metric) for metric in METRICS}
+        if self._derived:
+            derived = derived if derived is not None else DerivedMetrics.of_batch(batch)
+            for name in self._derived:
+                columns[name] = derived[name]
+        for metric in self._rates:
+            # The rate as of each reading, exactly as `evaluate` would see it
+            slope, rates = self._slope(station, metric), np.empty(n)
+            for i, (hours, value) in enumerate(zip((ms / 3.6e6).tolist(), columns[metric].tolist())):
+                slope.add(hours, value)
+                rates[i] = slope.slope
+            columns[metric + RATE_SUFFIX] = rates
+
+        stamps = ms.tolist()
+        self._buffer = []
+        try:
+            self._check_columns(station, columns, stamps)
+        finally:
+            buffered, self._buffer = self._buffer, None
+            for alert in sorted(buffered, key=lambda alert: alert.timestamp):
+                self._emit(alert)
+
+    def _check_columns(self, station, columns: dict, stamps: list):
+        for metric, values in columns.items():
+            if metric not in self._metrics:
+                continue
+            finite = values[~np.isnan(values)] if metric.endswith(RATE_SUFFIX) else values
+            if not len(finite):
+                continue
+            low, high = float(finite.min()), float(finite.max())
+            indexes = [self._indexes.get((station, metric)), self._indexes.get((None, metric))]
+            if not self._holding.get((station, metric)) and not any(
+                    index is not None and index.could_trigger(low, high) for index in indexes):
+                continue
+            for value, stamp in zip(values.tolist(), stamps):
+                if value == value:  # skip NaN rates
+                    self._check(station, metric, value, stamp)
+
+    def _check(self, station, metric: str, value: float, ms: int):
+        triggered = []
+        for scope in ((station, None) if station is not None else (None,)):
+            index = self._indexes.get((scope, metric))
+            if index is not None:
+                triggered += index.triggered(value)
+        holding = self._holding[(station, metric)]
+        if not triggered and not holding:
+            return
+
+        current = set(triggered)
+        for rule in triggered:
+            state = holding.get(rule)
+            if state is None:
+                state = holding[rule] = _RuleState(ms)
+            if not state.firing and ms - state.since >= rule.for_seconds * 1000:
+                state.firing = True
+                self._emit(Alert(rule, station, FIRING, value, np.datetime64(ms, 'ms')))
+        for rule in [rule for rule in holding if rule not in current]:
+            state = holding[rule]
+            if not state.firing:
+                del holding[rule]  # dropped out before `for_seconds` elapsed
+            elif rule.clears(value):
+                del holding[rule]
+                self._emit(Alert(rule, station, RESOLVED, value, np.datetime64(ms, 'ms')))
+        if not holding:
+            del self._holding[(station, metric)]
+
+    def _emit(self, alert: Alert):
+        if self._buffer is not None:
+            self._buffer.append(alert)
+            return
+        self.events.append(alert)
+        for callback in self.on_alert:
+            callback(alert)
+
+    # Queries
+    def active(self, station=None, metric: str = None) -> list:
+        """Firing rules for `station` (None: all), optionally for one metric."""
+        return [rule
+                for (s, m), holding in list(self._holding.items())
+                if (station is None or s == station) and (metric is None or m == metric)
+                for rule, state in list(holding.items()) if state.firing]
+
+
+def _to_ms(timestamp) -> int:
+    """Epoch milliseconds; integers keep `for_seconds` comparisons exact."""
+    return int(np.datetime64(timestamp or datetime.now(), 'ms').astype(np.int64))
+
+
+# Lowered threshold for presentation
+DEFAULT_RULES = (
+    above('heat_index', 30, name="Heat index elevated", message="⚠️ Caution: Heat Index is Elevated!"),
+)
@@ -0,0 +1,174 @@
+import os
+from datetime import datetime
+
+import numpy as np
+
+from readings import READING, Reading, ReadingBatch
+
+# --- On-Disk Layout ---
+# <root>/<station>/<YYYY-MM-DD>.bin, each a flat array of READING records
+# in arrival order. Readings are appended, never rewritten.
+RECORD = READING
+# Every SPARSE_STRIDE-th timestamp of a segment is kept in memory, so a range
+# lookup touches one small block of the mapping instead of the whole column.
+SPARSE_STRIDE = 1024
+
+
+class _Segment:
+    """One day's file for one station, mapped read-only on demand."""
+    def __init__(self, path: str):
+        self.path = path
+        self._mapped = None
+        self._sparse = None
+
+    def records(self) -> np.ndarray:
+        size = os.path.getsize(self.path) // RECORD.itemsize
+        if self._mapped is None or len(self._mapped) != size:
+            # Re-map after appends; np.memmap cannot map an empty file
+            self._mapped = (np.memmap(self.path, dtype=RECORD, mode='r', shape=(size,))
+                            if size else np.empty(0, dtype=RECORD))
+            self._sparse = None
+        return self._mapped
+
+    def slice(self, start: np.datetime64, end: np.datetime64) -> np.ndarray:
+        """Zero-copy view of the records with start <= timestamp < end."""
+        records = self.records()
+        if self._sparse is None:
+            self._sparse = np.array(records['timestamp'][::SPARSE_STRIDE])
+        lo = self._locate(records, start)
+        hi = self._locate(records, end)
+        return records[lo:hi]
+
+    def _locate(self, records: np.ndarray, ts: np.datetime64) -> int:
+        block = max(int(np.searchsorted(self._sparse, ts, side='left')) - 1, 0)
+        base = block * SPARSE_STRIDE
+        window = records['timestamp'][base:base + SPARSE_STRIDE + 1]
+        return base + int(np.searchsorted(window, ts, side='left'))
+
+
+# --- Archive ---
+class MeasurementArchive:
+    """Append-only, memory-mapped time-series archive with daily segment files.
+
+    It is an Observer: register it with a WeatherData and every
+    `set_measurements` / `set_measurements_batch` call is persisted.
+    Segments stay sorted by time: a reading older than the last one archived
+    for its station is dropped and counted in `late` instead.
+    """
+    def __init__(self, root: str, station_id: str = 'default'):
+        self.root = root
+        self.station_id = station_id
+        self.late = 0
+        self._segments = {}
+        self._writer = None  # (path, open file) of the segment being appended to
+        self._last_ts = {}  # station -> newest archived timestamp, seeded from disk
+
+    # Observer interface
+    def update(self, subject):
+        self.append(subject.temperature, subject.humidity, subject.pressure,
+                    getattr(subject, 'timestamp', None),
+                    station_id=getattr(subject, 'station_id', None))
+
+    def update_batch(self, subject, batch: ReadingBatch):
+        self.extend(batch, station_id=getattr(subject, 'station_id', None))
+
+    # Writing
+    def append(self, temperature: float, humidity: float, pressure: float,
+               timestamp: datetime = None, station_id=None):
+        record = Reading(temperature, humidity, pressure, timestamp).to_record()
+        self._write(station_id or self.station_id, record)
+
+    def extend(self, batch: ReadingBatch, station_id=None):
+        if len(batch):
+            self._write(station_id or self.station_id, batch.to_records())
+
+    def _write(self, station_id, records: np.ndarray):
+        if station_id not in self._last_ts:
+            newest = self.tail(1, station_id)
+            self._last_ts[station_id] = newest['timestamp'][0] if len(newest) else None
+        timestamps = records['timestamp']
+        last = self._last_ts[station_id]
+        # Keep readings no older than any before them (equal timestamps are kept)
+        floor = np.maximum.accumulate(timestamps)
+        if last is not None:
+            floor = np.maximum(floor, last)
+        in_order = timestamps >= floor
+        if not in_order.all():
+            self.late += int(len(records) - in_order.sum())
+            records = records[in_order]
+            if not len(records):
+                return
+            timestamps = records['timestamp']
+        self._last_ts[station_id] = timestamps[-1]
+
+        days = timestamps.astype('datetime64[D]')
+        # Split the block at day boundaries so each part lands in its own segment
+        cuts = np.flatnonzero(days[1:] != days[:-1]) + 1
+        for part in np.split(records, cuts):
+            path = self._segment_path(station_id, part['timestamp'][0])
+            if self._writer is None or self._writer[0] != path:
+                self.close()
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._writer = (path, open(path, 'ab'))
+            handle = self._writer[1]
+            handle.write(part.tobytes())
+            handle.flush()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer[1].close()
+            self._writer = None
+
+    # Reading
+    def _segment_path(self, station_id, ts: np.datetime64) -> str:
+        day = np.datetime_as_string(ts.astype('datetime64[D]'))
+        return os.path.join(self.root, str(station_id), f"{day}.bin")
+
+    def _segment(self, path: str) -> _Segment:
+        segment = self._segments.get(path)
+        if segment is None:
+            segment = self._segments[path] = _Segment(path)
+        return segment
+
+    def days(self, station_id=None) -> list:
+        """Dates (datetime64[D]) that have a segment for the station, oldest first."""
+        directory = os.path.join(self.root, str(station_id or self.station_id))
+        if not os.path.isdir(directory):
+            return []
+        return sorted(np.datetime64(name[:-4]) for name in os.listdir(directory)
+                      if name.endswith('.bin'))
+
+    def iter_range(self, start, end, station_id=None):
+        """Yields zero-copy per-segment views covering start <= timestamp < end."""
+        station_id = station_id or self.station_id
+        start, end = np.datetime64(start, 'ms'), np.datetime64(end, 'ms')
+        first, last = start.astype('datetime64[D]'), end.astype('datetime64[D]')
+        for day in self.days(station_id):
+            if first <= day <= last:
+                view = self._segment(self._segment_path(station_id, day)).slice(start, end)
+                if len(view):
+                    yield view
+
+    def read_range(self, start, end, station_id=None) -> np.ndarray:
+        """Records in [start, end); a view into the mapping when one segment covers it."""
+        parts = list(self.iter_range(start, end, station_id))
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=RECORD)
+
+    def read_frame(self, start, end, station_id=None) -> 'pd.DataFrame':
+        import pandas as pd
+
+        return pd.DataFrame(self.read_range(start, end, station_id))
+
+    def tail(self, n: int, station_id=None) -> np.ndarray:
+        """The most recent `n` records, reading segments newest-first."""
+        station_id = station_id or self.station_id
+        parts, remaining = [], n
+        for day in reversed(self.days(station_id)):
+            records = self._segment(self._segment_path(station_id, day)).records()
+            parts.append(records[max(len(records) - remaining, 0):])
+            remaining -= len(parts[-1])
+            if remaining <= 0:
+                break
+        return np.concatenate(parts[::-1]) if parts else np.empty(0, dtype=RECORD)
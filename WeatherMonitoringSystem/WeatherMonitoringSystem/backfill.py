@@ -0,0 +1,298 @@
+"""Historical replay and backfill through the live observer pipeline.
+
+    python backfill.py readings/*.csv archive/ --speed 3600
+
+Sources are read in fixed-size chunks (CSV through pandas, Parquet through
+pyarrow, or a MeasurementArchive directory), so memory stays bounded by the
+chunk size times the number of sources however long the history is. Chunks
+of all sources are merged by timestamp, ties broken by station id, so the
+same inputs always replay in the same order. Each station gets its own
+WeatherEngine: the same WeatherData, alerts and displays as live ingest.
+"""
+import argparse
+import os
+import threading
+import time
+from collections import Counter
+from typing import NamedTuple
+
+import numpy as np
+
+from ingest_service import print_report
+from readings import LABELS, METRICS, ReadingBatch
+from weather_core import WeatherEngine
+
+STATION_COLUMNS = ('station', 'station_id')
+CHUNK_SIZE = 65_536
+# With a time-compression factor, readings are released in slices of at most
+# this much wall time, so a chunk spanning days still plays out smoothly
+TICK_SECONDS = 0.05
+
+
+class Chunk(NamedTuple):
+    """A block of readings from one source, oldest first."""
+    stations: np.ndarray  # station id (str) per reading
+    batch: ReadingBatch   # always has timestamps
+
+
+# --- Sources ---
+def _frame_to_chunk(frame, station: str) -> Chunk:
+    import pandas as pd
+
+    frame = frame.rename(columns=lambda name: LABELS.get(str(name).strip(), str(name).strip()))
+    if 'timestamp' not in frame.columns:
+        raise ValueError("replay needs a timestamp column")
+    column = next((name for name in STATION_COLUMNS if name in frame.columns), None)
+    stations = (frame[column].astype(str).to_numpy(dtype=object) if column is not None
+                else np.full(len(frame), station, dtype=object))
+    timestamps = pd.to_datetime(frame['timestamp']).to_numpy(dtype='datetime64[ms]')
+    batch = ReadingBatch(*(frame[metric].to_numpy(dtype=np.float64) for metric in METRICS),
+                         timestamp=timestamps)
+    return _time_ordered(Chunk(stations, batch))
+
+
+def _time_ordered(chunk: Chunk) -> Chunk:
+    timestamps = chunk.batch.timestamp
+    if not np.any(timestamps[1:] < timestamps[:-1]):
+        return chunk
+    order = np.argsort(timestamps, kind='stable')
+    batch = chunk.batch
+    return Chunk(chunk.stations[order], ReadingBatch(batch.temperature[order], batch.humidity[order],
+                                                     batch.pressure[order], timestamps[order]))
+
+
+def read_csv(path: str, chunk_size: int = CHUNK_SIZE, station: str = None):
+    """Chunks of a CSV with timestamp/temperature/humidity/pressure columns (or the
+    dashboard labels) and an optional station column; without one, every reading
+    belongs to `station` (default: the file name)."""
+    import pandas as pd
+
+    station = station or os.path.splitext(os.path.basename(path))[0]
+    with pd.read_csv(path, chunksize=chunk_size) as reader:
+        for frame in reader:
+            yield _frame_to_chunk(frame, station)
+
+
+def read_parquet(path: str, chunk_size: int = CHUNK_SIZE, station: str = None):
+    """Chunks of a Parquet file, one record batch at a time (needs pyarrow)."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("reading Parquet needs pyarrow (pip install pyarrow)") from None
+
+    station = station or os.path.splitext(os.path.basename(path))[0]
+    for record_batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield _frame_to_chunk(record_batch.to_pandas(), station)
+
+
+def read_archive(root: str, station: str, chunk_size: int = CHUNK_SIZE, start=None, end=None):
+    """Chunks of one station's MeasurementArchive segments in [start, end) (zero-copy
+    record views); segments outside the range are not opened."""
+    from archive import MeasurementArchive
+
+    archive = MeasurementArchive(root, station)
+    days = archive.days()
+    if not days:
+        return
+    start = days[0] if start is None else start
+    end = days[-1] + np.timedelta64(1, 'D') if end is None else end
+    for records in archive.iter_range(start, end):
+        for first in range(0, len(records), chunk_size):
+            part = records[first:first + chunk_size]
+            yield Chunk(np.full(len(part), station, dtype=object), ReadingBatch.from_records(part))
+
+
+def open_sources(paths, chunk_size: int = CHUNK_SIZE, start=None, end=None) -> list:
+    """One chunk iterator per CSV/Parquet file and per station of an archive directory.
+
+    `start`/`end` only narrow archive reads; file sources are read whole.
+    """
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            sources += [read_archive(path, station, chunk_size, start, end)
+                        for station in sorted(os.listdir(path))
+                        if os.path.isdir(os.path.join(path, station))]
+        elif path.endswith(('.parquet', '.pq')):
+            sources.append(read_parquet(path, chunk_size))
+        elif path.endswith(('.csv', '.csv.gz')):
+            sources.append(read_csv(path, chunk_size))
+        else:
+            raise ValueError(f"cannot replay {path!r}: expected .csv, .parquet or an archive directory")
+    return sources
+
+
+# --- Merging ---
+def merge_chunks(sources):
+    """Merges time-ordered chunk iterators into one stream ordered by (timestamp, station).
+
+    Only readings up to the earliest last timestamp of the chunks in hand are
+    released at a time; no source can still produce anything older, so at
+    most one chunk per source is held.
+    """
+    sources = list(sources)
+    pending = [None] * len(sources)
+    released = [None] * len(sources)  # last timestamp handed out per source
+    while True:
+        for i, source in enumerate(sources):
+            while source is not None and (pending[i] is None or not len(pending[i].batch)):
+                chunk = next(source, None)
+                if chunk is None:
+                    sources[i] = source = None
+                    pending[i] = None
+                elif len(chunk.batch):
+                    if released[i] is not None and chunk.batch.timestamp[0] < released[i]:
+                        raise ValueError("replay sources must be in time order")
+                    pending[i] = chunk
+        held = [i for i, chunk in enumerate(pending) if chunk is not None]
+        if not held:
+            return
+        horizon = min(pending[i].batch.timestamp[-1] for i in held)
+
+        parts = []
+        for i in held:
+            chunk = pending[i]
+            cut = int(np.searchsorted(chunk.batch.timestamp, horizon, side='right'))
+            parts.append(_slice(chunk, 0, cut))
+            pending[i] = _slice(chunk, cut, len(chunk.batch))
+            released[i] = horizon
+        yield _sorted(parts)
+
+
+def _slice(chunk: Chunk, start: int, stop: int) -> Chunk:
+    batch = chunk.batch
+    return Chunk(chunk.stations[start:stop],
+                 ReadingBatch(batch.temperature[start:stop], batch.humidity[start:stop],
+                              batch.pressure[start:stop], batch.timestamp[start:stop]))
+
+
+def _sorted(parts: list) -> Chunk:
+    stations = np.concatenate([part.stations for part in parts])
+    columns = [np.concatenate([getattr(part.batch, name) for part in parts])
+               for name in METRICS + ('timestamp',)]
+    names, codes = np.unique(stations.astype(str), return_inverse=True)
+    order = np.lexsort((codes, columns[-1]))
+    return Chunk(stations[order], ReadingBatch(*(column[order] for column in columns)))
+
+
+# --- Replay ---
+class ReplayReport(NamedTuple):
+    readings: int
+    chunks: int
+    wall_seconds: float
+    data_seconds: float         # first to last replayed timestamp
+    per_station: dict           # station -> readings
+    alerts: dict                # station -> alert transitions (firing and resolved)
+
+    @property
+    def readings_per_s(self) -> float:
+        return self.readings / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def compression(self) -> float:
+        """Data time replayed per second of wall time."""
+        return self.data_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+    def format(self) -> str:
+        lines = [
+            f"Replayed {self.readings:,} readings from {len(self.per_station)} stations "
+            f"in {self.chunks:,} chunks",
+            f"Wall time {self.wall_seconds:.2f} s, data span {self.data_seconds / 3600:.1f} h "
+            f"({self.compression:,.0f}x real time)",
+            f"Throughput {self.readings_per_s:,.0f} readings/s",
+        ]
+        for station, count in sorted(self.per_station.items()):
+            lines.append(f"  {station}: {count:,} readings, {self.alerts.get(station, 0)} alert transitions")
+        return "\n".join(lines)
+
+
+class Backfill:
+    """Feeds historical chunks through one WeatherEngine per station.
+
+    `speed` is a time-compression factor (3600: an hour of data per second);
+    None replays as fast as the pipeline allows. Engines are created by
+    `engine_factory(station)` on a station's first reading and kept in
+    `engines`, so their displays, statistics and alerts can be inspected
+    afterwards.
+    """
+    def __init__(self, engine_factory=None, speed: float = None):
+        self.engine_factory = engine_factory or (lambda station: WeatherEngine())
+        self.speed = speed
+        self.engines = {}
+        self._alerts = Counter()
+
+    def _engine(self, station: str) -> WeatherEngine:
+        engine = self.engines.get(station)
+        if engine is None:
+            engine = self.engines[station] = self.engine_factory(station)
+            engine.snapshot()  # builds the observers so alerts can be counted
+            engine.alerts.on_alert.append(lambda alert, station=station: self._alerts.update((station,)))
+        return engine
+
+    def run(self, sources, stop: threading.Event = None) -> ReplayReport:
+        """Replays `sources` (chunk iterators, e.g. from `open_sources`) to the end or until `stop`."""
+        started = time.perf_counter()
+        per_station, chunks, first, last = Counter(), 0, None, None
+        origin = None  # (first timestamp in ms, monotonic time) for pacing
+        for chunk in merge_chunks(sources):
+            if stop is not None and stop.is_set():
+                break
+            chunks += 1
+            ms = chunk.batch.timestamp.astype(np.int64)
+            first = ms[0] if first is None else first
+            last = ms[-1]
+            if self.speed:
+                origin = origin or (int(ms[0]), time.monotonic())
+                for start, stop_at in self._slices(ms, origin[0]):
+                    delay = origin[1] + (ms[start] - origin[0]) / 1000 / self.speed - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    self._deliver(_slice(chunk, start, stop_at), per_station)
+            else:
+                self._deliver(chunk, per_station)
+        wall = time.perf_counter() - started
+        span = (last - first) / 1000 if first is not None else 0.0
+        return ReplayReport(sum(per_station.values()), chunks, wall, float(span), dict(per_station),
+                            {station: self._alerts[station] for station in per_station})
+
+    def _slices(self, ms: np.ndarray, origin_ms: int) -> list:
+        """(start, stop) index ranges of at most one tick of wall time each."""
+        tick_ms = TICK_SECONDS * 1000 * self.speed
+        ticks = ((ms - origin_ms) // tick_ms).astype(np.int64)
+        cuts = np.flatnonzero(ticks[1:] != ticks[:-1]) + 1
+        bounds = [0, *cuts.tolist(), len(ms)]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _deliver(self, chunk: Chunk, per_station: Counter):
+        # Stable grouping keeps each station's readings in time order
+        order = np.argsort(chunk.stations.astype(str), kind='stable')
+        stations = chunk.stations[order]
+        cuts = np.flatnonzero(stations[1:] != stations[:-1]) + 1
+        batch = chunk.batch
+        for run in np.split(order, cuts):
+            station = chunk.stations[run[0]]
+            self._engine(station).ingest_batch(ReadingBatch(batch.temperature[run], batch.humidity[run],
+                                                            batch.pressure[run], batch.timestamp[run]))
+            per_station[station] += len(run)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay archived readings through the weather pipeline.")
+    parser.add_argument('paths', nargs='+', help="CSV/Parquet files or MeasurementArchive directories")
+    parser.add_argument('--speed', type=float, default=None,
+                        help="time-compression factor, e.g. 3600 for an hour of data per second "
+                             "(default: as fast as possible)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="readings read per chunk")
+    args = parser.parse_args()
+
+    backfill = Backfill(speed=args.speed)
+    report = backfill.run(open_sources(args.paths, args.chunk_size))
+    print(report.format())
+    print()
+    for station, engine in sorted(backfill.engines.items()):
+        print(f"[{station}]")
+        print_report(engine)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,904 @@
+"""Micro-benchmarks for the weather pipeline.
+
+Run with `python benchmarks.py <name>`; no browser or Streamlit needed.
+Results can be written to JSON and compared with a stored baseline:
+
+    python benchmarks.py core fanout --json baseline.json
+    python benchmarks.py core fanout --baseline baseline.json   # exit 1 on regressions
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from alerts import AlertEngine, above, below, rate_of_change
+from derived import REGISTRY, DerivedMetrics
+from dispatch import BLOCK, COALESCE_LATEST, DROP_OLDEST, AsyncioDispatcher, Snapshot, ThreadedDispatcher
+from feeds import encode_frames, read_frames, replay_feed, tail_csv, tail_ndjson
+from forecast import DEFAULT_THRESHOLDS, STEADY, SlidingSlope, window_slopes
+from heat_index import FORMULAS, SCALAR_FORMULAS, HeatIndexTable
+from measurement_store import MeasurementStore
+from readings import Reading, ReadingBatch, as_reading_batch
+from sharded_pipeline import AGGREGATE, INPUT, ShardedPipeline, _Shard
+from station_hub import StationData, StationHub
+from statistics_engine import KLLSketch, MetricStatistics, RollingQuantiles
+
+
+# --- Observer Core ---
+class _CountingObserver:
+    __slots__ = ('updates',)
+
+    def __init__(self):
+        self.updates = 0
+
+    def update(self, subject):
+        self.updates += 1
+
+
+def bench_core(readings: int = 20_000):
+    """`WeatherData.set_measurements` throughput with no observers and with the four displays."""
+    from weather_core import (CurrentConditionsDisplay, ForecastDisplay, HeatIndexDisplay,
+                              StatisticsDisplay, WeatherData)
+
+    rng = random.Random(0)
+    values = [(rng.uniform(0, 50), rng.uniform(0, 100), rng.uniform(900, 1100)) for _ in range(readings)]
+    now = datetime.now()
+    results = []
+    for label, observers in (('none', ()), ('displays', (CurrentConditionsDisplay, StatisticsDisplay,
+                                                         ForecastDisplay, HeatIndexDisplay))):
+        weather_data = WeatherData()
+        for observer in observers:
+            weather_data.register(observer())
+        start = time.perf_counter()
+        for t, rh, p in values:
+            weather_data.set_measurements(t, rh, p, now)
+        elapsed = time.perf_counter() - start
+        results.append({'observers': label, 'readings_per_s': readings / elapsed,
+                        'us_per_reading': elapsed / readings * 1e6})
+    return results
+
+
+def bench_fanout(counts=(1, 10, 100, 1_000, 10_000), budget: int = 200_000):
+    """Cost of one notify() round as the number of (trivial) observers grows."""
+    from weather_core import WeatherData
+
+    results = []
+    for count in counts:
+        weather_data = WeatherData()
+        for _ in range(count):
+            weather_data.register(_CountingObserver())
+        rounds = max(budget // count, 10)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            weather_data.notify()
+        elapsed = time.perf_counter() - start
+        results.append({'observers': count, 'us_per_notify': elapsed / rounds * 1e6,
+                        'ns_per_observer': elapsed / rounds / count * 1e9})
+    return results
+
+
+# --- Statistics ---
+def bench_statistics(sizes=(10, 1_000, 100_000, 10_000_000), probe: int = 10_000):
+    """Per-update latency of MetricStatistics after `n` readings, for each n in `sizes`.
+
+    A single accumulator is fed up to each checkpoint, then `probe` more updates
+    are timed, so a flat ns/update column means the cost does not grow with history.
+    """
+    rng = random.Random(0)
+    stats = MetricStatistics(window=60)
+    results = []
+    for size in sorted(sizes):
+        while stats.count < size:
+            stats.add(rng.uniform(0, 50), rng.uniform(0, 100), rng.uniform(900, 1100))
+
+        readings = [(rng.uniform(0, 50), rng.uniform(0, 100), rng.uniform(900, 1100))
+                    for _ in range(probe)]
+        start = time.perf_counter()
+        for t, rh, p in readings:
+            stats.add(t, rh, p)
+        elapsed = time.perf_counter() - start
+        results.append({'history': size, 'ns_per_update': elapsed / probe * 1e9})
+    return results
+
+
+def bench_quantiles(readings: int = 1_000_000, stations: int = 100, k: int = 200, probe: int = 100_000):
+    """KLL sketch accuracy against exact quantiles (np.quantile) and its per-add cost.
+
+    Rank error is |estimated rank - target| as a fraction of the readings; the
+    KLL bound at k=200 is about 1.7%. `merged` folds one sketch per station,
+    `rolling` queries the last hour of a 1 Hz feed split into one-minute buckets.
+    """
+    rng = np.random.default_rng(0)
+    values = rng.normal(20, 5, readings) + rng.exponential(2, readings)  # skewed, like temperatures
+    qs = np.array([0.5, 0.95, 0.99])
+    bound = 0.017
+
+    def errors(sketch: KLLSketch, exact: np.ndarray) -> dict:
+        estimates = sketch.quantiles(qs)
+        ranks = np.searchsorted(np.sort(exact), estimates, side='right') / len(exact)
+        truth = np.quantile(exact, qs)
+        return {'retained': sketch.size, 'max_rank_error': float(np.abs(ranks - qs).max()),
+                'max_value_error': float(np.abs(estimates - truth).max()), 'rank_error_bound': bound}
+
+    results = []
+    single = KLLSketch(k, seed=0)
+    scalar = values[:probe].tolist()
+    start = time.perf_counter()
+    for value in scalar:
+        single.add(value)
+    add_s = time.perf_counter() - start
+    start = time.perf_counter()
+    single.add_many(values[probe:])
+    add_many_s = time.perf_counter() - start
+    results.append({'case': 'single', 'readings': readings, **errors(single, values),
+                    'ns_per_add': add_s / probe * 1e9, 'ns_per_add_many': add_many_s / (readings - probe) * 1e9})
+
+    sketches = []
+    for station in range(stations):
+        sketch = KLLSketch(k, seed=station)
+        sketch.add_many(values[station::stations])
+        sketches.append(sketch)
+    start = time.perf_counter()
+    merged = KLLSketch(k, seed=0)
+    for sketch in sketches:
+        merged.merge(sketch)
+    results.append({'case': f'merged x{stations}', 'readings': readings, **errors(merged, values),
+                    'us_per_merge': (time.perf_counter() - start) / stations * 1e6})
+
+    stamps = np.datetime64('2026-01-01T00:00', 'ms') + np.arange(readings) * np.timedelta64(1000, 'ms')
+    rolling = RollingQuantiles(span_seconds=3600, buckets=60, k=k)
+    rolling.add_many(values, stamps)
+    start = time.perf_counter()
+    sketch = rolling.sketch()
+    query_s = time.perf_counter() - start
+    window = values[stamps > stamps[-1] - np.timedelta64(3600, 's')]
+    results.append({'case': 'rolling 1 h', 'readings': len(window), **errors(sketch, window),
+                    'us_per_query': query_s * 1e6})
+    for row in results:
+        assert row['max_rank_error'] <= bound, f"{row['case']}: rank error {row['max_rank_error']:.4f} > {bound}"
+    return results
+
+
+# --- History ---
+def bench_history(sizes=(100, 1_000, 5_000)):
+    """Cost of building an n-row history: per-row `pd.concat` vs MeasurementStore."""
+    results = []
+    for size in sizes:
+        history = pd.DataFrame(columns=list(MeasurementStore.LABELS.values()))
+        start = time.perf_counter()
+        for i in range(size):
+            new_row = pd.DataFrame([{"Time": pd.Timestamp.now(), "Temp (°C)": 25.0,
+                                     "Humidity (%)": 60.0, "Pressure (hPa)": 1013.0}])
+            history = pd.concat([new_row, history], ignore_index=True)
+        concat_s = time.perf_counter() - start
+
+        store = MeasurementStore(capacity=size)
+        start = time.perf_counter()
+        for i in range(size):
+            store.append(25.0, 60.0, 1013.0)
+        store.to_frame()
+        store_s = time.perf_counter() - start
+
+        results.append({'rows': size, 'concat_ms': concat_s * 1e3,
+                        'ring_buffer_ms': store_s * 1e3, 'speedup': concat_s / store_s})
+    return results
+
+
+# --- Station Fan-out ---
+class _StationObserver:
+    """Observer that only cares about one station, like a per-station display."""
+    def __init__(self, station_id):
+        self.station_id = station_id
+        self.updates = 0
+
+    def update(self, subject):
+        if subject.station_id != self.station_id:
+            return
+        self.updates += 1
+
+
+def bench_station_hub(stations: int = 1_000, observers_per_station: int = 50, readings: int = 2_000):
+    """Indexed StationHub vs the current linear broadcast over one observer list."""
+    rng = random.Random(0)
+    observers = [_StationObserver(s) for s in range(stations) for _ in range(observers_per_station)]
+    targets = [rng.randrange(stations) for _ in range(readings)]
+
+    # Linear broadcast: what Subject.notify does today with one global list
+    station_data = {s: StationData(s) for s in range(stations)}
+    start = time.perf_counter()
+    for s in targets:
+        subject = station_data[s]
+        subject.temperature = 25.0
+        for observer in list(observers):
+            observer.update(subject)
+    linear_s = time.perf_counter() - start
+
+    hub = StationHub()
+    for observer in observers:
+        hub.register(observer, stations=[observer.station_id])
+    start = time.perf_counter()
+    for s in targets:
+        hub.set_measurements(s, temperature=25.0)
+    hub_s = time.perf_counter() - start
+
+    return [{'observers': len(observers), 'linear_us_per_reading': linear_s / readings * 1e6,
+             'hub_us_per_reading': hub_s / readings * 1e6, 'speedup': linear_s / hub_s}]
+
+
+# --- Batched Ingest ---
+def bench_batch(readings: int = 86_400):
+    """Replaying a day of 1 Hz data: per-reading updates vs one batched pass."""
+    rng = np.random.default_rng(0)
+    data = np.column_stack([rng.uniform(0, 50, readings), rng.uniform(0, 100, readings),
+                            rng.uniform(900, 1100, readings)])
+
+    stats, store = MetricStatistics(window=60), MeasurementStore(capacity=readings)
+    start = time.perf_counter()
+    for t, rh, p in data.tolist():
+        stats.add(t, rh, p)
+        store.append(t, rh, p)
+    single_s = time.perf_counter() - start
+
+    stats, store = MetricStatistics(window=60), MeasurementStore(capacity=readings)
+    start = time.perf_counter()
+    batch = as_reading_batch(data)
+    stats.add_many(batch.temperature, batch.humidity, batch.pressure)
+    store.extend(batch)
+    batch_s = time.perf_counter() - start
+
+    return [{'readings': readings, 'per_reading_ms': single_s * 1e3,
+             'batched_ms': batch_s * 1e3, 'speedup': single_s / batch_s}]
+
+
+# --- Heat Index ---
+def bench_heat_index(points: int = 1_000_000):
+    """Throughput and max error of the vectorized and table heat index vs the scalar reference.
+
+    The vectorized formulas must match the scalar ones to rounding (1e-9 °C);
+    the 0.5-step table must stay within 0.02 °C of the exact formula.
+    """
+    vector_tolerance, table_tolerance = 1e-9, 0.02
+    rng = np.random.default_rng(0)
+    t, rh = rng.uniform(0, 50, points), rng.uniform(0, 100, points)
+    sample = min(points, 100_000)
+    results = []
+    for formula, vectorized in FORMULAS.items():
+        scalar = SCALAR_FORMULAS[formula]
+        start = time.perf_counter()
+        reference = np.array([scalar(a, b) for a, b in zip(t[:sample].tolist(), rh[:sample].tolist())])
+        scalar_s = (time.perf_counter() - start) * points / sample
+
+        start = time.perf_counter()
+        exact = vectorized(t, rh)
+        vector_s = time.perf_counter() - start
+
+        table = HeatIndexTable(formula)
+        start = time.perf_counter()
+        interpolated = table(t, rh)
+        table_s = time.perf_counter() - start
+
+        results.append({
+            'formula': formula,
+            'scalar_Mpts_s': points / scalar_s / 1e6,
+            'vector_Mpts_s': points / vector_s / 1e6,
+            'table_Mpts_s': points / table_s / 1e6,
+            'vector_max_err': float(np.abs(exact[:sample] - reference).max()),
+            'table_max_err': float(np.abs(interpolated - exact).max()),
+        })
+        row = results[-1]
+        assert row['vector_max_err'] <= vector_tolerance, f"{formula}: vectorized error {row['vector_max_err']:.3g}"
+        assert row['table_max_err'] <= table_tolerance, f"{formula}: table error {row['table_max_err']:.3g}"
+    return results
+
+
+# --- Derived Metrics ---
+def bench_derived(observer_counts=(1, 10, 100), readings: int = 86_400, scalar_readings: int = 20_000):
+    """Observers that each need every derived metric: one shared view per reading/batch
+    vs each observer computing for itself (what per-display helpers amount to)."""
+    batch = next(replay_feed(readings, batch_size=readings, seed=0))
+    columns = {'temperature': batch.temperature, 'humidity': batch.humidity,
+               'pressure': batch.pressure, 'wind_speed': np.full(readings, 20.0)}
+    scalars = [{name: float(values[i]) for name, values in columns.items()} for i in range(scalar_readings)]
+    names = list(REGISTRY)
+    results = []
+    for observers in observer_counts:
+        row = {'observers': observers}
+        for mode, rows, count in (('batch', [columns], readings), ('scalar', scalars, scalar_readings)):
+            start = time.perf_counter()
+            for values in rows:
+                for _ in range(observers):
+                    view = DerivedMetrics(values)
+                    for name in names:
+                        view[name]
+            separate_s = time.perf_counter() - start
+            start = time.perf_counter()
+            for values in rows:
+                view = DerivedMetrics(values)
+                for _ in range(observers):
+                    for name in names:
+                        view[name]
+            shared_s = time.perf_counter() - start
+            row[f'{mode}_separate_ns_per_reading'] = separate_s / count * 1e9
+            row[f'{mode}_shared_ns_per_reading'] = shared_s / count * 1e9
+            row[f'{mode}_speedup'] = separate_s / shared_s
+        results.append(row)
+    return results
+
+
+# --- Dispatch ---
+class _SlowObserver:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def update(self, subject):
+        time.sleep(self.delay)
+
+
+def bench_dispatch(readings: int = 200, delay: float = 0.005):
+    """Producer-side notify latency with one slow observer: inline vs each dispatcher policy."""
+    station = StationData('bench')
+    slow = _SlowObserver(delay)
+    start = time.perf_counter()
+    for i in range(readings):
+        station.temperature = float(i)
+        slow.update(station)
+    results = [{'mode': 'inline', 'us_per_notify': (time.perf_counter() - start) / readings * 1e6}]
+
+    for dispatcher_type in (ThreadedDispatcher, AsyncioDispatcher):
+        for policy in (DROP_OLDEST, COALESCE_LATEST, BLOCK):
+            dispatcher = dispatcher_type()
+            dispatcher.attach(slow, policy=policy, maxsize=16, timeout=1.0)
+            start = time.perf_counter()
+            for i in range(readings):
+                station.temperature = float(i)
+                dispatcher.submit(slow, Snapshot(station))
+            elapsed = time.perf_counter() - start
+            dispatcher.close()
+            stats = dispatcher.stats()[slow]
+            results.append({'mode': f"{dispatcher_type.__name__}/{policy}",
+                            'us_per_notify': elapsed / readings * 1e6, **stats})
+    return results
+
+
+def bench_gate(readings: int = 20_000, rate_hz: float = 50.0, interval: float = 0.5):
+    """Engine ingest of a chatty sensor (0.1-resolution readings at `rate_hz`) with and
+    without the notify gate coalescing the latest-value displays.
+
+    The gate's clock follows the sensor clock, so the result does not depend
+    on how fast this machine is.
+    """
+    from ingest_service import simulated_sensor
+    from weather_core import WeatherEngine
+
+    values = list(simulated_sensor(0, seed=0, limit=readings))
+    start_ts = datetime(2026, 1, 1)
+    results = []
+    for label in ('off', 'coalesced'):
+        engine = WeatherEngine(history_capacity=readings)
+        engine.snapshot()
+        clock = [0.0]
+        if label == 'coalesced':
+            engine.throttle(interval, {'temperature': 0.1, 'humidity': 0.5, 'pressure': 0.2})
+            engine.weather_data.gate.clock = lambda: clock[0]
+        start = time.perf_counter()
+        for i, (t, rh, p) in enumerate(values):
+            clock[0] = i / rate_hz
+            engine.ingest(t, rh, p, start_ts)
+        elapsed = time.perf_counter() - start
+        row = {'gate': label, 'readings_per_s': readings / elapsed, 'us_per_reading': elapsed / readings * 1e6}
+        gate = engine.weather_data.gate
+        if gate is not None:
+            totals = gate.totals()
+            row['display_updates_saved_pct'] = 100.0 * totals['saved'] / totals['offered']
+        results.append(row)
+    return results
+
+
+# --- Forecast ---
+def bench_forecast(readings: int = 100_000, stations: int = 1_000, window: int = 60):
+    """Incremental pressure slope per reading, and one batched slope/classify pass over all stations.
+
+    Also checks stability: steady pressure with 0.05 hPa noise at 1 Hz must
+    not flip the trend, and 6 days at 50 Hz must still give a finite slope.
+    """
+    rng = np.random.default_rng(0)
+    hours = np.arange(readings) / 3600.0
+    pressure = 1013 + rng.normal(0, 0.3, readings)
+    slope = SlidingSlope()
+    start = time.perf_counter()
+    for x, y in zip(hours.tolist(), pressure.tolist()):
+        slope.add(x, y)
+        slope.slope
+    incremental_s = time.perf_counter() - start
+
+    flips, state = 0, STEADY
+    steady = SlidingSlope()
+    for x, y in zip(hours.tolist(), (1013 + rng.normal(0, 0.05, readings)).tolist()):
+        steady.add(x, y)
+        new = DEFAULT_THRESHOLDS['pressure'].classify(steady.slope, state)
+        flips, state = flips + (new != state), new
+    assert flips == 0, f"steady pressure flipped the trend {flips} times"
+
+    drift = SlidingSlope()
+    fast_hours = 1_000_000 + np.arange(6 * 24 * 3600 * 50) / (3600 * 50.0)  # 6 days at 50 Hz
+    for lo in range(0, len(fast_hours), 1_000_000):
+        part = fast_hours[lo:lo + 1_000_000]
+        drift.add_many(part, 1013 + 0.4 * (part - fast_hours[0]))
+    assert abs(drift.slope - 0.4) < 1e-6, f"50 Hz slope drifted to {drift.slope}"
+
+    station_hours = np.tile(hours[:window], (stations, 1))
+    station_pressure = 1013 + rng.normal(0, 0.3, (stations, window))
+    start = time.perf_counter()
+    slopes = window_slopes(station_hours, station_pressure)
+    DEFAULT_THRESHOLDS['pressure'].classify_many(slopes, np.full(stations, STEADY))
+    batch_s = time.perf_counter() - start
+
+    return [{'incremental_ns_per_reading': incremental_s / readings * 1e9,
+             'stations': stations, 'all_stations_batch_ms': batch_s * 1e3, 'steady_trend_flips': flips}]
+
+
+# --- Feeds ---
+def bench_feeds(readings: int = 500_000):
+    """Parse throughput of each feed format, and end-to-end engine ingest from a replay feed."""
+    from weather_core import WeatherEngine
+
+    batch = next(replay_feed(readings, batch_size=readings, seed=0))
+    rows = list(zip(np.datetime_as_string(batch.timestamp).tolist(), batch.temperature.tolist(),
+                    batch.humidity.tolist(), batch.pressure.tolist()))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, ndjson_path = os.path.join(tmp, 'feed.csv'), os.path.join(tmp, 'feed.ndjson')
+        with open(csv_path, 'w') as handle:
+            handle.write("timestamp,temperature,humidity,pressure\n")
+            handle.writelines(f"{ts},{t:.2f},{rh:.2f},{p:.2f}\n" for ts, t, rh, p in rows)
+        with open(ndjson_path, 'w') as handle:
+            handle.writelines(json.dumps({'timestamp': ts, 'temperature': round(t, 2),
+                                          'humidity': round(rh, 2), 'pressure': round(p, 2)}) + "\n"
+                              for ts, t, rh, p in rows)
+        frames = io.BytesIO(encode_frames(batch))
+
+        for name, feed in (('binary_frames', lambda: read_frames(frames.readinto)),
+                           ('csv', lambda: tail_csv(csv_path)),
+                           ('ndjson', lambda: tail_ndjson(ndjson_path))):
+            start = time.perf_counter()
+            parsed = sum(len(b) for b in feed())
+            elapsed = time.perf_counter() - start
+            results.append({'feed': name, 'readings': parsed, 'readings_per_s': parsed / elapsed})
+
+    engine = WeatherEngine()
+    start = time.perf_counter()
+    engine.run(replay_feed(readings, batch_size=4096, seed=0))
+    elapsed = time.perf_counter() - start
+    results.append({'feed': 'replay->engine', 'readings': readings, 'readings_per_s': readings / elapsed})
+    return results
+
+
+def bench_backfill(stations: int = 20, readings_per_station: int = 50_000, chunk_size: int = 16_384):
+    """Historical replay from one CSV per station (1-minute readings) through per-station engines.
+
+    `parse_only` times reading and merging the chunks; `replay` adds the observer pipeline.
+    """
+    from backfill import Backfill, merge_chunks, open_sources
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start_ts = np.datetime64('2026-01-01T00:00', 'ms')
+        paths = []
+        for station in range(stations):
+            batch = next(replay_feed(readings_per_station, batch_size=readings_per_station, seed=station))
+            path = os.path.join(tmp, f'station-{station:03d}.csv')
+            pd.DataFrame({'timestamp': start_ts + np.arange(readings_per_station) * np.timedelta64(60, 's'),
+                          'temperature': batch.temperature, 'humidity': batch.humidity,
+                          'pressure': batch.pressure}).to_csv(path, index=False, float_format='%.2f')
+            paths.append(path)
+
+        results = []
+        start = time.perf_counter()
+        merged = sum(len(chunk.batch) for chunk in merge_chunks(open_sources(paths, chunk_size)))
+        elapsed = time.perf_counter() - start
+        results.append({'mode': 'parse_only', 'readings': merged, 'readings_per_s': merged / elapsed})
+        report = Backfill().run(open_sources(paths, chunk_size))
+        results.append({'mode': 'replay', 'readings': report.readings, 'readings_per_s': report.readings_per_s,
+                        'data_hours_per_s': report.compression / 3600})
+    return results
+
+
+def bench_export(stations: int = 20, readings_per_station: int = 200_000, chunk_size: int = 65_536):
+    """Columnar export of 1-minute readings and read-back of one station's week.
+
+    `week_ms` with a station and time-range filter against `full_read_ms`
+    shows what predicate pushdown saves; Arrow IPC has no row-group
+    statistics, so it filters while scanning.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return [{'format': 'parquet', 'skipped': 'pyarrow not installed'}]
+    from backfill import Chunk
+    from export import export_chunks, read_table
+
+    start_ts = np.datetime64('2026-01-01T00:00', 'ms')
+    sources = []
+    for station in range(stations):
+        batch = next(replay_feed(readings_per_station, batch_size=readings_per_station, seed=station))
+        batch = ReadingBatch(batch.temperature, batch.humidity, batch.pressure,
+                             start_ts + np.arange(readings_per_station) * np.timedelta64(60, 's'))
+        sources.append((f'station-{station:03d}', batch))
+
+    def chunks():
+        for name, batch in sources:
+            for lo in range(0, len(batch), chunk_size):
+                part = ReadingBatch(*(getattr(batch, field)[lo:lo + chunk_size]
+                                      for field in ('temperature', 'humidity', 'pressure', 'timestamp')))
+                yield Chunk(np.full(len(part), name, dtype=object), part)
+
+    total = stations * readings_per_station
+    week = (start_ts + np.timedelta64(30, 'D'), start_ts + np.timedelta64(37, 'D'))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt, suffix in (('parquet', '.parquet'), ('ipc', '.arrow')):
+            path = os.path.join(tmp, 'history' + suffix)
+            start = time.perf_counter()
+            export_chunks(chunks(), path)
+            elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            read_table(path)
+            full_ms = (time.perf_counter() - start) * 1e3
+            start = time.perf_counter()
+            rows = read_table(path, 'station-007', *week).num_rows
+            week_ms = (time.perf_counter() - start) * 1e3
+            results.append({'format': fmt, 'readings': total, 'write_readings_per_s': total / elapsed,
+                            'bytes_per_reading': os.path.getsize(path) / total,
+                            'full_read_ms': full_ms, 'week_ms': week_ms, 'week_rows': rows})
+    return results
+
+
+# --- Sharding ---
+def bench_sharded(readings: int = 1_000_000, stations: int = 1_000, block: int = 100_000, max_workers: int = None):
+    """Throughput of the sharded pipeline from one worker process up to one per core.
+
+    The `in-process` row runs the same shard logic without any worker, which
+    is the single-core cost the worker rows are measured against.
+    """
+    batch = next(replay_feed(readings, batch_size=readings, seed=0))
+    owners = np.random.default_rng(0).integers(0, stations, readings)
+    blocks = [(owners[lo:lo + block], ReadingBatch(batch.temperature[lo:lo + block], batch.humidity[lo:lo + block],
+                                                    batch.pressure[lo:lo + block], batch.timestamp[lo:lo + block]))
+              for lo in range(0, readings, block)]
+
+    table = np.zeros(stations, dtype=AGGREGATE)
+    shard = _Shard(table, np.zeros(stations, dtype=np.uint64))
+    start = time.perf_counter()
+    for station_index, part in blocks:
+        order = np.argsort(station_index, kind='stable')
+        records = np.empty(len(order), dtype=INPUT)
+        records['station'] = station_index[order]
+        for name in ('temperature', 'humidity', 'pressure', 'timestamp'):
+            records[name] = getattr(part, name)[order]
+        shard.process(records)
+    baseline = readings / (time.perf_counter() - start)
+    results = [{'workers': 'in-process', 'readings_per_s': baseline, 'speedup': 1.0}]
+
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = sorted({1, max_workers} | {2 ** k for k in range(max_workers.bit_length()) if 2 ** k <= max_workers})
+    for workers in counts:
+        with ShardedPipeline(range(stations), workers=workers) as pipeline:
+            start = time.perf_counter()
+            for station_index, part in blocks:
+                pipeline.submit_block(station_index, part)
+            pipeline.flush()
+            rate = readings / (time.perf_counter() - start)
+            assert pipeline.totals()['count'] == readings
+        results.append({'workers': workers, 'readings_per_s': rate, 'speedup': rate / baseline})
+    return results
+
+
+# --- Instrumentation ---
+def bench_instrumentation(readings: int = 20_000):
+    """Cost of one engine ingest with instrumentation off, on, and on with allocation counting."""
+    from weather_core import WeatherEngine
+
+    rng = random.Random(0)
+    values = [(rng.uniform(0, 50), rng.uniform(0, 100), rng.uniform(900, 1100)) for _ in range(readings)]
+    results = []
+    for mode, enabled, allocations in (('off', False, False), ('on', True, False),
+                                       ('on+allocations', True, True)):
+        engine = WeatherEngine()
+        engine.instrument(enabled, track_allocations=allocations)
+        start = time.perf_counter()
+        for t, rh, p in values:
+            engine.ingest(t, rh, p)
+        elapsed = time.perf_counter() - start
+        results.append({'instrumentation': mode, 'us_per_ingest': elapsed / readings * 1e6})
+    return results
+
+
+# --- Alerts ---
+def _random_rules(rng: random.Random, count: int, stations: int) -> list:
+    rules = []
+    for i in range(count):
+        station = rng.randrange(stations)
+        kind = i % 4
+        if kind == 0:
+            rules.append(above('temperature', rng.uniform(30, 45), station=station, for_seconds=rng.choice((0, 300))))
+        elif kind == 1:
+            rules.append(below('humidity', rng.uniform(5, 20), station=station))
+        elif kind == 2:
+            rules.append(above('heat_index', rng.uniform(32, 45), station=station, hysteresis=1.0))
+        else:
+            rules.append(rate_of_change('pressure', -rng.uniform(2, 6), station=station))
+    return rules
+
+
+def bench_alerts(rule_counts=(100, 1_000, 10_000), stations: int = 100, readings: int = 20_000):
+    """Per-reading rule evaluation: sorted threshold indexes vs checking every rule."""
+    rng = random.Random(0)
+    values = [(rng.randrange(stations), rng.uniform(0, 40), rng.uniform(0, 100), rng.uniform(990, 1030))
+              for _ in range(readings)]
+    stamps = [np.datetime64('2026-01-01T00:00', 'ms') + np.timedelta64(i * 1000, 'ms') for i in range(readings)]
+    results = []
+    for count in rule_counts:
+        rules = _random_rules(random.Random(count), count, stations)
+        engine, fired = AlertEngine(rules), []
+        engine.on_alert.append(fired.append)
+        start = time.perf_counter()
+        for (station, t, rh, p), stamp in zip(values, stamps):
+            engine.evaluate(station, t, rh, p, stamp)
+        indexed_s = time.perf_counter() - start
+
+        # Linear scan: every rule's condition against the reading's metric
+        probe = readings // 10
+        start = time.perf_counter()
+        for station, t, rh, p in values[:probe]:
+            reading = {'temperature': t, 'humidity': rh, 'pressure': p, 'heat_index': t, 'pressure_rate': 0.0}
+            for rule in rules:
+                if rule.station in (None, station):
+                    rule.holds(reading[rule.metric])
+        linear_s = (time.perf_counter() - start) * readings / probe
+
+        results.append({'rules': count, 'indexed_us_per_reading': indexed_s / readings * 1e6,
+                        'linear_us_per_reading': linear_s / readings * 1e6, 'speedup': linear_s / indexed_s,
+                        'transitions': len(fired)})
+    return results
+
+
+# --- Memory ---
+def _traced_bytes(build) -> int:
+    tracemalloc.start()
+    try:
+        kept = build()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def bench_memory(readings: int = 10_000_000, object_sample: int = 1_000_000, frame_sample: int = 1_000):
+    """Bytes per reading for each representation, reported for `readings` readings.
+
+    Arrays are built at full size; per-object forms are measured on a sample
+    (one-row DataFrames on a much smaller one) and scaled.
+    """
+    rng = np.random.default_rng(0)
+    batch = next(replay_feed(readings, batch_size=readings, seed=0))
+    t, rh, p = (batch.temperature[:object_sample].tolist(), batch.humidity[:object_sample].tolist(),
+                batch.pressure[:object_sample].tolist())
+    stamps = batch.timestamp[:object_sample].tolist()  # datetime objects
+    forms = [
+        ('dict per reading', object_sample, lambda: [{'temperature': a + 0.0, 'humidity': b + 0.0,
+                                                      'pressure': c + 0.0, 'timestamp': d}
+                                                     for a, b, c, d in zip(t, rh, p, stamps)]),
+        ('tuple per reading', object_sample, lambda: [(a + 0.0, b + 0.0, c + 0.0, d) for a, b, c, d in zip(t, rh, p, stamps)]),
+        ('Reading (__slots__)', object_sample, lambda: [Reading(a + 0.0, b + 0.0, c + 0.0, d)
+                                                        for a, b, c, d in zip(t, rh, p, stamps)]),
+        ('one-row DataFrame', frame_sample, lambda: [pd.DataFrame([{"Time": d, "Temp (°C)": a, "Humidity (%)": b,
+                                                                    "Pressure (hPa)": c}])
+                                                     for a, b, c, d in zip(t[:frame_sample], rh, p, stamps)]),
+        ('ReadingBatch columns', readings, lambda: ReadingBatch(batch.temperature.copy(), batch.humidity.copy(),
+                                                                batch.pressure.copy(), batch.timestamp.copy())),
+        ('READING records', readings, batch.to_records),
+        ('MeasurementStore (mirrored)', readings, lambda: MeasurementStore(capacity=readings)),
+    ]
+    results = []
+    for name, count, build in forms:
+        per_reading = _traced_bytes(build) / count
+        results.append({'representation': name, 'measured': count, 'bytes_per_reading': per_reading,
+                        'total_MB': per_reading * readings / 1e6})
+
+    # Converting between the scalar and array forms
+    sample = ReadingBatch(rng.uniform(0, 50, object_sample), rng.uniform(0, 100, object_sample),
+                          rng.uniform(900, 1100, object_sample), batch.timestamp[:object_sample])
+    records = sample.to_records()
+    objects = [sample[i] for i in range(10_000)]
+    for name, convert, count in (('records -> ReadingBatch', lambda: ReadingBatch.from_records(records), len(records)),
+                                 ('ReadingBatch -> records', sample.to_records, len(sample)),
+                                 ('Readings -> ReadingBatch', lambda: ReadingBatch.from_readings(objects), len(objects)),
+                                 ('ReadingBatch -> Readings', sample.readings, len(sample))):
+        start = time.perf_counter()
+        convert()
+        results.append({'conversion': name, 'ns_per_reading': (time.perf_counter() - start) / count * 1e9})
+    return results
+
+
+# --- Cold Start ---
+# Slow imports kept out of the core; their import trees do not overlap (pandas,
+# streamlit and pyarrow all load numpy, so numpy stands in for them)
+HEAVY_MODULES = ('numpy', 'asyncio', 'http.server')
+
+
+def _importtime(code: str) -> dict:
+    """Cumulative `-X importtime` microseconds per module imported by `code` in a fresh interpreter."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=here,
+                            capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, total, name = line[len('import time:'):].split('|')
+            if total.strip().isdigit():
+                cumulative[name.strip()] = int(total)
+    return cumulative
+
+
+def _wall_ms(code: str) -> float:
+    here = os.path.dirname(os.path.abspath(__file__))
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], cwd=here, check=True)
+    return (time.perf_counter() - start) * 1e3
+
+
+def bench_imports(modules=('weather_core', 'ingest_service', 'alerts', 'feeds', 'sharded_pipeline'),
+                  repeat: int = 5):
+    """Cold-start cost from `python -X importtime`, best of `repeat` fresh interpreters.
+
+    `import_ms` is the module's cumulative import time; `heavy_ms` is the part spent
+    in HEAVY_MODULES (0 for the Streamlit-free core, which imports them lazily).
+    The `first reading` rows time a whole process, minus a bare interpreter.
+    """
+    results = []
+    for module in modules:
+        runs = [_importtime(f'import {module}') for _ in range(repeat)]
+        results.append({'module': module,
+                        'import_ms': min(run.get(module, 0) for run in runs) / 1e3,
+                        'heavy_ms': min(sum(run.get(name, 0) for name in HEAVY_MODULES) for run in runs) / 1e3})
+
+    bare = min(_wall_ms('pass') for _ in range(repeat))
+    for label, code in (('engine first reading',
+                         'from weather_core import WeatherEngine; WeatherEngine().ingest(20.0, 50.0, 1013.0)'),
+                        ('WeatherData first reading',
+                         'from weather_core import WeatherData; WeatherData().set_measurements(20.0, 50.0, 1013.0)')):
+        results.append({'module': label, 'process_ms': min(_wall_ms(code) for _ in range(repeat)) - bare})
+    return results
+
+
+BENCHMARKS = {
+    'core': bench_core,
+    'fanout': bench_fanout,
+    'statistics': bench_statistics,
+    'quantiles': bench_quantiles,
+    'history': bench_history,
+    'station_hub': bench_station_hub,
+    'batch': bench_batch,
+    'heat_index': bench_heat_index,
+    'derived': bench_derived,
+    'dispatch': bench_dispatch,
+    'gate': bench_gate,
+    'forecast': bench_forecast,
+    'feeds': bench_feeds,
+    'backfill': bench_backfill,
+    'export': bench_export,
+    'sharded': bench_sharded,
+    'instrumentation': bench_instrumentation,
+    'alerts': bench_alerts,
+    'memory': bench_memory,
+    'imports': bench_imports,
+}
+
+
+# --- Results and Baselines ---
+def higher_is_better(key: str) -> bool:
+    """Throughputs, speedups and savings improve upwards; times and errors downwards."""
+    return key.endswith(('per_s', '_Mpts_s', 'speedup', 'saved_pct'))
+
+
+def compared(key: str) -> bool:
+    """Accuracy figures (errors and their bounds) vary with the sketches' random
+    compaction rather than with speed; the benchmarks assert them instead."""
+    return not key.endswith(('_err', '_error', '_bound'))
+
+
+def best_of(runs: list) -> list:
+    """Merges repeated runs of one benchmark row by row, keeping each float's best value."""
+    merged = [dict(row) for row in runs[0]]
+    for rows in runs[1:]:
+        for best, row in zip(merged, rows):
+            for key, value in row.items():
+                if isinstance(value, float):
+                    pick = max if higher_is_better(key) else min
+                    best[key] = pick(best[key], value)
+    return merged
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """(benchmark, row, key, baseline, current, change) for every float worse than `tolerance`.
+
+    Rows are matched by position and their non-float fields (the parameters),
+    so a benchmark whose parameters changed is not compared at all. Accuracy
+    fields are left out (see `compared`).
+    """
+    regressions = []
+    for name, rows in results.items():
+        for index, (row, old) in enumerate(zip(rows, baseline.get(name, ()))):
+            params = {k: v for k, v in row.items() if not isinstance(v, float)}
+            if params != {k: v for k, v in old.items() if not isinstance(v, float)}:
+                continue
+            for key, value in row.items():
+                before = old.get(key)
+                if (not compared(key) or not isinstance(value, float)
+                        or not isinstance(before, float) or not before):
+                    continue
+                change = (value - before) / abs(before)
+                worse = -change if higher_is_better(key) else change
+                if worse > tolerance:
+                    regressions.append((name, index, key, before, value, change))
+    return regressions
+
+
+def environment() -> dict:
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('names', nargs='*', default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=1, help="run each benchmark N times and keep the best values")
+    parser.add_argument('--json', metavar='PATH', help="write results (with environment info) to PATH")
+    parser.add_argument('--baseline', metavar='PATH', help="compare with a results file written by --json")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="relative slowdown reported as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.names:
+        print(f"== {name} ==")
+        results[name] = best_of([BENCHMARKS[name]() for _ in range(max(args.repeat, 1))])
+        for row in results[name]:
+            print("  " + "  ".join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}"
+                                   for k, v in row.items()))
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump({'environment': environment(), 'results': results}, handle, indent=2, default=str)
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        regressions = compare(results, baseline['results'], args.tolerance)
+        print(f"== compared with {args.baseline} ({baseline['environment']['timestamp']}) ==")
+        for name, index, key, before, value, change in regressions:
+            print(f"  REGRESSION {name}[{index}].{key}: {before:.4g} -> {value:.4g} ({change:+.1%})")
+        if not regressions:
+            print(f"  no regressions beyond {args.tolerance:.0%}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
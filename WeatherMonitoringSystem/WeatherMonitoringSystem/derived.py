@@ -0,0 +1,181 @@
+"""Derived metrics: quantities computed from the raw readings.
+
+Each metric is registered with the inputs it needs (raw metrics, other
+derived metrics or extra columns such as wind speed) and one function that
+works on floats and arrays alike. A `DerivedMetrics` view wraps one set of
+inputs (a reading, a batch or the history columns) and computes a metric
+the first time it is asked for, resolving its inputs the same way. Results
+stay cached in the view, so every observer of a reading shares one
+computation however many displays and rules consume it.
+"""
+import math
+
+import numpy as np
+
+from heat_index import heat_index_simplified, simplified_scalar
+from readings import METRICS, ReadingBatch
+
+# Magnus coefficients over water (Sonntag 1990), valid for -45..60 °C
+MAGNUS_A, MAGNUS_B, MAGNUS_C = 6.112, 17.62, 243.12
+# A dew point does not exist for bone-dry air; humidity is floored here (%)
+MIN_HUMIDITY = 0.1
+
+
+# --- Registry ---
+class Metric:
+    """A registered derived metric; see `register`."""
+    __slots__ = ('name', 'inputs', 'function', 'scalar', 'unit', 'label', 'options')
+
+    def __init__(self, name: str, inputs: tuple, function, scalar=None, unit: str = '',
+                 label: str = None, options: tuple = ()):
+        self.name = name
+        self.inputs = inputs
+        self.function = function
+        self.scalar = scalar
+        self.unit = unit
+        self.label = label or name.replace('_', ' ').capitalize()
+        self.options = options
+
+
+REGISTRY = {}
+
+
+def register(name: str, inputs, unit: str = '', label: str = None, scalar=None, options=()):
+    """Decorator registering `function(*inputs, **options)` as derived metric `name`.
+
+    Inputs that are not registered metrics are read from the view's columns.
+    `scalar` is an optional float-only version for single readings, where a
+    numpy call would cost more than the arithmetic.
+    """
+    def decorate(function):
+        if name in REGISTRY or name in METRICS:
+            raise ValueError(f"metric {name!r} is already defined")
+        REGISTRY[name] = Metric(name, tuple(inputs), function, scalar, unit, label, tuple(options))
+        return function
+    return decorate
+
+
+# --- Views ---
+class DerivedMetrics:
+    """Lazily computed derived metrics over one set of input columns.
+
+    `columns` maps input names to floats (one reading) or equally long arrays
+    (a batch or the history); `options` holds station parameters such as
+    `elevation`. A view never changes its inputs, so it can be shared.
+    """
+    __slots__ = ('columns', 'options', '_cache')
+
+    def __init__(self, columns: dict, **options):
+        self.columns = columns
+        self.options = options
+        self._cache = {}
+
+    @classmethod
+    def of_reading(cls, subject, **options) -> 'DerivedMetrics':
+        return cls({metric: getattr(subject, metric) for metric in METRICS}, **options)
+
+    @classmethod
+    def of_batch(cls, batch: ReadingBatch, **options) -> 'DerivedMetrics':
+        return cls({metric: getattr(batch, metric) for metric in METRICS}, **options)
+
+    def __getitem__(self, name: str):
+        value = self._cache.get(name)
+        if value is None:
+            value = self._cache[name] = self._compute(name)
+        return value
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns or (name in REGISTRY and all(i in self for i in REGISTRY[name].inputs))
+
+    def get(self, name: str, default=None):
+        return self[name] if name in self else default
+
+    def available(self) -> list:
+        """Registered metrics computable from these columns."""
+        return [name for name in REGISTRY if name in self]
+
+    def _compute(self, name: str):
+        metric = REGISTRY.get(name)
+        if metric is None:
+            try:
+                return self.columns[name]
+            except KeyError:
+                raise KeyError(f"no column or derived metric {name!r}") from None
+        args = [self[dependency] for dependency in metric.inputs]
+        if metric.scalar is not None and not isinstance(args[0], np.ndarray):
+            function = metric.scalar
+        else:
+            function = metric.function
+        if not metric.options:
+            return function(*args)
+        return function(*args, **{key: self.options[key] for key in metric.options if key in self.options})
+
+
+def derived_view(subject, batch: ReadingBatch = None) -> DerivedMetrics:
+    """The subject's shared view of its reading (or of `batch`), if it keeps one.
+
+    Subjects without one (StationData, dispatcher Snapshots of a batch) get a
+    fresh view, which is still shared by whatever the caller computes from it.
+    """
+    if batch is None:
+        view = getattr(subject, 'derived', None)
+        return view if view is not None else DerivedMetrics.of_reading(subject)
+    derived_for = getattr(subject, 'derived_for', None)
+    return derived_for(batch) if derived_for is not None else DerivedMetrics.of_batch(batch)
+
+
+# --- Metrics ---
+register('heat_index', ('temperature', 'humidity'), unit='°C', label="Heat index",
+         scalar=simplified_scalar)(heat_index_simplified)
+
+
+def _vapour_pressure_scalar(t: float, rh: float) -> float:
+    return rh / 100.0 * MAGNUS_A * math.exp(MAGNUS_B * t / (MAGNUS_C + t))
+
+
+@register('vapour_pressure', ('temperature', 'humidity'), unit='hPa', scalar=_vapour_pressure_scalar)
+def vapour_pressure(t, rh):
+    """Partial pressure of water vapour (Magnus formula)."""
+    return rh / 100.0 * MAGNUS_A * np.exp(MAGNUS_B * t / (MAGNUS_C + t))
+
+
+def _dew_point_scalar(t: float, rh: float) -> float:
+    gamma = math.log(max(rh, MIN_HUMIDITY) / 100.0) + MAGNUS_B * t / (MAGNUS_C + t)
+    return MAGNUS_C * gamma / (MAGNUS_B - gamma)
+
+
+@register('dew_point', ('temperature', 'humidity'), unit='°C', scalar=_dew_point_scalar)
+def dew_point(t, rh):
+    """Temperature at which the air would saturate (inverted Magnus formula)."""
+    gamma = np.log(np.maximum(rh, MIN_HUMIDITY) / 100.0) + MAGNUS_B * t / (MAGNUS_C + t)
+    return MAGNUS_C * gamma / (MAGNUS_B - gamma)
+
+
+@register('absolute_humidity', ('temperature', 'vapour_pressure'), unit='g/m³')
+def absolute_humidity(t, vapour):
+    """Grams of water vapour per cubic metre (ideal gas law)."""
+    return 216.7 * vapour / (273.15 + t)
+
+
+@register('sea_level_pressure', ('temperature', 'pressure'), unit='hPa', options=('elevation',))
+def sea_level_pressure(t, p, elevation: float = 0.0):
+    """Station pressure reduced to sea level (hypsometric formula); `elevation` in metres."""
+    lapse = 0.0065 * elevation
+    return p * (1.0 - lapse / (t + lapse + 273.15)) ** -5.257
+
+
+def _wind_chill_scalar(t: float, wind: float) -> float:
+    if t > 10.0 or wind <= 4.8:
+        return t
+    factor = wind ** 0.16
+    return 13.12 + 0.6215 * t - 11.37 * factor + 0.3965 * t * factor
+
+
+@register('wind_chill', ('temperature', 'wind_speed'), unit='°C', scalar=_wind_chill_scalar)
+def wind_chill(t, wind):
+    """Environment Canada wind chill; `wind_speed` (km/h) must be supplied as a column.
+
+    Outside its validity range (above 10 °C or below 4.8 km/h) it is the temperature.
+    """
+    factor = np.power(wind, 0.16)
+    return np.where((t > 10.0) | (wind <= 4.8), t, 13.12 + 0.6215 * t - 11.37 * factor + 0.3965 * t * factor)
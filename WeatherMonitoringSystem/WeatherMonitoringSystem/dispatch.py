@@ -0,0 +1,240 @@
+import asyncio
+import inspect
+import threading
+import time
+from collections import deque
+
+# --- Backpressure Policies ---
+DROP_OLDEST = 'drop_oldest'          # full queue: discard the oldest pending reading
+COALESCE_LATEST = 'coalesce_latest'  # keep only the newest pending reading
+BLOCK = 'block'                      # full queue: producer waits up to `timeout`
+POLICIES = (DROP_OLDEST, COALESCE_LATEST, BLOCK)
+
+
+class Snapshot:
+    """Immutable copy of a subject's readings, safe to hand to another thread."""
+    FIELDS = ('station_id', 'version', 'timestamp', 'temperature', 'humidity', 'pressure', 'derived')
+    __slots__ = FIELDS
+
+    def __init__(self, subject):
+        for name in self.FIELDS:
+            object.__setattr__(self, name, getattr(subject, name, None))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Snapshot is read-only")
+
+
+class ChannelStats:
+    __slots__ = ('delivered', 'dropped', 'coalesced', 'timeouts', 'errors')
+
+    def __init__(self):
+        self.delivered = self.dropped = self.coalesced = self.timeouts = self.errors = 0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _Channel:
+    """Bounded per-observer queue that applies the backpressure policy on put."""
+    def __init__(self, observer, policy: str, maxsize: int, timeout: float):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy {policy!r}, expected one of {POLICIES}")
+        self.observer = observer
+        self.policy = policy
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.items = deque()
+        self.closed = False
+        self.cond = threading.Condition()
+        self.stats = ChannelStats()
+        self.on_put = None  # extra wake-up hook (used by the asyncio dispatcher)
+
+    def put(self, item):
+        with self.cond:
+            if self.policy == COALESCE_LATEST and self.items:
+                self.items[-1] = item
+                self.stats.coalesced += 1
+                return
+            if len(self.items) >= self.maxsize:
+                if self.policy == DROP_OLDEST:
+                    self.items.popleft()
+                    self.stats.dropped += 1
+                elif not self.cond.wait_for(
+                        lambda: len(self.items) < self.maxsize or self.closed, self.timeout):
+                    self.stats.dropped += 1
+                    return
+            self.items.append(item)
+            self.cond.notify_all()
+        if self.on_put is not None:
+            self.on_put()
+
+    def get(self):
+        """Blocks until an item is available; returns None once closed and drained."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.items or self.closed)
+            return self.pop_locked()
+
+    def pop(self):
+        with self.cond:
+            return self.pop_locked()
+
+    def pop_locked(self):
+        if not self.items:
+            return None
+        item = self.items.popleft()
+        self.cond.notify_all()
+        return item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        if self.on_put is not None:
+            self.on_put()
+
+
+# --- Dispatchers ---
+class _Dispatcher:
+    """Shared bookkeeping: which observers are dispatched asynchronously, and how."""
+    def __init__(self):
+        self._channels = {}
+
+    def attach(self, observer, policy: str = DROP_OLDEST, maxsize: int = 64, timeout: float = 1.0):
+        """Routes `observer` through its own bounded queue instead of the caller's thread."""
+        if observer in self._channels:
+            raise ValueError("observer is already attached")
+        channel = self._channels[observer] = _Channel(observer, policy, maxsize, timeout)
+        self._start(channel)
+
+    def handles(self, observer) -> bool:
+        return observer in self._channels
+
+    def submit(self, observer, snapshot: Snapshot):
+        self._channels[observer].put(snapshot)
+
+    def stats(self) -> dict:
+        return {channel.observer: channel.stats.as_dict() for channel in self._channels.values()}
+
+    def queue_depths(self) -> dict:
+        return {channel.observer: len(channel.items) for channel in self._channels.values()}
+
+    def _start(self, channel: _Channel):
+        raise NotImplementedError
+
+
+class ThreadedDispatcher(_Dispatcher):
+    """One worker thread per attached observer.
+
+    Threads cannot be interrupted, so an update that overruns its timeout is
+    only counted. On lossy channels (drop_oldest, coalesce_latest) readings
+    that waited longer than the timeout are skipped; `block` channels deliver
+    every queued reading and use the timeout only to bound the producer's wait.
+    """
+    def __init__(self):
+        super().__init__()
+        self._threads = []
+
+    def submit(self, observer, snapshot: Snapshot):
+        self._channels[observer].put((time.monotonic(), snapshot))
+
+    def _start(self, channel: _Channel):
+        thread = threading.Thread(target=self._run, args=(channel,), daemon=True,
+                                  name=f"observer-{type(channel.observer).__name__}")
+        self._threads.append(thread)
+        thread.start()
+
+    @staticmethod
+    def _run(channel: _Channel):
+        while (item := channel.get()) is not None:
+            queued_at, snapshot = item
+            if channel.policy != BLOCK and time.monotonic() - queued_at > channel.timeout:
+                channel.stats.timeouts += 1
+                continue
+            start = time.monotonic()
+            try:
+                channel.observer.update(snapshot)
+            except Exception:
+                channel.stats.errors += 1
+            else:
+                channel.stats.delivered += 1
+            if time.monotonic() - start > channel.timeout:
+                channel.stats.timeouts += 1
+
+    def close(self, wait: bool = True):
+        for channel in self._channels.values():
+            channel.close()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class AsyncioDispatcher(_Dispatcher):
+    """Runs observers on an asyncio event loop in a background thread.
+
+    `async def update` observers are cancelled when they exceed their timeout.
+    Plain `update` methods run in the loop's thread pool and cannot be
+    cancelled: one that overruns is counted as a timeout and the channel waits
+    for it to finish before the next update (the queue drops or coalesces
+    behind it meanwhile), so an observer is never updated from two threads.
+    """
+    def __init__(self):
+        super().__init__()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True,
+                                        name="observer-dispatch")
+        self._thread.start()
+        self._tasks = []
+
+    def _start(self, channel: _Channel):
+        event = asyncio.Event()
+        channel.on_put = lambda: self._loop.call_soon_threadsafe(event.set)
+        future = asyncio.run_coroutine_threadsafe(self._run(channel, event), self._loop)
+        self._tasks.append(future)
+
+    @staticmethod
+    async def _run(channel: _Channel, event: asyncio.Event):
+        update = channel.observer.update
+        is_coroutine = inspect.iscoroutinefunction(update)
+        overrun = None  # a thread-pool update that timed out but is still running
+        while True:
+            if overrun is not None:
+                await asyncio.wait((overrun,))
+                if not overrun.cancelled():
+                    overrun.exception()  # already counted as a timeout
+                overrun = None
+            snapshot = channel.pop()
+            if snapshot is None:
+                if channel.closed:
+                    return
+                await event.wait()
+                event.clear()
+                continue
+            if is_coroutine:
+                try:
+                    await asyncio.wait_for(update(snapshot), channel.timeout)
+                except asyncio.TimeoutError:
+                    channel.stats.timeouts += 1
+                except Exception:
+                    channel.stats.errors += 1
+                else:
+                    channel.stats.delivered += 1
+                continue
+            call = asyncio.ensure_future(asyncio.to_thread(update, snapshot))
+            done, _ = await asyncio.wait((call,), timeout=channel.timeout)
+            if not done:
+                channel.stats.timeouts += 1
+                overrun = call
+            elif call.exception() is not None:
+                channel.stats.errors += 1
+            else:
+                channel.stats.delivered += 1
+
+    def close(self, wait: bool = True):
+        for channel in self._channels.values():
+            channel.close()
+        if wait:
+            for future in self._tasks:
+                future.result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if wait:
+            self._thread.join()
@@ -0,0 +1,281 @@
+"""Columnar export of measurement history and rollups (Parquet or Arrow IPC).
+
+    python export.py archive/ history.parquet --station north --start 2024-05-01 --end 2024-05-08
+
+Readings are written as they are read (from a MeasurementArchive, CSV files,
+the in-memory history or any chunk iterator) in row groups of
+`row_group_size` rows, so memory stays bounded by one pending row group per
+station however long the history is. A row group only ever holds one
+station, in time order, which gives Parquet tight min/max statistics per
+group: `read_table` with a station and a time range then decodes just the
+row groups that can match instead of the whole file.
+
+Needs pyarrow (pip install pyarrow); nothing else in the pipeline does.
+"""
+import argparse
+import os
+from datetime import datetime
+
+import numpy as np
+
+from readings import METRICS
+from rollup import BUCKET
+
+ROW_GROUP_SIZE = 131_072
+COMPRESSION = 'zstd'  # Parquet also takes snappy/gzip/brotli/lz4/none; Arrow IPC only zstd/lz4
+IPC_SUFFIXES = ('.arrow', '.ipc', '.feather')
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("columnar export needs pyarrow (pip install pyarrow)") from None
+    return pa
+
+
+def format_of(path) -> str:
+    """'ipc' for .arrow/.ipc/.feather paths, otherwise 'parquet'."""
+    return 'ipc' if str(path).endswith(IPC_SUFFIXES) else 'parquet'
+
+
+def history_schema() -> 'pa.Schema':
+    pa = _pyarrow()
+    return pa.schema([('station', pa.string()), ('timestamp', pa.timestamp('ms'))]
+                     + [(metric, pa.float64()) for metric in METRICS])
+
+
+def rollup_schema() -> 'pa.Schema':
+    pa = _pyarrow()
+    fields = [('level', pa.string()), ('station', pa.string())]
+    for name in BUCKET.names:
+        kind = BUCKET[name].kind
+        fields.append((name, pa.timestamp('ms') if kind == 'M' else pa.int64() if kind == 'i' else pa.float64()))
+    return pa.schema(fields)
+
+
+# --- Writing ---
+class ColumnarWriter:
+    """Streams column blocks into a Parquet or Arrow IPC file, one row group at a time.
+
+    Blocks are buffered per key (the station, or level and station for
+    rollups) and written as soon as a key has `row_group_size` rows; the
+    rest goes out on `close()`. `sink` is a path or a writable binary file.
+    """
+    def __init__(self, sink, schema: 'pa.Schema', format: str = None,
+                 row_group_size: int = ROW_GROUP_SIZE, compression: str = COMPRESSION):
+        pa = _pyarrow()
+        if row_group_size < 1:
+            raise ValueError("row_group_size must be at least 1")
+        self.schema = schema
+        self.format = format or format_of(sink if isinstance(sink, (str, os.PathLike)) else '')
+        self.row_group_size = row_group_size
+        self.rows = self.row_groups = 0
+        self._pending = {}  # key -> [list of column dicts, rows]
+        if self.format == 'parquet':
+            import pyarrow.parquet as pq
+
+            # Dictionary-encode only the repetitive key columns; floats compress better plain
+            keys = [field.name for field in schema if pa.types.is_string(field.type)]
+            self._writer = pq.ParquetWriter(sink, schema, compression=compression,
+                                            use_dictionary=keys, write_statistics=True)
+        elif self.format == 'ipc':
+            options = pa.ipc.IpcWriteOptions(compression=None if compression == 'none' else compression)
+            self._writer = pa.ipc.new_file(sink, schema, options=options)
+        else:
+            raise ValueError(f"unknown format {self.format!r}: expected 'parquet' or 'ipc'")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, key, columns: dict):
+        """Buffers equally long arrays for the schema's columns; scalars are repeated."""
+        n = max((len(v) for v in columns.values() if isinstance(v, np.ndarray)), default=0)
+        if not n:
+            return
+        pending = self._pending.setdefault(key, [[], 0])
+        pending[0].append(columns)
+        pending[1] += n
+        if pending[1] >= self.row_group_size:
+            self._flush(key, whole_groups=True)
+
+    def _flush(self, key, whole_groups: bool = False):
+        parts, rows = self._pending.pop(key)
+        size = self.row_group_size
+        merged = {}
+        for name in self.schema.names:
+            blocks = [part[name] if isinstance(part[name], np.ndarray)
+                      else np.full(_length(part), part[name], dtype=object) for part in parts]
+            merged[name] = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+        cut = rows - rows % size if whole_groups else rows
+        for start in range(0, cut, size):
+            self._write_group({name: column[start:start + size] for name, column in merged.items()})
+        if cut < rows:
+            self._pending[key] = [[{name: column[cut:] for name, column in merged.items()}], rows - cut]
+
+    def _write_group(self, columns: dict):
+        pa = _pyarrow()
+        arrays = [pa.array(columns[field.name], type=field.type) for field in self.schema]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self.format == 'parquet':
+            self._writer.write_table(pa.Table.from_batches([batch]), row_group_size=len(batch))
+        else:
+            self._writer.write_batch(batch)
+        self.rows += len(batch)
+        self.row_groups += 1
+
+    def close(self):
+        if self._writer is None:
+            return
+        for key in sorted(self._pending, key=str):
+            self._flush(key)
+        self._writer.close()
+        self._writer = None
+
+
+def _length(columns: dict) -> int:
+    return next(len(v) for v in columns.values() if isinstance(v, np.ndarray))
+
+
+def _history_columns(station, timestamps, values) -> dict:
+    columns = {'station': str(station), 'timestamp': timestamps}
+    columns.update(zip(METRICS, values))
+    return columns
+
+
+def export_chunks(chunks, sink, start=None, end=None, stations=None, **options) -> ColumnarWriter:
+    """Writes `Chunk`s (see backfill.open_sources) with start <= timestamp < end,
+    optionally only for `stations`; returns the closed writer for its counters."""
+    start = None if start is None else np.datetime64(start, 'ms')
+    end = None if end is None else np.datetime64(end, 'ms')
+    wanted = None if stations is None else {str(station) for station in stations}
+    with ColumnarWriter(sink, history_schema(), **options) as writer:
+        for chunk in chunks:
+            batch, names = chunk.batch, chunk.stations.astype(str)
+            keep = np.ones(len(batch), dtype=bool)
+            if start is not None:
+                keep &= batch.timestamp >= start
+            if end is not None:
+                keep &= batch.timestamp < end
+            if wanted is not None:
+                keep &= np.isin(names, list(wanted))
+            # One block per station; a stable sort keeps each station's readings in time order
+            order = np.flatnonzero(keep)
+            order = order[np.argsort(names[order], kind='stable')]
+            cuts = np.flatnonzero(names[order][1:] != names[order][:-1]) + 1
+            for run in np.split(order, cuts) if len(order) else ():
+                writer.write(names[run[0]], _history_columns(
+                    names[run[0]], batch.timestamp[run],
+                    (batch.temperature[run], batch.humidity[run], batch.pressure[run])))
+    return writer
+
+
+def export_history(history: dict, sink, station='default', start=None, end=None,
+                   **options) -> ColumnarWriter:
+    """Writes a history column mapping (MeasurementStore.between/snapshot, or
+    EngineSnapshot.history) for one station."""
+    from measurement_store import select_between
+
+    columns = select_between(history, start, end)
+    with ColumnarWriter(sink, history_schema(), **options) as writer:
+        size = writer.row_group_size
+        for first in range(0, len(columns['timestamp']), size):
+            writer.write(station, _history_columns(
+                station, columns['timestamp'][first:first + size],
+                tuple(columns[metric][first:first + size] for metric in METRICS)))
+    return writer
+
+
+def export_rollups(rollups, sink, station='default', **options) -> ColumnarWriter:
+    """Writes every level of a `Rollups` (or EngineSnapshot.rollups) with a `level`
+    column; means are sum / count, as in `buckets_to_frame`."""
+    levels = (rollups.items() if isinstance(rollups, dict)
+              else ((name, (level.unit, level.buckets())) for name, level in rollups.levels.items()))
+    with ColumnarWriter(sink, rollup_schema(), **options) as writer:
+        for name, (unit, buckets) in levels:
+            columns = {'level': name, 'station': str(station)}
+            columns.update((field, buckets[field]) for field in BUCKET.names)
+            writer.write((name, str(station)), columns)
+    return writer
+
+
+# --- Reading ---
+def _timestamp(value) -> datetime:
+    return np.datetime64(value, 'ms').astype(datetime)
+
+
+def history_filter(station=None, start=None, end=None, where=None):
+    """Dataset filter expression: station (one id or a list) and start <= timestamp < end,
+    AND-ed with an optional pyarrow `where` expression (e.g. ds.field('temperature') > 30)."""
+    _pyarrow()
+    import pyarrow.dataset as ds
+
+    terms = []
+    if station is not None:
+        stations = [station] if isinstance(station, str) else list(station)
+        terms.append(ds.field('station').isin([str(s) for s in stations]))
+    if start is not None:
+        terms.append(ds.field('timestamp') >= _timestamp(start))
+    if end is not None:
+        terms.append(ds.field('timestamp') < _timestamp(end))
+    if where is not None:
+        terms.append(where)
+    expression = None
+    for term in terms:
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def read_table(path, station=None, start=None, end=None, columns=None, where=None,
+               format: str = None) -> 'pa.Table':
+    """Rows of an exported file (or a directory of them) matching the filters.
+
+    For Parquet, the filter is pushed down: row groups whose statistics rule
+    out the station or time range are skipped unread, and only `columns` are
+    decoded. Arrow IPC files carry no statistics, so batches are filtered as
+    they are read; projection still applies.
+    """
+    _pyarrow()
+    import pyarrow.dataset as ds
+
+    if format is None:
+        format = (format_of(path) if not os.path.isdir(path)
+                  else format_of(next(iter(sorted(os.listdir(path))), '')))
+    dataset = ds.dataset(path, format=format)
+    return dataset.to_table(columns=columns, filter=history_filter(station, start, end, where))
+
+
+def read_history(path, station=None, start=None, end=None, columns=None, where=None) -> dict:
+    """Like `read_table`, as a {'timestamp': ..., 'temperature': ..., ...} mapping of
+    NumPy arrays (the shape MeasurementStore, DerivedMetrics and columns_to_frame use)."""
+    table = read_table(path, station, start, end, columns, where)
+    return {name: table.column(name).to_numpy() for name in table.column_names}
+
+
+def main():
+    from backfill import CHUNK_SIZE, open_sources
+
+    parser = argparse.ArgumentParser(description="Export archived readings to Parquet or Arrow IPC.")
+    parser.add_argument('paths', nargs='+', help="CSV/Parquet files or MeasurementArchive directories")
+    parser.add_argument('output', help="output file (.parquet, or .arrow/.ipc/.feather for Arrow IPC)")
+    parser.add_argument('--station', action='append', help="only these stations (repeatable)")
+    parser.add_argument('--start', help="first timestamp to export (ISO 8601)")
+    parser.add_argument('--end', help="export readings before this timestamp (ISO 8601)")
+    parser.add_argument('--row-group-size', type=int, default=ROW_GROUP_SIZE)
+    parser.add_argument('--compression', default=COMPRESSION)
+    args = parser.parse_args()
+
+    sources = open_sources(args.paths, CHUNK_SIZE, args.start, args.end)
+    writer = export_chunks((chunk for source in sources for chunk in source), args.output,
+                           args.start, args.end, args.station,
+                           row_group_size=args.row_group_size, compression=args.compression)
+    size = os.path.getsize(args.output)
+    print(f"Wrote {writer.rows:,} readings in {writer.row_groups:,} row groups "
+          f"to {args.output} ({size / 1e6:.1f} MB, {writer.format})")
+
+
+if __name__ == '__main__':
+    main()
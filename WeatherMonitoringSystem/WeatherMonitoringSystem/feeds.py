@@ -0,0 +1,233 @@
+"""Sensor feed adapters. Every feed yields ReadingBatch blocks for WeatherEngine.run().
+
+Text feeds (CSV, NDJSON) are tailed line by line; binary feeds (socket, pipe)
+carry fixed-width frames in the READING layout (as in the archive) and are decoded with
+`numpy.frombuffer` over a reused buffer, without per-reading Python objects.
+"""
+import json
+import socket
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from readings import LABELS, METRICS, READING, ReadingBatch
+
+FRAME = READING  # 32-byte frame: <M8[ms] timestamp, <f8 temperature/humidity/pressure
+
+
+# --- Frames ---
+def frames_to_batch(frames: np.ndarray) -> ReadingBatch:
+    """ReadingBatch over the fields of a frame array (views, no copy)."""
+    return ReadingBatch.from_records(frames)
+
+
+def encode_frames(batch: ReadingBatch) -> bytes:
+    return batch.to_records().tobytes()
+
+
+def read_frames(recv_into, batch_frames: int = 4096):
+    """Decodes frames from a `recv_into(memoryview) -> nbytes` callable until it returns 0.
+
+    Partial frames at the end of a read are carried over to the next one.
+    """
+    size = FRAME.itemsize
+    buffer = bytearray(batch_frames * size)
+    view = memoryview(buffer)
+    filled = 0
+    while True:
+        n = recv_into(view[filled:])
+        if not n:
+            break
+        filled += n
+        whole = filled - filled % size
+        if whole:
+            # copy() detaches the batch from the buffer we are about to reuse
+            yield frames_to_batch(np.frombuffer(buffer, dtype=FRAME, count=whole // size).copy())
+            view[:filled - whole] = view[whole:filled]
+            filled -= whole
+
+
+def pipe_feed(path: str = '-', batch_frames: int = 4096):
+    """Binary frames from a Unix pipe/FIFO or file ('-' for stdin)."""
+    stream = sys.stdin.buffer if path == '-' else open(path, 'rb', buffering=0)
+    try:
+        yield from read_frames(stream.readinto, batch_frames)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def tcp_feed(host: str, port: int, batch_frames: int = 4096):
+    """Listens on host:port and decodes frames from each connection in turn."""
+    with socket.create_server((host, port)) as server:
+        while True:
+            connection, _ = server.accept()
+            with connection:
+                yield from read_frames(connection.recv_into, batch_frames)
+
+
+def udp_feed(host: str, port: int, max_datagram: int = 65_507):
+    """One or more whole frames per datagram; trailing partial frames are dropped."""
+    size = FRAME.itemsize
+    buffer = bytearray(max_datagram)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind((host, port))
+        while True:
+            n = sock.recv_into(buffer)
+            if n >= size:
+                yield frames_to_batch(np.frombuffer(buffer, dtype=FRAME, count=n // size).copy())
+
+
+# --- Text Files ---
+IDLE = None  # yielded by _follow_lines at end of file while following
+
+
+def _follow_lines(path: str, follow: bool, poll: float = 0.5):
+    """Yields complete lines, waiting for more like `tail -f` when `follow` is set.
+
+    While following, IDLE is yielded each time the end of the file is reached,
+    before waiting `poll` seconds, so readers can hand on a partial batch.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as handle:
+        pending = ''
+        while True:
+            chunk = handle.read(1 << 20)
+            if not chunk:
+                if not follow:
+                    break
+                yield IDLE
+                time.sleep(poll)
+                continue
+            lines = (pending + chunk).split('\n')
+            pending = lines.pop()
+            yield from lines
+        if pending:
+            yield pending
+
+
+def _columns_to_batch(timestamps: list, columns: list) -> ReadingBatch:
+    return ReadingBatch(*(np.array(c, dtype=np.float64) for c in columns),
+                        timestamp=np.array(timestamps, dtype='datetime64[ms]') if timestamps else None)
+
+
+def tail_csv(path: str, batch_size: int = 4096, follow: bool = False):
+    """CSV with a header naming temperature/humidity/pressure (or the dashboard labels)
+    and an optional timestamp column."""
+    lines = _follow_lines(path, follow)
+    header = next(line for line in lines if line is not IDLE)
+    header = [LABELS.get(name.strip(), name.strip()) for name in header.split(',')]
+    indexes = [header.index(metric) for metric in METRICS]
+    ts_index = header.index('timestamp') if 'timestamp' in header else None
+    columns, timestamps = [[], [], []], []
+    for line in lines:
+        if line is IDLE:
+            # Caught up with a live file: deliver what we have instead of waiting for a full batch
+            if columns[0]:
+                yield _columns_to_batch(timestamps, columns)
+                columns, timestamps = [[], [], []], []
+            continue
+        if not line.strip():
+            continue
+        fields = line.rstrip('\r').split(',')
+        for column, i in zip(columns, indexes):
+            column.append(fields[i])
+        if ts_index is not None:
+            timestamps.append(fields[ts_index])
+        if len(columns[0]) >= batch_size:
+            yield _columns_to_batch(timestamps, columns)
+            columns, timestamps = [[], [], []], []
+    if columns[0]:
+        yield _columns_to_batch(timestamps, columns)
+
+
+def tail_ndjson(path: str, batch_size: int = 4096, follow: bool = False):
+    """One JSON object per line with temperature/humidity/pressure and optional timestamp.
+
+    Records without a timestamp are stamped with their receive time (local, like
+    WeatherData), so the timestamps always line up with the readings.
+    """
+    columns, timestamps = [[], [], []], []
+    for line in _follow_lines(path, follow):
+        if line is IDLE:
+            if columns[0]:
+                yield _columns_to_batch(timestamps, columns)
+                columns, timestamps = [[], [], []], []
+            continue
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        for column, metric in zip(columns, METRICS):
+            column.append(record[metric])
+        timestamp = record.get('timestamp')
+        timestamps.append(datetime.now() if timestamp is None else timestamp)
+        if len(columns[0]) >= batch_size:
+            yield _columns_to_batch(timestamps, columns)
+            columns, timestamps = [[], [], []], []
+    if columns[0]:
+        yield _columns_to_batch(timestamps, columns)
+
+
+# --- Replay ---
+def replay_feed(readings: int = None, rate_hz: float = 0.0, batch_size: int = 4096, seed: int = None):
+    """Synthetic random-walk readings in batches, standing in for hardware.
+
+    `rate_hz` paces the simulated sensor clock in real time (0 = as fast as possible).
+    """
+    if rate_hz:
+        # At most a second of readings per batch, so a paced replay arrives steadily
+        batch_size = max(1, min(batch_size, int(rate_hz)))
+    rng = np.random.default_rng(seed)
+    last = np.array([25.0, 60.0, 1013.0])
+    lower, upper = np.array([0.0, 0.0, 900.0]), np.array([50.0, 100.0, 1100.0])
+    step = np.array([0.2, 0.5, 0.3])
+    clock = np.datetime64(datetime.now(), 'ms')  # local time, like WeatherData
+    interval = np.timedelta64(int(1000 / rate_hz), 'ms') if rate_hz else np.timedelta64(1, 'ms')
+    started, sent = time.monotonic(), 0
+    while readings is None or sent < readings:
+        n = batch_size if readings is None else min(batch_size, readings - sent)
+        walk = np.clip(last + np.cumsum(rng.normal(0, 1, (n, 3)) * step, axis=0), lower, upper)
+        last = walk[-1]
+        timestamps = clock + np.arange(n) * interval
+        clock = timestamps[-1] + interval
+        yield ReadingBatch(walk[:, 0].copy(), walk[:, 1].copy(), walk[:, 2].copy(), timestamps)
+        sent += n
+        if rate_hz:
+            time.sleep(max(0.0, started + sent / rate_hz - time.monotonic()))
+
+
+def limit_feed(feed, readings: int):
+    """The first `readings` readings of a batch feed; stops pulling from `feed` after them."""
+    left = readings
+    for batch in feed:
+        if left <= 0:
+            break
+        if len(batch) > left:
+            stamps = batch.timestamp
+            batch = ReadingBatch(batch.temperature[:left], batch.humidity[:left], batch.pressure[:left],
+                                 None if stamps is None else stamps[:left])
+        left -= len(batch)
+        yield batch
+
+
+def open_feed(spec: str, batch_size: int = 4096, rate_hz: float = 0.0, seed: int = None):
+    """Builds a feed from a spec: csv:PATH, ndjson:PATH, pipe:PATH|-, tcp:HOST:PORT,
+    udp:HOST:PORT or replay[:N]. Add `+follow` to csv/ndjson to keep tailing.
+    `rate_hz` and `seed` apply to replay only; other feeds arrive at their source's pace."""
+    kind, _, target = spec.partition(':')
+    follow = target.endswith('+follow')
+    target = target[:-len('+follow')] if follow else target
+    if kind == 'csv':
+        return tail_csv(target, batch_size, follow)
+    if kind == 'ndjson':
+        return tail_ndjson(target, batch_size, follow)
+    if kind == 'pipe':
+        return pipe_feed(target or '-', batch_size)
+    if kind in ('tcp', 'udp'):
+        host, _, port = target.rpartition(':')
+        return (tcp_feed(host, int(port), batch_size) if kind == 'tcp'
+                else udp_feed(host, int(port)))
+    if kind == 'replay':
+        return replay_feed(int(target) if target else None, rate_hz, batch_size, seed)
+    raise ValueError(f"unknown feed {spec!r}")
@@ -0,0 +1,231 @@
+import math
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+from readings import ReadingBatch
+
+RISING, STEADY, FALLING = 1, 0, -1
+
+
+def to_hours(timestamp) -> float:
+    """Epoch hours; least-squares slopes are therefore in units per hour."""
+    return np.datetime64(timestamp or datetime.now(), 'ms').astype(np.int64) / 3.6e6
+
+
+# --- Sliding-Window Regression ---
+class SlidingSlope:
+    """Least-squares slope over the samples of the last `span_hours`, O(1) per update.
+
+    Samples are summed into `bins` time bins (count, x, y, x*x and x*y, with
+    x relative to the bin start), so memory does not grow with the sensor
+    rate and the window slides one bin at a time. Window totals only change
+    when a bin closes; they are kept with x measured from the oldest bin
+    (re-based as bins expire, and rebuilt exactly once per span), so they
+    stay small and precise however long the sensor runs. The slope stays
+    NaN until the window covers `min_hours` (default: a sixth of the span),
+    when noise alone can no longer reach a trend threshold.
+    """
+    __slots__ = ('span_hours', 'bins', 'min_hours', '_width', '_closed', '_closes', '_origin',
+                 '_n', '_sx', '_sy', '_sxx', '_sxy', '_number', '_cn', '_cx', '_cy', '_cxx', '_cxy')
+
+    def __init__(self, span_hours: float = 3.0, bins: int = 180, min_hours: float = None):
+        if span_hours <= 0 or bins < 2:
+            raise ValueError("span_hours must be positive and bins at least 2")
+        self.span_hours = span_hours
+        self.bins = bins
+        self.min_hours = span_hours / 6 if min_hours is None else min_hours
+        self._width = span_hours / bins
+        self._closed = deque()  # (bin number, n, sx, sy, sxx, sxy), x from the bin start
+        self._closes = 0
+        self._origin = 0.0
+        self._n = 0
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+        # The open bin; late samples are counted in it too
+        self._number = -(1 << 62)
+        self._cn = 0
+        self._cx = self._cy = self._cxx = self._cxy = 0.0
+
+    def __len__(self) -> int:
+        return self._n + self._cn
+
+    def add(self, hours: float, value: float):
+        number = math.floor(hours / self._width)
+        if number > self._number:
+            self._close(number)
+        x = hours - self._number * self._width
+        self._cn += 1
+        self._cx += x
+        self._cy += value
+        self._cxx += x * x
+        self._cxy += x * value
+
+    def add_many(self, hours: np.ndarray, values: np.ndarray):
+        """Time-ordered samples; one reduceat per sum instead of a loop per sample."""
+        if not len(values):
+            return
+        numbers = np.maximum(np.floor(hours / self._width).astype(np.int64), self._number)
+        starts = np.concatenate(([0], np.flatnonzero(numbers[1:] != numbers[:-1]) + 1))
+        local = hours - numbers * self._width
+        sums = zip(*(np.add.reduceat(column, starts).tolist()
+                     for column in (local, values, local * local, local * values)))
+        counts = np.diff(np.append(starts, len(values))).tolist()
+        for number, count, (sx, sy, sxx, sxy) in zip(numbers[starts].tolist(), counts, sums):
+            if number > self._number:
+                self._close(number)
+            self._cn += count
+            self._cx += sx
+            self._cy += sy
+            self._cxx += sxx
+            self._cxy += sxy
+
+    def _close(self, number: int):
+        """Moves the open bin into the window totals and opens bin `number`."""
+        closed = self._closed
+        if self._cn:
+            record = (self._number, self._cn, self._cx, self._cy, self._cxx, self._cxy)
+            closed.append(record)
+            self._include(record, 1)
+        self._number = number
+        self._cn = 0
+        self._cx = self._cy = self._cxx = self._cxy = 0.0
+        while closed and closed[0][0] <= number - self.bins:
+            self._include(closed.popleft(), -1)
+        self._closes += 1
+        if not closed or self._closes % self.bins == 0:
+            self._resum()
+            return
+        # Re-base x to the oldest bin: x' = x - d
+        d = closed[0][0] * self._width - self._origin
+        if d:
+            self._origin += d
+            self._sxx += self._n * d * d - 2 * d * self._sx
+            self._sxy -= d * self._sy
+            self._sx -= self._n * d
+
+    def _include(self, record: tuple, sign: int):
+        number, n, sx, sy, sxx, sxy = record
+        o = number * self._width - self._origin
+        self._n += sign * n
+        self._sx += sign * (sx + n * o)
+        self._sy += sign * sy
+        self._sxx += sign * (sxx + 2 * o * sx + n * o * o)
+        self._sxy += sign * (sxy + o * sy)
+
+    def _resum(self):
+        """Exact window totals from the closed bins, x from the oldest one."""
+        closed, width = self._closed, self._width
+        self._origin = closed[0][0] * width if closed else self._number * width
+        offsets = [b[0] * width - self._origin for b in closed]
+        self._n = sum(b[1] for b in closed)
+        self._sx = math.fsum(b[2] + b[1] * o for b, o in zip(closed, offsets))
+        self._sy = math.fsum(b[3] for b in closed)
+        self._sxx = math.fsum(b[4] + 2 * o * b[2] + b[1] * o * o for b, o in zip(closed, offsets))
+        self._sxy = math.fsum(b[5] + o * b[3] for b, o in zip(closed, offsets))
+
+    @property
+    def covered_hours(self) -> float:
+        first = self._closed[0][0] if self._closed else self._number
+        return (self._number - first + 1) * self._width if self._cn or self._closed else 0.0
+
+    @property
+    def slope(self) -> float:
+        """Units per hour; NaN until the window covers `min_hours` with distinct sample times."""
+        cn, cx, cy = self._cn, self._cx, self._cy
+        o = self._number * self._width - self._origin
+        n = self._n + cn
+        sx = self._sx + cx + cn * o
+        sxx = self._sxx + self._cxx + 2 * o * cx + cn * o * o
+        denominator = n * sxx - sx * sx
+        if n < 2 or self.covered_hours < self.min_hours or denominator <= 1e-12 * max(1.0, n * sxx):
+            return math.nan
+        sy = self._sy + cy
+        sxy = self._sxy + self._cxy + o * cy
+        return (n * sxy - sx * sy) / denominator
+
+
+def window_slopes(hours: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Least-squares slopes for many stations at once; inputs are (stations, window) arrays."""
+    x = hours - hours[:, :1]
+    n = x.shape[1]
+    sx, sy = x.sum(axis=1), values.sum(axis=1)
+    sxx, sxy = (x * x).sum(axis=1), (x * values).sum(axis=1)
+    denominator = n * sxx - sx * sx
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, (n * sxy - sx * sy) / denominator, np.nan)
+
+
+# --- Hysteresis Classification ---
+class TrendThresholds:
+    """A trend starts when |slope| exceeds `enter` and ends when it drops below `exit`."""
+    __slots__ = ('enter', 'exit')
+
+    def __init__(self, enter: float, exit: float):
+        if exit > enter:
+            raise ValueError("exit threshold must not exceed enter threshold")
+        self.enter = enter
+        self.exit = exit
+
+    def classify(self, slope: float, previous: int = STEADY) -> int:
+        if math.isnan(slope):
+            return previous
+        if slope >= self.enter or (previous == RISING and slope > self.exit):
+            return RISING
+        if slope <= -self.enter or (previous == FALLING and slope < -self.exit):
+            return FALLING
+        return STEADY
+
+    def classify_many(self, slopes: np.ndarray, previous: np.ndarray) -> np.ndarray:
+        """Vectorized `classify` across stations."""
+        rising = (slopes >= self.enter) | ((previous == RISING) & (slopes > self.exit))
+        falling = (slopes <= -self.enter) | ((previous == FALLING) & (slopes < -self.exit))
+        states = np.select([rising, falling], [RISING, FALLING], STEADY)
+        return np.where(np.isnan(slopes), previous, states)
+
+
+# Pressure tendency of ~1.5 hPa per 3 h is the usual "rising/falling" cut-off
+DEFAULT_THRESHOLDS = {
+    'pressure': TrendThresholds(enter=0.5, exit=0.25),
+    'temperature': TrendThresholds(enter=1.0, exit=0.5),
+    'humidity': TrendThresholds(enter=3.0, exit=1.5),
+}
+
+
+# --- Forecaster Observer ---
+class TrendForecaster:
+    """Tracks windowed slopes and hysteresis trend states for one or more metrics.
+
+    The window is time-based: `span_hours` should match the thresholds,
+    which are per-hour tendencies judged over the usual 3 h.
+    """
+    def __init__(self, metrics=('pressure',), span_hours: float = 3.0, thresholds: dict = None):
+        thresholds = thresholds or DEFAULT_THRESHOLDS
+        self.slopes = {metric: SlidingSlope(span_hours) for metric in metrics}
+        self.thresholds = {metric: thresholds[metric] for metric in metrics}
+        self.states = {metric: STEADY for metric in metrics}
+
+    def _classify(self):
+        for metric, slope in self.slopes.items():
+            self.states[metric] = self.thresholds[metric].classify(slope.slope, self.states[metric])
+
+    def update(self, subject):
+        hours = to_hours(getattr(subject, 'timestamp', None))
+        for metric, slope in self.slopes.items():
+            slope.add(hours, getattr(subject, metric))
+        self._classify()
+
+    def update_batch(self, subject, batch: ReadingBatch):
+        if batch.timestamp is None:
+            hours = np.full(len(batch), to_hours(None))
+        else:
+            hours = batch.timestamp.astype('datetime64[ms]').astype(np.int64) / 3.6e6
+        for metric, slope in self.slopes.items():
+            slope.add_many(hours, getattr(batch, metric))
+        self._classify()
+
+    def slope(self, metric: str = 'pressure') -> float:
+        return self.slopes[metric].slope
+
+    def trend(self, metric: str = 'pressure') -> int:
+        return self.states[metric]
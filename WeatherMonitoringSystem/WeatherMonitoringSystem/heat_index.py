@@ -0,0 +1,104 @@
+import numpy as np
+
+# --- Scalar Reference Formulas ---
+def polynomial_scalar(t: float, rh: float) -> float:
+    """The expanded 16-term polynomial, exactly as written in HeatIndexDisplay.java."""
+    return float(16.923 + (0.185212 * t) + (5.37941 * rh) - (0.100254 * t * rh)
+                 + (0.00941695 * (t * t)) + (0.00728898 * (rh * rh))
+                 + (0.000345372 * (t * t * rh)) - (0.000814971 * (t * rh * rh))
+                 + (0.0000102102 * (t * t * rh * rh)) - (0.000038646 * (t * t * t))
+                 + (0.0000291583 * (rh * rh * rh)) + (0.00000142721 * (t * t * t * rh))
+                 + (0.000000197483 * (t * rh * rh * rh)) - (0.0000000218429 * (t * t * t * rh * rh))
+                 + 0.000000000843296 * (t * t * rh * rh * rh)
+                 - (0.0000000000481975 * (t * t * t * rh * rh * rh)))
+
+
+def simplified_scalar(t: float, rh: float) -> float:
+    """Approximation of 'Feels Like' temperature (Simplified for Celsius)."""
+    if t < 15:
+        return t # No significant heat index below 15C
+    # A simple factor to show the effect of humidity on perceived temperature
+    return t + (rh / 100.0) * (t - 15.0) * 0.4
+
+
+# --- Vectorized Formulas ---
+# Coefficients of the 16-term polynomial from HeatIndexDisplay.java, laid out
+# as POLYNOMIAL[i][j] for the t**i * rh**j term.
+POLYNOMIAL = np.array([
+    [16.923,        5.37941,       0.00728898,       0.0000291583],
+    [0.185212,     -0.100254,     -0.000814971,      0.000000197483],
+    [0.00941695,    0.000345372,   0.0000102102,     0.000000000843296],
+    [-0.000038646,  0.00000142721, -0.0000000218429, -0.0000000000481975],
+])
+
+
+def heat_index_polynomial(t, rh) -> np.ndarray:
+    """The Java polynomial over whole arrays, evaluated with nested Horner steps.
+
+    Each power of `t` gets a cubic in `rh` (Horner in rh), and those four
+    coefficients are combined with Horner in `t`: 15 multiply-adds per point
+    instead of the 50-odd products of the expanded form.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    rh = np.asarray(rh, dtype=np.float64)
+    result = None
+    for row in POLYNOMIAL[::-1]:
+        coeff = ((row[3] * rh + row[2]) * rh + row[1]) * rh + row[0]
+        result = coeff if result is None else result * t + coeff
+    return result
+
+
+def heat_index_simplified(t, rh) -> np.ndarray:
+    """Vectorized form of the Celsius approximation used by the dashboard."""
+    t = np.asarray(t, dtype=np.float64)
+    rh = np.asarray(rh, dtype=np.float64)
+    return np.where(t < 15, t, t + (rh / 100.0) * (t - 15.0) * 0.4)
+
+
+FORMULAS = {
+    'polynomial': heat_index_polynomial,
+    'simplified': heat_index_simplified,
+}
+SCALAR_FORMULAS = {
+    'polynomial': polynomial_scalar,
+    'simplified': simplified_scalar,
+}
+
+
+# --- Lookup Table ---
+class HeatIndexTable:
+    """Precomputed heat-index grid with bilinear interpolation.
+
+    The grid covers the dashboard's input range (0-50 °C, 0-100 %RH) by
+    default. Points outside it fall back to the exact formula.
+    """
+    def __init__(self, formula: str = 'simplified', t_range=(0.0, 50.0),
+                 rh_range=(0.0, 100.0), step: float = 0.5):
+        self.function = FORMULAS[formula]
+        self.t0, t1 = t_range
+        self.rh0, rh1 = rh_range
+        self.step = step
+        t_axis = np.arange(self.t0, t1 + step / 2, step)
+        rh_axis = np.arange(self.rh0, rh1 + step / 2, step)
+        self.t_max, self.rh_max = t_axis[-1], rh_axis[-1]
+        self.grid = self.function(t_axis[:, None], rh_axis[None, :])
+
+    def __call__(self, t, rh) -> np.ndarray:
+        t = np.asarray(t, dtype=np.float64)
+        rh = np.asarray(rh, dtype=np.float64)
+        n_t, n_rh = self.grid.shape
+
+        x = (t - self.t0) / self.step
+        y = (rh - self.rh0) / self.step
+        i = np.clip(np.floor(x).astype(np.intp), 0, n_t - 2)
+        j = np.clip(np.floor(y).astype(np.intp), 0, n_rh - 2)
+        fx, fy = x - i, y - j
+
+        g = self.grid
+        result = ((g[i, j] * (1 - fx) + g[i + 1, j] * fx) * (1 - fy)
+                  + (g[i, j + 1] * (1 - fx) + g[i + 1, j + 1] * fx) * fy)
+
+        outside = (t < self.t0) | (t > self.t_max) | (rh < self.rh0) | (rh > self.rh_max)
+        if outside.any():
+            result = np.where(outside, self.function(t, rh), result)
+        return result
@@ -0,0 +1,98 @@
+"""Headless ingest worker: runs the weather pipeline at sensor rate without Streamlit.
+
+    python ingest_service.py --rate 1 --report-every 10
+"""
+import argparse
+import random
+import time
+
+from instrumentation import serve_prometheus
+from weather_core import WeatherEngine
+
+
+# --- Sensor Sources ---
+def simulated_sensor(rate_hz: float = 1.0, seed: int = None, limit: int = None):
+    """Random-walk stand-in for a real station, yielding (temperature, humidity, pressure)."""
+    rng = random.Random(seed)
+    t, rh, p = 25.0, 60.0, 1013.0
+    interval = 1.0 / rate_hz if rate_hz else 0.0
+    next_at = time.monotonic()
+    count = 0
+    while limit is None or count < limit:
+        t = min(50.0, max(0.0, t + rng.gauss(0, 0.2)))
+        rh = min(100.0, max(0.0, rh + rng.gauss(0, 0.5)))
+        p = min(1100.0, max(900.0, p + rng.gauss(0, 0.3)))
+        yield (round(t, 1), round(rh, 1), round(p, 1))
+        count += 1
+        if interval:
+            next_at += interval
+            time.sleep(max(0.0, next_at - time.monotonic()))
+
+
+def print_report(engine: WeatherEngine):
+    """Console rendering of the display panels, like the Java displays' println."""
+    for panel in engine.snapshot().panels.values():
+        text = " | ".join(line.replace("**", "") for line in panel.lines + panel.captions)
+        print(f"{panel.title.replace('**', '')}: {text}")
+    gate = engine.weather_data.gate
+    if gate is not None:
+        totals = gate.totals()
+        print(f"Notify gate: {totals['saved']:,} of {totals['offered']:,} display updates saved "
+              f"({totals['deadband']:,} within deadband, {totals['coalesced']:,} coalesced)")
+    late = engine.archive.late if engine.archive is not None else 0
+    if engine.errors or late:
+        print(f"Skipped: {engine.errors:,} readings that failed to ingest, "
+              f"{late:,} out-of-order readings not archived")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the weather pipeline headless.")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="readings per second of the simulated sensor or replay feed "
+                             "(0 = unthrottled; default 1 for the simulated sensor)")
+    parser.add_argument('--limit', type=int, default=None, help="stop after this many readings")
+    parser.add_argument('--report-every', type=float, default=10.0, help="seconds between console reports")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--archive', default=None, help="directory for the on-disk measurement archive")
+    parser.add_argument('--feed', default=None,
+                        help="csv:PATH, ndjson:PATH, pipe:PATH, tcp:HOST:PORT, udp:HOST:PORT or replay[:N] "
+                             "(default: the simulated sensor)")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="enable instrumentation and serve Prometheus metrics on this port")
+    parser.add_argument('--coalesce', type=float, default=None, metavar='SECONDS',
+                        help="update the latest-value displays at most once per SECONDS")
+    parser.add_argument('--deadband', type=float, nargs=3, default=None, metavar=('T', 'RH', 'P'),
+                        help="skip display updates smaller than these changes (°C, %%, hPa); "
+                             "implies --coalesce 0 unless given")
+    args = parser.parse_args()
+    if args.feed and args.rate is not None and not args.feed.startswith('replay'):
+        parser.error("--rate only paces the simulated sensor and replay feeds")
+
+    engine = WeatherEngine(archive_dir=args.archive)
+    if args.coalesce is not None or args.deadband:
+        engine.throttle(args.coalesce or 0.0,
+                        dict(zip(('temperature', 'humidity', 'pressure'), args.deadband or ())))
+    if args.metrics_port:
+        serve_prometheus(engine.instrument(), args.metrics_port)
+        print(f"Metrics at http://localhost:{args.metrics_port}/metrics")
+    if args.feed:
+        from feeds import limit_feed, open_feed  # numpy-backed decoders; the simulated sensor needs none
+
+        feed = open_feed(args.feed, rate_hz=args.rate or 0.0, seed=args.seed)
+        engine.start(feed if args.limit is None else limit_feed(feed, args.limit))
+    else:
+        engine.start(simulated_sensor(1.0 if args.rate is None else args.rate, args.seed, args.limit))
+    try:
+        while engine.running:
+            time.sleep(args.report_every)
+            print_report(engine)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+        print_report(engine)
+
+
+if __name__ == '__main__':
+    main()
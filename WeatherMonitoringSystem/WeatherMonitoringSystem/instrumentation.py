@@ -0,0 +1,295 @@
+"""Hot-path instrumentation for notify()/update().
+
+Off by default: a Subject whose `instruments` is None pays one `is None`
+check per observer. When enabled, every update is timed into an HDR-style
+histogram; counting each update's net allocated memory blocks is a further
+opt-in, since `sys.getallocatedblocks()` walks the allocator's arenas.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+
+
+# --- Latency Histogram ---
+class LatencyHistogram:
+    """Log-linear (HDR-style) histogram of nanosecond latencies.
+
+    Each power of two is split into 2**SUB_BITS linear sub-buckets, so any
+    recorded value is known to within ~3% with a fixed, small bucket array.
+    """
+    SUB_BITS = 5
+    MAX_EXPONENT = 40  # ~18 minutes in ns; larger values land in the last bucket
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * ((self.MAX_EXPONENT - self.SUB_BITS + 1) << self.SUB_BITS)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    @classmethod
+    def index(cls, value: int) -> int:
+        sub = 1 << cls.SUB_BITS
+        if value < sub:
+            return value
+        shift = value.bit_length() - cls.SUB_BITS - 1
+        return min(((shift + 1) << cls.SUB_BITS) + (value >> shift) - sub,
+                   ((cls.MAX_EXPONENT - cls.SUB_BITS + 1) << cls.SUB_BITS) - 1)
+
+    @classmethod
+    def upper_bound(cls, index: int) -> int:
+        """Largest value that falls into bucket `index`."""
+        sub = 1 << cls.SUB_BITS
+        if index < sub:
+            return index
+        shift = (index >> cls.SUB_BITS) - 1
+        return ((sub + (index & (sub - 1)) + 1) << shift) - 1
+
+    def record(self, value: int):
+        self.counts[self.index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'LatencyHistogram'):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> int:
+        """Value at percentile `q` (0-100), within the bucket precision."""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * q // 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def cumulative(self, bounds) -> list:
+        """Number of values <= each bound (ascending, in ns), for Prometheus buckets."""
+        result, seen, index = [], 0, 0
+        for bound in bounds:
+            last = self.index(bound)
+            while index <= last:
+                seen += self.counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+
+# --- Ingest Rate ---
+class RateMeter:
+    """Readings per second over the last `window` whole seconds."""
+    __slots__ = ('window', 'total', '_buckets', '_second')
+
+    def __init__(self, window: int = 10):
+        self.window = window
+        self.total = 0
+        self._buckets = [0] * window
+        self._second = int(time.monotonic())
+
+    def _advance(self, now: int):
+        elapsed = now - self._second
+        if elapsed > 0:
+            for step in range(1, min(elapsed, self.window) + 1):
+                self._buckets[(self._second + step) % self.window] = 0
+            self._second = now
+
+    def add(self, n: int = 1):
+        now = int(time.monotonic())
+        self._advance(now)
+        self._buckets[now % self.window] += n
+        self.total += n
+
+    @property
+    def rate(self) -> float:
+        now = int(time.monotonic())
+        self._advance(now)
+        # The current second is still filling, so leave it out
+        return (sum(self._buckets) - self._buckets[now % self.window]) / (self.window - 1)
+
+
+# --- Registry ---
+# Prometheus histogram bounds in seconds: 1 µs .. 1 s
+LATENCY_BOUNDS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                  1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0)
+
+
+class Instrumentation:
+    """Latency histograms, allocation counts, ingest rates, queue depths and gate counters.
+
+    Attach it with `WeatherEngine.instrument()` (or set `subject.instruments`);
+    detach by setting it back to None.
+    """
+    def __init__(self, track_allocations: bool = False):
+        self.track_allocations = track_allocations
+        self.notify_latency = {}     # 'notify' / 'notify_batch' -> LatencyHistogram
+        self.update_latency = {}     # (observer class, method) -> LatencyHistogram
+        self.allocations = Counter()  # (observer class, method) -> net allocated blocks
+        self.ingest = {}             # station id -> RateMeter
+        self.dispatchers = []
+        self.gates = []
+        self._lock = threading.Lock()
+
+    def _histogram(self, table: dict, key) -> LatencyHistogram:
+        histogram = table.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = table.setdefault(key, LatencyHistogram())
+        return histogram
+
+    # Recording
+    def call(self, observer, method: str, *args):
+        """Invokes `observer.<method>(*args)`, timing it and counting its allocations."""
+        key = (type(observer).__name__, method)
+        blocks = sys.getallocatedblocks() if self.track_allocations else 0
+        start = time.perf_counter_ns()
+        try:
+            return getattr(observer, method)(*args)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            if self.track_allocations:
+                self.allocations[key] += sys.getallocatedblocks() - blocks
+            self._histogram(self.update_latency, key).record(elapsed)
+
+    def time_notify(self, method: str, started_ns: int):
+        self._histogram(self.notify_latency, method).record(time.perf_counter_ns() - started_ns)
+
+    def count_ingest(self, station_id, n: int = 1):
+        meter = self.ingest.get(station_id)
+        if meter is None:
+            with self._lock:
+                meter = self.ingest.setdefault(station_id, RateMeter())
+        meter.add(n)
+
+    def watch(self, dispatcher):
+        """Reports the queue depths and drop/timeout counts of a dispatcher."""
+        if dispatcher not in self.dispatchers:
+            self.dispatchers.append(dispatcher)
+
+    def watch_gate(self, gate):
+        """Reports the deadband/coalescing counters of a NotifyGate."""
+        if gate not in self.gates:
+            self.gates.append(gate)
+
+    def unwatch_gate(self, gate):
+        """Stops reporting a gate that has been replaced or removed."""
+        if gate in self.gates:
+            self.gates.remove(gate)
+
+    # Reporting
+    def summary(self) -> list:
+        """One row per timed call site, slowest p99 first (for tables and the dashboard)."""
+        rows = []
+        for (observer, method), histogram in list(self.update_latency.items()):
+            blocks = self.allocations[(observer, method)] if self.track_allocations else None
+            rows.append(self._row(observer, method, histogram, blocks))
+        for method, histogram in list(self.notify_latency.items()):
+            rows.append(self._row('Subject', method, histogram, None))
+        return sorted(rows, key=lambda row: row['p99_us'], reverse=True)
+
+    @staticmethod
+    def _row(observer: str, method: str, histogram: LatencyHistogram, blocks) -> dict:
+        row = {
+            'observer': observer, 'method': method, 'calls': histogram.count,
+            'mean_us': histogram.total / histogram.count / 1e3 if histogram.count else 0.0,
+            'p50_us': histogram.percentile(50) / 1e3,
+            'p99_us': histogram.percentile(99) / 1e3,
+            'max_us': histogram.max / 1e3,
+        }
+        if blocks is not None:
+            row['blocks_per_call'] = blocks / histogram.count if histogram.count else 0.0
+        return row
+
+    def to_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        bounds_ns = [int(bound * 1e9) for bound in LATENCY_BOUNDS]
+
+        def histogram(name: str, help_text: str, series: dict):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, hist in series.items():
+                for bound, count in zip(LATENCY_BOUNDS, hist.cumulative(bounds_ns)):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"{name}_sum{{{labels}}} {hist.total / 1e9:.9f}")
+                lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+        histogram('weather_notify_seconds', "Time for one Subject notify round over all observers.",
+                  {f'method="{method}"': hist for method, hist in list(self.notify_latency.items())})
+        histogram('weather_observer_update_seconds', "Time spent in one observer update.",
+                  {f'observer="{observer}",method="{method}"': hist
+                   for (observer, method), hist in list(self.update_latency.items())})
+
+        lines.append("# HELP weather_observer_allocated_blocks_total Net memory blocks allocated by observer updates.")
+        lines.append("# TYPE weather_observer_allocated_blocks_total counter")
+        for (observer, method), blocks in list(self.allocations.items()):
+            lines.append(f'weather_observer_allocated_blocks_total{{observer="{observer}",method="{method}"}} {blocks}')
+
+        lines.append("# HELP weather_ingest_readings_total Readings ingested per station.")
+        lines.append("# TYPE weather_ingest_readings_total counter")
+        for station, meter in list(self.ingest.items()):
+            lines.append(f'weather_ingest_readings_total{{station="{station}"}} {meter.total}')
+        lines.append("# HELP weather_ingest_rate Readings per second per station, over the last 10 s.")
+        lines.append("# TYPE weather_ingest_rate gauge")
+        for station, meter in list(self.ingest.items()):
+            lines.append(f'weather_ingest_rate{{station="{station}"}} {meter.rate:g}')
+
+        lines.append("# HELP weather_dispatch_queue_depth Readings waiting for an asynchronous observer.")
+        lines.append("# TYPE weather_dispatch_queue_depth gauge")
+        events = []
+        for dispatcher in self.dispatchers:
+            for observer, depth in dispatcher.queue_depths().items():
+                lines.append(f'weather_dispatch_queue_depth{{observer="{type(observer).__name__}"}} {depth}')
+            for observer, stats in dispatcher.stats().items():
+                events += [(type(observer).__name__, event, n) for event, n in stats.items()]
+        lines.append("# HELP weather_dispatch_events_total Delivered/dropped/coalesced/timed-out/failed readings.")
+        lines.append("# TYPE weather_dispatch_events_total counter")
+        for observer, event, n in events:
+            lines.append(f'weather_dispatch_events_total{{observer="{observer}",event="{event}"}} {n}')
+
+        lines.append("# HELP weather_gate_readings_total Offered/delivered/deadband/coalesced readings "
+                     "per coalesced observer.")
+        lines.append("# TYPE weather_gate_readings_total counter")
+        for gate in self.gates:
+            for observer, stats in gate.stats().items():
+                for event, n in stats.items():
+                    lines.append(f'weather_gate_readings_total{{observer="{type(observer).__name__}",'
+                                 f'event="{event}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+def serve_prometheus(instrumentation: Instrumentation, port: int, host: str = '') -> 'ThreadingHTTPServer':
+    """Serves `/metrics` from a daemon thread; call `.shutdown()` on the result to stop."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # only the exporter needs it
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = instrumentation.to_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
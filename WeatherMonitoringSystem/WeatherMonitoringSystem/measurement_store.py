@@ -0,0 +1,124 @@
+from datetime import datetime
+
+import numpy as np
+
+from readings import READING, Reading
+
+# --- Columnar Ring Buffer ---
+class MeasurementStore:
+    """Fixed-capacity, NumPy-backed history of weather measurements.
+
+    Each column is allocated at twice the capacity and every value is written
+    to both halves ("mirrored" ring buffer). The most recent `len(self)` rows are
+    therefore always one contiguous slice, so reads are zero-copy views and
+    appends are O(1) with no reallocation once the buffer is full.
+    """
+    COLUMNS = {name: READING[name] for name in READING.names}
+    # Column headers used by the dashboard table
+    LABELS = {
+        'timestamp': "Time",
+        'temperature': "Temp (°C)",
+        'humidity': "Humidity (%)",
+        'pressure': "Pressure (hPa)",
+    }
+
+    def __init__(self, capacity: int = 10_000):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._columns = {name: np.zeros(2 * capacity, dtype=dtype)
+                         for name, dtype in self.COLUMNS.items()}
+        self._next = 0  # slot the next append writes to, in [0, capacity)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, temperature: float, humidity: float, pressure: float,
+               timestamp: datetime = None):
+        """Stores one reading, overwriting the oldest once capacity is reached."""
+        ts = np.datetime64(timestamp or datetime.now(), 'ms')
+        i, j = self._next, self._next + self.capacity
+        for name, value in (('timestamp', ts), ('temperature', temperature),
+                            ('humidity', humidity), ('pressure', pressure)):
+            column = self._columns[name]
+            column[i] = value
+            column[j] = value
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, batch: 'ReadingBatch'):
+        """Stores a block of readings with one vectorized write per column."""
+        n = len(batch)
+        if not n:
+            return
+        timestamp = batch.timestamp
+        if timestamp is None:
+            timestamp = np.full(n, np.datetime64(datetime.now(), 'ms'))
+        keep = min(n, self.capacity)
+        slots = (self._next + np.arange(n - keep, n)) % self.capacity
+        for name, values in (('timestamp', timestamp), ('temperature', batch.temperature),
+                             ('humidity', batch.humidity), ('pressure', batch.pressure)):
+            column = self._columns[name]
+            column[slots] = values[-keep:]
+            column[slots + self.capacity] = values[-keep:]
+        self._next = (self._next + n) % self.capacity
+        self._size = min(self._size + n, self.capacity)
+
+    def last(self) -> Reading:
+        """The newest reading, or None while the store is empty."""
+        if not self._size:
+            return None
+        i = (self._next - 1) % self.capacity
+        columns = self._columns
+        return Reading(float(columns['temperature'][i]), float(columns['humidity'][i]),
+                       float(columns['pressure'][i]), columns['timestamp'][i])
+
+    def to_records(self, start=None, end=None) -> np.ndarray:
+        """The rows with start <= timestamp < end as one READING array (a copy)."""
+        columns = self.between(start, end)
+        records = np.empty(len(columns['timestamp']), dtype=READING)
+        for name, view in columns.items():
+            records[name] = view
+        return records
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy, read-only view of a column, ordered oldest to newest."""
+        end = self._next + self.capacity
+        view = self._columns[name][end - self._size:end]
+        view.flags.writeable = False
+        return view
+
+    def columns(self) -> dict:
+        return {name: self.column(name) for name in self.COLUMNS}
+
+    def between(self, start=None, end=None) -> dict:
+        """Zero-copy views of the rows with start <= timestamp < end (time-ordered appends)."""
+        return select_between(self.columns(), start, end)
+
+    def snapshot(self) -> dict:
+        """Read-only copies of the columns; unlike views, later appends cannot change them."""
+        copies = {name: view.copy() for name, view in self.columns().items()}
+        for array in copies.values():
+            array.flags.writeable = False
+        return copies
+
+    def to_frame(self, newest_first: bool = True, start=None, end=None) -> 'pd.DataFrame':
+        """Builds a DataFrame for `st.dataframe` with the dashboard's column labels."""
+        return columns_to_frame(self.between(start, end), newest_first)
+
+
+def select_between(columns: dict, start=None, end=None) -> dict:
+    """Slices a {'timestamp': ..., ...} column mapping to start <= timestamp < end."""
+    timestamps = columns['timestamp']
+    lo = 0 if start is None else int(np.searchsorted(timestamps, np.datetime64(start, 'ms')))
+    hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, np.datetime64(end, 'ms')))
+    return {name: view[lo:hi] for name, view in columns.items()}
+
+
+def columns_to_frame(columns: dict, newest_first: bool = True) -> 'pd.DataFrame':
+    import pandas as pd  # only the dashboard needs pandas; headless workers never call this
+
+    step = -1 if newest_first else 1
+    return pd.DataFrame({MeasurementStore.LABELS[name]: view[::step]
+                         for name, view in columns.items()}, copy=False)
@@ -0,0 +1,153 @@
+"""Pre-notify stage: per-metric deadband filtering and rate-limited coalescing.
+
+Chatty sensors (10-50 Hz) produce far more readings than a display can
+show. A NotifyGate set as `subject.gate` (see `WeatherEngine.throttle()`)
+sits in front of `notify()`. Observers added with `coalesce()` get a
+reading only when it differs from the last one they got by more than the
+deadband of some metric, and at most once per `interval`; a reading held
+back inside the window is superseded by newer ones and delivered by the
+first reading after the window or by `Subject.flush()`. Every other
+observer is lossless and still gets every reading.
+"""
+import time
+
+from readings import METRICS
+
+# Per-metric deadbands; 0 drops exact repeats only
+DEADBAND = {metric: 0.0 for metric in METRICS}
+
+
+class GateStats:
+    """What happened to the readings offered to one coalesced observer.
+
+    offered = delivered + deadband + coalesced (+ 1 while a reading is held).
+    """
+    __slots__ = ('offered', 'delivered', 'deadband', 'coalesced')
+
+    def __init__(self):
+        self.offered = self.delivered = self.deadband = self.coalesced = 0
+
+    @property
+    def saved(self) -> int:
+        """Updates not made."""
+        return self.offered - self.delivered
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _Lane:
+    """Delivery state of one coalesced observer."""
+    __slots__ = ('observer', 'interval', 'deadband', 'sent', 'sent_at', 'pending', 'stats')
+
+    def __init__(self, observer, interval: float, deadband: tuple):
+        self.observer = observer
+        self.interval = interval
+        self.deadband = deadband
+        self.sent = None       # (temperature, humidity, pressure) last delivered
+        self.sent_at = 0.0
+        self.pending = False   # a newer reading than `sent` is being held back
+        self.stats = GateStats()
+
+    def offer(self, values: tuple, now: float, n: int) -> bool:
+        """Whether to deliver now; `n` > 1 offers a batch, of which only the last reading counts."""
+        stats = self.stats
+        stats.offered += n
+        stats.coalesced += n - 1
+        sent, band = self.sent, self.deadband
+        if (sent is not None and abs(values[0] - sent[0]) <= band[0]
+                and abs(values[1] - sent[1]) <= band[1] and abs(values[2] - sent[2]) <= band[2]):
+            # What the observer shows is still good for the newest reading
+            stats.deadband += 1
+            if self.pending:
+                stats.coalesced += 1
+                self.pending = False
+            return False
+        if self.pending:
+            stats.coalesced += 1
+        if sent is not None and now - self.sent_at < self.interval:
+            self.pending = True
+            return False
+        self.deliver(values, now)
+        return True
+
+    def deliver(self, values: tuple, now: float):
+        self.sent = values
+        self.sent_at = now
+        self.pending = False
+        self.stats.delivered += 1
+
+
+class NotifyGate:
+    """Decides which observers `notify()` updates for each reading.
+
+    `deadband` maps metrics to the smallest change worth showing (defaults
+    in DEADBAND); `clock` is injectable for replay and benchmarks.
+    """
+    def __init__(self, deadband: dict = None, clock=time.monotonic):
+        self.deadband = {**DEADBAND, **(deadband or {})}
+        self.clock = clock
+        self._lanes = {}
+
+    def coalesce(self, observer, interval: float = 0.5, deadband: dict = None):
+        """Limits `observer` to the latest reading at most once per `interval` seconds,
+        skipping readings within the gate's (or this) `deadband` of the last one it got."""
+        bands = {**self.deadband, **(deadband or {})}
+        self._lanes[observer] = _Lane(observer, interval, tuple(bands[metric] for metric in METRICS))
+
+    def release(self, observer):
+        """Makes `observer` lossless again."""
+        self._lanes.pop(observer, None)
+
+    def handles(self, observer) -> bool:
+        return observer in self._lanes
+
+    def admit(self, subject, observers, n: int = 1) -> list:
+        """The observers to update for the subject's current reading, in order.
+
+        Called with `n` readings for a batch (the subject holds the last one).
+        """
+        lanes = self._lanes
+        if not lanes:
+            return list(observers)
+        values = (subject.temperature, subject.humidity, subject.pressure)
+        now = self.clock()
+        held = {observer for observer, lane in lanes.items() if not lane.offer(values, now, n)}
+        if not held:
+            return list(observers)
+        return [observer for observer in observers if observer not in held]
+
+    def flush(self, subject, force: bool = False) -> list:
+        """Observers holding back a reading whose window has passed (all of them with
+        `force`); they are due an update with the subject's current reading."""
+        values = (subject.temperature, subject.humidity, subject.pressure)
+        now = self.clock()
+        due = []
+        for observer, lane in list(self._lanes.items()):
+            if lane.pending and (force or now - lane.sent_at >= lane.interval):
+                lane.deliver(values, now)
+                due.append(observer)
+        return due
+
+    # Reporting
+    def stats(self) -> dict:
+        """observer -> counters, like the dispatchers' `stats()`."""
+        return {lane.observer: lane.stats.as_dict() for lane in self._lanes.values()}
+
+    def summary(self) -> list:
+        """One row per coalesced observer with the share of updates saved."""
+        rows = []
+        for lane in self._lanes.values():
+            stats = lane.stats
+            rows.append({'observer': type(lane.observer).__name__, 'interval_s': lane.interval,
+                         **stats.as_dict(), 'saved': stats.saved,
+                         'saved_pct': 100.0 * stats.saved / stats.offered if stats.offered else 0.0})
+        return rows
+
+    def totals(self) -> dict:
+        totals = {name: 0 for name in GateStats.__slots__}
+        for lane in self._lanes.values():
+            for name, value in lane.stats.as_dict().items():
+                totals[name] += value
+        totals['saved'] = totals['offered'] - totals['delivered']
+        return totals
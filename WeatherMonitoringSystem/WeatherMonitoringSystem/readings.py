@@ -0,0 +1,149 @@
+from datetime import datetime
+
+import numpy as np
+
+METRICS = ('temperature', 'humidity', 'pressure')
+# Dashboard table headers accepted as aliases when a DataFrame is passed in
+LABELS = {
+    "Time": 'timestamp',
+    "Temp (°C)": 'temperature',
+    "Humidity (%)": 'humidity',
+    "Pressure (hPa)": 'pressure',
+}
+# Array form of one reading: 32 bytes, shared by the archive files, binary
+# feed frames and any structured array of readings
+READING = np.dtype([
+    ('timestamp', '<M8[ms]'),
+    ('temperature', '<f8'),
+    ('humidity', '<f8'),
+    ('pressure', '<f8'),
+])
+
+
+# --- Single Readings ---
+class Reading:
+    """One measurement with no per-instance __dict__; a READING record as an object."""
+    __slots__ = ('temperature', 'humidity', 'pressure', 'timestamp')
+
+    def __init__(self, temperature: float, humidity: float, pressure: float, timestamp=None):
+        self.temperature = temperature
+        self.humidity = humidity
+        self.pressure = pressure
+        self.timestamp = timestamp
+
+    def __repr__(self) -> str:
+        return (f"Reading(temperature={self.temperature!r}, humidity={self.humidity!r}, "
+                f"pressure={self.pressure!r}, timestamp={self.timestamp!r})")
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Reading):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    def astuple(self) -> tuple:
+        return (self.temperature, self.humidity, self.pressure, self.timestamp)
+
+    @classmethod
+    def from_record(cls, record) -> 'Reading':
+        return cls(float(record['temperature']), float(record['humidity']), float(record['pressure']),
+                   record['timestamp'])
+
+    def to_record(self) -> np.ndarray:
+        """A one-element READING array (timestamp defaults to now)."""
+        record = np.empty(1, dtype=READING)
+        record[0] = (np.datetime64(self.timestamp or datetime.now(), 'ms'),
+                     self.temperature, self.humidity, self.pressure)
+        return record
+
+
+# --- Batched Readings ---
+class ReadingBatch:
+    """A block of readings as parallel float64 arrays (oldest first)."""
+    __slots__ = ('temperature', 'humidity', 'pressure', 'timestamp')
+
+    def __init__(self, temperature: np.ndarray, humidity: np.ndarray, pressure: np.ndarray,
+                 timestamp: np.ndarray = None):
+        self.temperature = temperature
+        self.humidity = humidity
+        self.pressure = pressure
+        self.timestamp = timestamp
+
+    def __len__(self) -> int:
+        return len(self.temperature)
+
+    def __getitem__(self, index: int) -> Reading:
+        return Reading(float(self.temperature[index]), float(self.humidity[index]), float(self.pressure[index]),
+                       self.timestamp[index] if self.timestamp is not None else None)
+
+    def last(self) -> tuple:
+        """The most recent (temperature, humidity, pressure) triple."""
+        return (float(self.temperature[-1]), float(self.humidity[-1]), float(self.pressure[-1]))
+
+    @classmethod
+    def from_records(cls, records: np.ndarray) -> 'ReadingBatch':
+        """Zero-copy field views of a structured array with READING's fields."""
+        return cls(records['temperature'], records['humidity'], records['pressure'], records['timestamp'])
+
+    def to_records(self) -> np.ndarray:
+        """Interleaves the columns into one READING array (missing timestamps become now)."""
+        records = np.empty(len(self), dtype=READING)
+        records['timestamp'] = (self.timestamp if self.timestamp is not None
+                                else np.datetime64(datetime.now(), 'ms'))
+        records['temperature'] = self.temperature
+        records['humidity'] = self.humidity
+        records['pressure'] = self.pressure
+        return records
+
+    def readings(self) -> list:
+        """The batch as Reading objects; one tolist() per column, no per-element NumPy scalars."""
+        stamps = self.timestamp.tolist() if self.timestamp is not None else [None] * len(self)
+        return [Reading(t, rh, p, ts) for t, rh, p, ts in zip(self.temperature.tolist(), self.humidity.tolist(),
+                                                             self.pressure.tolist(), stamps)]
+
+    @classmethod
+    def from_readings(cls, readings) -> 'ReadingBatch':
+        readings = list(readings)
+        n = len(readings)
+        columns = [np.fromiter((getattr(r, metric) for r in readings), np.float64, count=n)
+                   for metric in METRICS]
+        stamps = [r.timestamp for r in readings]
+        timestamp = None if all(ts is None for ts in stamps) else np.array(
+            [ts if ts is not None else datetime.now() for ts in stamps], dtype='datetime64[ms]')
+        return cls(*columns, timestamp=timestamp)
+
+
+def as_reading_batch(data) -> ReadingBatch:
+    """Normalizes a DataFrame, mapping, READING records, list of Readings, (n, 3) array
+    or 3-tuple of arrays to a ReadingBatch."""
+    if isinstance(data, ReadingBatch):
+        return data
+    if hasattr(data, '__len__') and not len(data):
+        # [], an empty DataFrame, array or mapping: an empty block, not an error
+        empty = np.empty(0, dtype=np.float64)
+        return ReadingBatch(empty, empty, empty)
+    if isinstance(data, np.ndarray) and data.dtype.names:
+        return ReadingBatch.from_records(data)
+    if isinstance(data, (list, tuple)) and data and isinstance(data[0], Reading):
+        return ReadingBatch.from_readings(data)
+
+    if hasattr(data, 'columns'):  # pandas DataFrame
+        data = {LABELS.get(name, name): data[name].to_numpy() for name in data.columns}
+    if isinstance(data, dict):
+        missing = [m for m in METRICS if m not in data]
+        if missing:
+            raise ValueError(f"readings are missing columns: {', '.join(missing)}")
+        columns = [data[m] for m in METRICS]
+        timestamp = data.get('timestamp')
+    else:
+        array = np.asarray(data, dtype=np.float64)
+        if array.ndim != 2 or 3 not in array.shape:
+            raise ValueError("expected an (n, 3) array or three arrays of readings")
+        columns = list(array.T if array.shape[1] == 3 else array)
+        timestamp = None
+
+    columns = [np.asarray(c, dtype=np.float64) for c in columns]
+    if len({len(c) for c in columns}) != 1:
+        raise ValueError("temperature, humidity and pressure must have the same length")
+    if timestamp is not None:
+        timestamp = np.asarray(timestamp, dtype='datetime64[ms]')
+    return ReadingBatch(*columns, timestamp=timestamp)
@@ -0,0 +1,237 @@
+from datetime import datetime
+
+import numpy as np
+
+from readings import METRICS, ReadingBatch
+
+# Stored per metric; mean is derived from sum/count when read
+_STORED = ('min', 'max', 'sum', 'last')
+BUCKET = np.dtype([('start', '<M8[ms]'), ('count', '<i8')]
+                  + [(f"{metric}_{agg}", '<f8') for metric in METRICS for agg in _STORED])
+
+
+# --- One Resolution ---
+class RollupLevel:
+    """min/max/mean/last aggregates per time bucket at one resolution.
+
+    The bucket being filled is kept as plain Python numbers; closed buckets go
+    into a fixed-capacity ring of structured records. Buckets stay in time
+    order: a reading for a bucket older than the open one is dropped and
+    counted in `late`, like MeasurementArchive does.
+    """
+    def __init__(self, name: str, unit: str, capacity: int):
+        self.name = name
+        self.unit = unit  # NumPy datetime unit: 'm', 'h' or 'D'
+        self.capacity = capacity
+        self._ring = np.zeros(capacity, dtype=BUCKET)
+        self._next = 0
+        self._size = 0
+        self._open_start = None
+        self._open = None  # [count, then min/max/sum/last for each metric]
+        self.late = 0
+
+    def _bucket(self, ts) -> np.datetime64:
+        return np.datetime64(ts, 'ms').astype(f'datetime64[{self.unit}]')
+
+    def _open_record(self) -> np.ndarray:
+        record = np.zeros(1, dtype=BUCKET)
+        record['start'] = self._open_start
+        record['count'] = self._open[0]
+        for i, metric in enumerate(METRICS):
+            for j, agg in enumerate(_STORED):
+                record[f"{metric}_{agg}"] = self._open[1 + 4 * i + j]
+        return record
+
+    def _push(self, record):
+        self._ring[self._next] = record
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def _close(self):
+        if self._open_start is not None:
+            self._push(self._open_record()[0])
+
+    def add(self, timestamp, values: tuple):
+        bucket = self._bucket(timestamp)
+        if bucket != self._open_start:
+            if self._open_start is not None and bucket < self._open_start:
+                self.late += 1
+                return
+            self._close()
+            self._open_start = bucket
+            self._open = [0] + [v for value in values for v in (value, value, 0.0, value)]
+        agg = self._open
+        agg[0] += 1
+        for i, value in enumerate(values):
+            k = 1 + 4 * i
+            if value < agg[k]:
+                agg[k] = value
+            if value > agg[k + 1]:
+                agg[k + 1] = value
+            agg[k + 2] += value
+            agg[k + 3] = value
+
+    def add_many(self, timestamps: np.ndarray, columns: tuple):
+        """Vectorized add: one reduceat per aggregate instead of a loop per reading."""
+        buckets = timestamps.astype(f'datetime64[{self.unit}]')
+        if self._open_start is not None:
+            late = buckets < self._open_start
+            if late.any():
+                self.late += int(late.sum())
+                keep = ~late
+                timestamps, buckets = timestamps[keep], buckets[keep]
+                columns = tuple(values[keep] for values in columns)
+        if not len(buckets):
+            return
+        if np.any(timestamps[1:] < timestamps[:-1]):
+            # reduceat needs each bucket's readings contiguous, and `last` the newest one
+            order = np.argsort(timestamps, kind='stable')
+            buckets = buckets[order]
+            columns = tuple(values[order] for values in columns)
+        starts = np.concatenate(([0], np.flatnonzero(buckets[1:] != buckets[:-1]) + 1))
+        ends = np.append(starts[1:], len(buckets))
+        groups = np.zeros(len(starts), dtype=BUCKET)
+        groups['start'] = buckets[starts]
+        groups['count'] = ends - starts
+        for metric, values in zip(METRICS, columns):
+            groups[f"{metric}_min"] = np.minimum.reduceat(values, starts)
+            groups[f"{metric}_max"] = np.maximum.reduceat(values, starts)
+            groups[f"{metric}_sum"] = np.add.reduceat(values, starts)
+            groups[f"{metric}_last"] = values[ends - 1]
+
+        first = groups[0]
+        if self._open_start is not None and first['start'] == self._open_start:
+            # The batch continues the bucket that is already open
+            agg = self._open
+            agg[0] += int(first['count'])
+            for i, metric in enumerate(METRICS):
+                k = 1 + 4 * i
+                agg[k] = min(agg[k], float(first[f"{metric}_min"]))
+                agg[k + 1] = max(agg[k + 1], float(first[f"{metric}_max"]))
+                agg[k + 2] += float(first[f"{metric}_sum"])
+                agg[k + 3] = float(first[f"{metric}_last"])
+            groups = groups[1:]
+        if not len(groups):
+            return
+
+        self._close()
+        for record in groups[:-1][-self.capacity:]:
+            self._push(record)
+        last = groups[-1]
+        self._open_start = last['start'].astype(f'datetime64[{self.unit}]')
+        self._open = [int(last['count'])] + [float(last[f"{metric}_{agg}"])
+                                             for metric in METRICS for agg in _STORED]
+
+    def buckets(self) -> np.ndarray:
+        """All buckets, oldest first, including the one still being filled."""
+        # Once full, _size == capacity and the oldest bucket sits at _next
+        ring = np.concatenate((self._ring[self._next:self._size], self._ring[:self._next]))
+        if self._open_start is None:
+            return ring
+        return np.concatenate((ring, self._open_record()))
+
+    def to_frame(self, start=None, end=None, newest_first: bool = True) -> 'pd.DataFrame':
+        return buckets_to_frame(self.buckets(), self.unit, start, end, newest_first)
+
+
+def buckets_to_frame(buckets: np.ndarray, unit: str, start=None, end=None,
+                     newest_first: bool = True) -> 'pd.DataFrame':
+    """Table of bucket aggregates; `start` is rounded down to the bucket `unit`."""
+    import pandas as pd
+
+    if start is not None:
+        buckets = buckets[buckets['start'] >= np.datetime64(start, 'ms').astype(f'datetime64[{unit}]')]
+    if end is not None:
+        buckets = buckets[buckets['start'] < np.datetime64(end, 'ms')]
+    frame = {"Time": buckets['start'], "Readings": buckets['count']}
+    for metric in METRICS:
+        frame[f"{metric} min"] = buckets[f"{metric}_min"]
+        frame[f"{metric} max"] = buckets[f"{metric}_max"]
+        frame[f"{metric} mean"] = buckets[f"{metric}_sum"] / np.maximum(buckets['count'], 1)
+        frame[f"{metric} last"] = buckets[f"{metric}_last"]
+    frame = pd.DataFrame(frame)
+    return frame.iloc[::-1].reset_index(drop=True) if newest_first else frame
+
+
+# --- Rollup Observer ---
+class Rollups:
+    """Minute/hour/day aggregates maintained incrementally as readings arrive.
+
+    Registered with WeatherData like any other observer. `since` is the first
+    reading aggregated: after a restart the rollups are rebuilt from the
+    restored readings only, so earlier buckets are missing, not empty.
+    """
+    def __init__(self, minutes: int = 7 * 24 * 60, hours: int = 90 * 24, days: int = 5 * 365):
+        self.levels = {
+            'minute': RollupLevel('minute', 'm', minutes),
+            'hour': RollupLevel('hour', 'h', hours),
+            'day': RollupLevel('day', 'D', days),
+        }
+        self.since = None
+
+    def update(self, subject):
+        timestamp = getattr(subject, 'timestamp', None) or datetime.now()
+        if self.since is None:
+            self.since = np.datetime64(timestamp, 'ms')
+        values = (subject.temperature, subject.humidity, subject.pressure)
+        for level in self.levels.values():
+            level.add(timestamp, values)
+
+    def update_batch(self, subject, batch: ReadingBatch):
+        timestamps = batch.timestamp
+        if timestamps is None:
+            timestamps = np.full(len(batch), np.datetime64(datetime.now(), 'ms'))
+        if self.since is None and len(timestamps):
+            self.since = timestamps.min().astype('datetime64[ms]')
+        for level in self.levels.values():
+            level.add_many(timestamps, (batch.temperature, batch.humidity, batch.pressure))
+
+    def level_for(self, span: np.timedelta64, max_points: int) -> RollupLevel:
+        """Finest level that covers `span` in at most `max_points` buckets."""
+        for level in self.levels.values():
+            if span / np.timedelta64(1, level.unit) <= max_points:
+                return level
+        return self.levels['day']
+
+
+# --- Chart Downsampling ---
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the shape of y(x)."""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(columns: dict, max_points: int) -> dict:
+    """Applies LTTB to each metric of a {'timestamp': ..., metric: ...} mapping.
+
+    Each metric gets an equal share of `max_points` and the kept indices are
+    the union over metrics, so every series keeps its own peaks, all of them
+    still share one time axis and at most `max_points` rows are returned.
+    """
+    timestamps = columns['timestamp']
+    if len(timestamps) <= max_points:
+        return columns
+    x = timestamps.astype('int64')
+    share = max_points // len(METRICS)
+    if share >= 3:
+        keep = np.unique(np.concatenate([lttb(x, columns[metric], share) for metric in METRICS]))
+    else:
+        # Too few points to split: spread them evenly instead
+        keep = np.unique(np.linspace(0, len(timestamps) - 1, max_points).astype(np.intp))
+    return {name: values[keep] for name, values in columns.items()}
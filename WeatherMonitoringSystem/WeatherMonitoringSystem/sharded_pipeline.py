@@ -0,0 +1,263 @@
+"""Sharded execution: stations are partitioned across worker processes.
+
+Each worker runs its own WeatherData and observers for the stations it owns,
+so a burst on one station only loads one core. Readings go to a worker
+through a pair of shared-memory input slots (double buffering) and the
+per-station aggregates come back through one shared-memory table; nothing
+but slot numbers crosses the pipes.
+"""
+import multiprocessing as mp
+import os
+from collections import deque
+from datetime import datetime
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from readings import METRICS, READING, ReadingBatch, as_reading_batch
+
+# One input record: the station's index in the pipeline plus a READING
+INPUT = np.dtype([('station', '<i8')] + READING.descr)
+# One row of the shared aggregate table per station
+AGGREGATE = np.dtype([
+    ('version', '<i8'),
+    ('timestamp', '<M8[ms]'),
+    ('temperature', '<f8'),
+    ('humidity', '<f8'),
+    ('pressure', '<f8'),
+] + [(f"{metric}_{agg}", '<f8') for metric in METRICS for agg in ('mean', 'm2', 'min', 'max')] + [
+    ('pressure_slope', '<f8'),
+    ('pressure_trend', '<i8'),
+    ('heat_index', '<f8'),
+    ('heat_index_peak', '<f8'),
+])
+SLOTS = 2
+
+
+def _attach(name: str, shape, dtype) -> tuple:
+    memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+# --- Worker Side ---
+class _StationPipeline:
+    """WeatherData plus the aggregating displays for one station."""
+    def __init__(self, forecast_hours: float):
+        from weather_core import ForecastDisplay, HeatIndexDisplay, StatisticsDisplay, WeatherData
+
+        self.weather_data = WeatherData()
+        self.stats = StatisticsDisplay()
+        self.forecast = ForecastDisplay(forecast_hours)
+        self.heat = HeatIndexDisplay()
+        for observer in (self.stats, self.forecast, self.heat):
+            self.weather_data.register(observer)
+
+    def row(self) -> tuple:
+        wd = self.weather_data
+        values = [wd.version, wd.timestamp, wd.temperature, wd.humidity, wd.pressure]
+        for metric in METRICS:
+            stats = self.stats.stats[metric]
+            values += [stats.mean, stats.variance * max(stats.count - 1, 0), stats.min, stats.max]
+        peak = self.heat.peak if self.heat.peak is not None else self.heat.heat_index
+        values += [self.forecast.forecaster.slope('pressure'), self.forecast.forecaster.trend('pressure'),
+                   self.heat.heat_index, peak]
+        return tuple(values)
+
+
+class _Shard:
+    """The stations owned by one worker; publishes into the shared aggregate table.
+
+    `seq` is a per-row sequence lock: odd while a row is being written, so
+    readers on other processes can detect and retry torn reads.
+    """
+    def __init__(self, table: np.ndarray, seq: np.ndarray, forecast_hours: float = 3.0):
+        self.table = table
+        self.seq = seq
+        self.forecast_hours = forecast_hours
+        self.pipelines = {}
+
+    def process(self, block: np.ndarray):
+        """Applies a block already grouped by station (see ShardedPipeline.submit_block)."""
+        stations = block['station']
+        cuts = np.flatnonzero(stations[1:] != stations[:-1]) + 1
+        for part in np.split(block, cuts):
+            index = int(part['station'][0])
+            pipeline = self.pipelines.get(index)
+            if pipeline is None:
+                pipeline = self.pipelines[index] = _StationPipeline(self.forecast_hours)
+            pipeline.weather_data.set_measurements_batch(ReadingBatch.from_records(part))
+            self.seq[index] += 1
+            self.table[index] = pipeline.row()
+            self.seq[index] += 1
+
+
+def _worker(input_name: str, capacity: int, table_name: str, stations: int, forecast_hours: float, conn):
+    inputs_memory, inputs = _attach(input_name, (SLOTS, capacity), INPUT)
+    table_memory, shared = _attach(table_name, stations * AGGREGATE.itemsize + stations * 8, np.uint8)
+    seq = shared[:stations * 8].view(np.uint64)
+    shard = _Shard(shared[stations * 8:].view(AGGREGATE), seq, forecast_hours)
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            slot, n = message
+            shard.process(inputs[slot, :n])
+            conn.send(slot)  # the slot may be refilled
+    finally:
+        del inputs, shared, seq, shard
+        inputs_memory.close()
+        table_memory.close()
+        conn.close()
+
+
+# --- Coordinator ---
+class ShardedPipeline:
+    """Runs one WeatherData pipeline per station on `workers` processes.
+
+    Stations are assigned round-robin by their position in `stations`.
+    `submit`/`submit_block` return as soon as the readings are in a worker's
+    input slot; `flush()` waits until everything submitted has been applied.
+    """
+    def __init__(self, stations, workers: int = None, slot_capacity: int = 65_536,
+                 forecast_hours: float = 3.0):
+        self.stations = list(stations)
+        self.index = {station: i for i, station in enumerate(self.stations)}
+        self.workers = workers or os.cpu_count() or 1
+        self.slot_capacity = slot_capacity
+        n = len(self.stations)
+        self.shard_of = np.arange(n) % self.workers
+
+        self._table_memory = shared_memory.SharedMemory(create=True, size=max(n * (AGGREGATE.itemsize + 8), 1))
+        shared = np.ndarray(n * (AGGREGATE.itemsize + 8), dtype=np.uint8, buffer=self._table_memory.buf)
+        self._seq = shared[:n * 8].view(np.uint64)
+        self._table = shared[n * 8:].view(AGGREGATE)
+        self._seq[:] = 0
+        self._table[:] = np.zeros(1, dtype=AGGREGATE)
+        self._table['timestamp'] = np.datetime64('NaT')
+
+        self._inputs, self._connections, self._processes, self._free = [], [], [], []
+        for _ in range(self.workers):
+            memory = shared_memory.SharedMemory(create=True, size=SLOTS * slot_capacity * INPUT.itemsize)
+            parent, child = mp.Pipe()
+            process = mp.Process(target=_worker, daemon=True, name="weather-shard",
+                                 args=(memory.name, slot_capacity, self._table_memory.name, n,
+                                       forecast_hours, child))
+            process.start()
+            child.close()
+            self._inputs.append((memory, np.ndarray((SLOTS, slot_capacity), dtype=INPUT, buffer=memory.buf)))
+            self._connections.append(parent)
+            self._processes.append(process)
+            self._free.append(deque(range(SLOTS)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Writing
+    def submit(self, station_id, readings):
+        batch = as_reading_batch(readings)
+        self.submit_block(np.full(len(batch), self.index[station_id]), batch)
+
+    def submit_block(self, stations: np.ndarray, batch: ReadingBatch):
+        """Readings for many stations at once; `stations` holds station indexes.
+
+        The block is grouped by (shard, station) with one stable sort, so each
+        worker receives contiguous per-station runs in arrival order.
+        """
+        n = len(batch)
+        if not n:
+            return
+        stations = np.asarray(stations, dtype=np.int64)
+        timestamps = batch.timestamp
+        if timestamps is None:
+            # Local time, like WeatherData; np.datetime64('now') would be UTC
+            timestamps = np.full(n, np.datetime64(datetime.now(), 'ms'))
+        shards = self.shard_of[stations]
+        order = np.argsort(shards * len(self.stations) + stations, kind='stable')
+        bounds = np.searchsorted(shards[order], np.arange(self.workers + 1))
+        for worker in range(self.workers):
+            rows = order[bounds[worker]:bounds[worker + 1]]
+            for start in range(0, len(rows), self.slot_capacity):
+                # Chunks go out in order, so a station split across two still arrives in order
+                chunk = rows[start:start + self.slot_capacity]
+                slot = self._acquire(worker)
+                target = self._inputs[worker][1][slot, :len(chunk)]
+                target['station'] = stations[chunk]
+                target['timestamp'] = timestamps[chunk]
+                target['temperature'] = batch.temperature[chunk]
+                target['humidity'] = batch.humidity[chunk]
+                target['pressure'] = batch.pressure[chunk]
+                self._connections[worker].send((slot, len(chunk)))
+
+    def _acquire(self, worker: int) -> int:
+        free = self._free[worker]
+        if not free:
+            free.append(self._connections[worker].recv())
+        return free.popleft()
+
+    def flush(self):
+        """Blocks until every worker has applied all submitted readings."""
+        for worker, free in enumerate(self._free):
+            while len(free) < SLOTS:
+                free.append(self._connections[worker].recv())
+
+    # Reading
+    def aggregates(self) -> np.ndarray:
+        """Consistent copy of the per-station aggregate table (AGGREGATE records)."""
+        while True:
+            before = self._seq.copy()
+            rows = self._table.copy()
+            if not np.any(before & 1) and np.array_equal(before, self._seq):
+                return rows
+
+    def station(self, station_id) -> dict:
+        row = self.aggregates()[self.index[station_id]]
+        return {name: row[name].item() for name in AGGREGATE.names}
+
+    def totals(self) -> dict:
+        """All stations merged: count/mean/stdev/min/max per metric (Chan et al. merge)."""
+        rows = self.aggregates()
+        counts = rows['version'].astype(np.float64)
+        total = float(counts.sum())
+        merged = {'count': int(total)}
+        for metric in METRICS:
+            if not total:
+                merged[metric] = {'mean': 0.0, 'stdev': 0.0, 'min': np.inf, 'max': -np.inf}
+                continue
+            means = rows[f"{metric}_mean"]
+            mean = float((counts * means).sum() / total)
+            m2 = float(rows[f"{metric}_m2"].sum() + (counts * (means - mean) ** 2).sum())
+            seen = counts > 0
+            merged[metric] = {
+                'mean': mean,
+                'stdev': (m2 / (total - 1)) ** 0.5 if total > 1 else 0.0,
+                'min': float(rows[f"{metric}_min"][seen].min()),
+                'max': float(rows[f"{metric}_max"][seen].max()),
+            }
+        return merged
+
+    def close(self):
+        if not self._processes:
+            return
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join()
+        for connection in self._connections:
+            connection.close()
+        # Drop our views before closing the mappings they point into
+        self._seq = self._table = None
+        memories = [memory for memory, _ in self._inputs]
+        self._inputs.clear()
+        for memory in memories:
+            memory.close()
+            memory.unlink()
+        self._table_memory.close()
+        self._table_memory.unlink()
+        self._processes.clear()
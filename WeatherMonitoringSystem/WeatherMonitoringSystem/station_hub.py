@@ -0,0 +1,102 @@
+import time
+from collections import defaultdict
+from datetime import datetime
+
+METRICS = ('temperature', 'humidity', 'pressure')
+
+
+# --- Per-Station Subject State ---
+class StationData:
+    """Latest reading of one station; passed to observers like `WeatherData`."""
+    __slots__ = ('station_id', 'region', 'temperature', 'humidity', 'pressure', 'timestamp')
+
+    def __init__(self, station_id, region=None):
+        self.station_id = station_id
+        self.region = region
+        self.temperature = 0.0
+        self.humidity = 0.0
+        self.pressure = 0.0
+        self.timestamp = None
+
+
+# --- Multi-Station Subject ---
+class StationHub:
+    """Station-keyed Subject with an indexed observer registry.
+
+    Observers subscribe to station IDs, regions or everything, optionally
+    narrowed to specific metrics. Subscriptions are stored in a dictionary
+    keyed by (scope, metric), so `notify()` only touches the observers that
+    asked for that station/metric instead of scanning the whole registry.
+    """
+    def __init__(self):
+        self.stations = {}
+        # (scope, metric) -> {observer: None}; dicts keep insertion order and
+        # give O(1) removal. scope is ('station', id), ('region', r) or ('all',);
+        # metric None means "any metric".
+        self._index = defaultdict(dict)
+        self._subscriptions = defaultdict(list)
+        # Optional Instrumentation: times updates and counts readings per station
+        self.instruments = None
+
+    def add_station(self, station_id, region=None) -> StationData:
+        station = self.stations.get(station_id)
+        if station is None:
+            station = self.stations[station_id] = StationData(station_id, region)
+        elif region is not None:
+            station.region = region
+        return station
+
+    def register(self, observer: 'Observer', stations=None, regions=None, metrics=None):
+        """Subscribes `observer`; with no stations/regions it receives every station."""
+        scopes = [('station', s) for s in stations or ()] + [('region', r) for r in regions or ()]
+        for scope in scopes or [('all',)]:
+            for metric in metrics or (None,):
+                key = (scope, metric)
+                if observer not in self._index[key]:
+                    self._index[key][observer] = None
+                    self._subscriptions[observer].append(key)
+
+    def remove(self, observer: 'Observer'):
+        for key in self._subscriptions.pop(observer, ()):
+            bucket = self._index[key]
+            bucket.pop(observer, None)
+            if not bucket:
+                del self._index[key]
+
+    def interested(self, station: StationData, metrics=METRICS) -> list:
+        """Observers subscribed to `station` for any of `metrics`, without duplicates."""
+        scopes = [('station', station.station_id), ('all',)]
+        if station.region is not None:
+            scopes.append(('region', station.region))
+        found = {}
+        for scope in scopes:
+            for metric in (None, *metrics):
+                bucket = self._index.get((scope, metric))
+                if bucket:
+                    found.update(bucket)
+        return list(found)
+
+    def notify(self, station: StationData, metrics=METRICS):
+        instruments = self.instruments
+        if instruments is None:
+            for observer in self.interested(station, metrics):
+                observer.update(station)
+            return
+        started = time.perf_counter_ns()
+        for observer in self.interested(station, metrics):
+            instruments.call(observer, 'update', station)
+        instruments.time_notify('station_notify', started)
+
+    def set_measurements(self, station_id, temperature: float = None, humidity: float = None,
+                         pressure: float = None, timestamp: datetime = None):
+        """Updates the given metrics of one station and notifies its subscribers."""
+        station = self.add_station(station_id)
+        station.timestamp = timestamp or datetime.now()
+        changed = []
+        for metric, value in zip(METRICS, (temperature, humidity, pressure)):
+            if value is not None:
+                setattr(station, metric, value)
+                changed.append(metric)
+        if self.instruments is not None:
+            self.instruments.count_ingest(station_id)
+        self.notify(station, changed)
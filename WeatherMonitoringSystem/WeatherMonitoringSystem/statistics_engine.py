@@ -0,0 +1,341 @@
+import math
+import random
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+# --- Streaming Statistics ---
+class RunningStats:
+    """Constant-memory count/mean/variance (Welford) with running min/max."""
+    __slots__ = ('count', 'mean', '_m2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        """Folds a single reading into the accumulator in O(1)."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add_many(self, values: np.ndarray):
+        """Folds a whole array in one NumPy pass (Chan et al. parallel merge)."""
+        values = np.asarray(values, dtype=np.float64)
+        n = len(values)
+        if not n:
+            return
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = self.count + n
+        delta = mean - self.mean
+        self._m2 += m2 + delta * delta * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of all readings seen so far."""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class SlidingWindowExtrema:
+    """Min/max over the last `window` readings using monotonic deques."""
+    __slots__ = ('window', '_seen', '_mins', '_maxs')
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = window
+        self._seen = 0
+        # Each deque holds (index, value) pairs; values are kept monotonic so
+        # the current extreme is always at the left end.
+        self._mins = deque()
+        self._maxs = deque()
+
+    def add(self, value: float):
+        """Pushes a reading and evicts the ones that fell out of the window."""
+        index = self._seen
+        self._seen += 1
+        while self._mins and self._mins[-1][1] >= value:
+            self._mins.pop()
+        self._mins.append((index, value))
+        while self._maxs and self._maxs[-1][1] <= value:
+            self._maxs.pop()
+        self._maxs.append((index, value))
+
+        oldest = index - self.window
+        if self._mins[0][0] <= oldest:
+            self._mins.popleft()
+        if self._maxs[0][0] <= oldest:
+            self._maxs.popleft()
+
+    def add_many(self, values: np.ndarray):
+        # Only the last `window` values can survive, so skip straight past the rest
+        tail = np.asarray(values)[-self.window:]
+        self._seen += len(values) - len(tail)
+        for value in tail.tolist():
+            self.add(value)
+
+    @property
+    def min(self) -> float:
+        return self._mins[0][1] if self._mins else math.nan
+
+    @property
+    def max(self) -> float:
+        return self._maxs[0][1] if self._maxs else math.nan
+
+
+# --- Quantile Sketches ---
+_SHARED_RNG = random.Random()
+
+
+class KLLSketch:
+    """Mergeable streaming quantiles (Karnin-Lang-Liberty) in O(k) memory.
+
+    Level h holds items of weight 2**h. When a level overflows it is sorted
+    and every other item (random offset) moves up a level. Rank error is
+    about 1.7% at k=200 and shrinks roughly as 1/k.
+    """
+    __slots__ = ('k', 'levels', 'count', 'min', 'max', '_rng', '_capacities')
+
+    def __init__(self, k: int = 200, seed: int = None):
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.levels = [[]]
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        # Seeding a Random from the OS costs ~20 µs; unseeded sketches share one
+        self._rng = _SHARED_RNG if seed is None else random.Random(seed)
+        self._capacities = [k]
+
+    def _grow(self):
+        self.levels.append([])
+        # Lower levels get geometrically smaller buffers (factor 2/3, at least 8)
+        depth = len(self.levels)
+        self._capacities = [max(8, int(self.k * (2 / 3) ** (depth - level - 1))) for level in range(depth)]
+
+    def add(self, value: float):
+        level = self.levels[0]
+        level.append(value)
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(level) >= self._capacities[0]:
+            self._compress()
+
+    def add_many(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        self.levels[0].extend(values.tolist())
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self._capacities[level]:
+                if level + 1 == len(self.levels):
+                    self._grow()
+                items = np.sort(np.asarray(items))
+                # An odd item out stays behind so the total weight is preserved
+                keep = items[-1:].tolist() if len(items) % 2 else []
+                pairs = items[:len(items) - len(keep)]
+                self.levels[level + 1].extend(pairs[self._rng.randrange(2)::2].tolist())
+                self.levels[level] = keep
+            level += 1
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Folds `other` into this sketch (in place) and returns self."""
+        while len(self.levels) < len(other.levels):
+            self._grow()
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def copy(self) -> 'KLLSketch':
+        clone = KLLSketch(self.k)
+        clone.levels = [list(items) for items in self.levels]
+        clone._capacities = list(self._capacities)
+        clone.count, clone.min, clone.max = self.count, self.min, self.max
+        return clone
+
+    @property
+    def size(self) -> int:
+        """Items retained (the memory footprint, independent of count)."""
+        return sum(len(items) for items in self.levels)
+
+    def _weighted(self) -> tuple:
+        values = np.concatenate([np.asarray(items, dtype=np.float64) for items in self.levels])
+        weights = np.concatenate([np.full(len(items), 1 << level, dtype=np.int64)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs) -> np.ndarray:
+        """Values at the fractions `qs` (0..1); NaN while empty."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if not self.count:
+            return np.full(qs.shape, np.nan)
+        values, cumulative = self._weighted()
+        index = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        result = values[np.minimum(index, len(values) - 1)]
+        # The exact extremes are tracked separately
+        return np.where(qs <= 0, self.min, np.where(qs >= 1, self.max, result))
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def rank(self, value: float) -> float:
+        """Estimated fraction of readings <= value."""
+        if not self.count:
+            return math.nan
+        values, cumulative = self._weighted()
+        i = int(np.searchsorted(values, value, side='right'))
+        return float(cumulative[i - 1] / cumulative[-1]) if i else 0.0
+
+
+class RollingQuantiles:
+    """KLL sketches per time bucket; quantiles over the last `span_seconds`.
+
+    Buckets roll with the reading timestamps. A query merges the buckets in
+    the window, so memory is O(buckets * k) however many readings arrive.
+    """
+    def __init__(self, span_seconds: float = 3600, buckets: int = 60, k: int = 200):
+        self.bucket_ms = max(1, int(span_seconds * 1000 / buckets))
+        self.buckets = buckets
+        self.k = k
+        self._sketches = deque()  # (bucket number, KLLSketch), oldest first
+
+    def _sketch(self, bucket: int) -> KLLSketch:
+        if not self._sketches or bucket > self._sketches[-1][0]:
+            self._sketches.append((bucket, KLLSketch(self.k)))
+            while self._sketches[0][0] <= bucket - self.buckets:
+                self._sketches.popleft()
+            return self._sketches[-1][1]
+        for number, sketch in reversed(self._sketches):
+            if number == bucket:
+                return sketch
+            if number < bucket:
+                break
+        return None  # late reading for a bucket that has rolled out (or never existed)
+
+    def add(self, value: float, timestamp=None):
+        self._add_ms(value, _epoch_ms(timestamp))
+
+    def _add_ms(self, value: float, ms: int):
+        bucket = ms // self.bucket_ms
+        newest = self._sketches[-1] if self._sketches else None
+        # Readings almost always land in the newest bucket
+        sketch = newest[1] if newest is not None and newest[0] == bucket else self._sketch(bucket)
+        if sketch is not None:
+            sketch.add(value)
+
+    def add_many(self, values: np.ndarray, timestamps: np.ndarray = None):
+        if timestamps is None:
+            timestamps = np.full(len(values), _epoch_ms(None))
+        else:
+            timestamps = timestamps.astype('datetime64[ms]').astype(np.int64)
+        buckets = timestamps // self.bucket_ms
+        # Readings that the rest of the batch would push out of the window right away
+        newest = int(buckets.max()) if len(buckets) else 0
+        if self._sketches:
+            newest = max(newest, self._sketches[-1][0])
+        recent = buckets > newest - self.buckets
+        if not recent.all():
+            values, buckets = values[recent], buckets[recent]
+        cuts = np.flatnonzero(buckets[1:] != buckets[:-1]) + 1
+        for start, part in zip(np.concatenate(([0], cuts)), np.split(values, cuts)):
+            sketch = self._sketch(int(buckets[start]))
+            if sketch is not None:
+                sketch.add_many(part)
+
+    def sketch(self) -> KLLSketch:
+        """All buckets still in the window, merged into a fresh sketch."""
+        merged = KLLSketch(self.k)
+        if self._sketches:
+            newest = self._sketches[-1][0]
+            for number, sketch in self._sketches:
+                if number > newest - self.buckets:
+                    merged.merge(sketch)
+        return merged
+
+    def quantiles(self, qs) -> np.ndarray:
+        return self.sketch().quantiles(qs)
+
+
+def _epoch_ms(timestamp) -> int:
+    return int(np.datetime64(timestamp or datetime.now(), 'ms').astype(np.int64))
+
+
+class MetricStatistics:
+    """Streaming statistics for temperature, humidity and pressure."""
+    METRICS = ('temperature', 'humidity', 'pressure')
+
+    def __init__(self, window: int = None, quantile_span: float = None):
+        self.running = {metric: RunningStats() for metric in self.METRICS}
+        # Sliding-window extrema are optional; they cost O(window) memory.
+        self.windowed = (
+            {metric: SlidingWindowExtrema(window) for metric in self.METRICS}
+            if window else None
+        )
+        # Rolling percentiles over `quantile_span` seconds of reading time
+        self.quantiles = (
+            {metric: RollingQuantiles(quantile_span) for metric in self.METRICS}
+            if quantile_span else None
+        )
+
+    @property
+    def count(self) -> int:
+        return self.running['temperature'].count
+
+    def add(self, temperature: float, humidity: float, pressure: float, timestamp=None):
+        """Folds one reading of all three metrics into the statistics."""
+        for metric, value in zip(self.METRICS, (temperature, humidity, pressure)):
+            self.running[metric].add(value)
+            if self.windowed is not None:
+                self.windowed[metric].add(value)
+        if self.quantiles is not None:
+            ms = _epoch_ms(timestamp)
+            for metric, value in zip(self.METRICS, (temperature, humidity, pressure)):
+                self.quantiles[metric]._add_ms(value, ms)
+
+    def add_many(self, temperature: np.ndarray, humidity: np.ndarray, pressure: np.ndarray,
+                 timestamp: np.ndarray = None):
+        """Folds arrays of readings (e.g. a ReadingBatch) into the statistics."""
+        for metric, values in zip(self.METRICS, (temperature, humidity, pressure)):
+            self.running[metric].add_many(values)
+            if self.windowed is not None:
+                self.windowed[metric].add_many(values)
+            if self.quantiles is not None:
+                self.quantiles[metric].add_many(values, timestamp)
+
+    def __getitem__(self, metric: str) -> RunningStats:
+        return self.running[metric]
@@ -0,0 +1,586 @@
+"""Streamlit-free core of the weather monitor.
+
+Holds the Subject/Observer/WeatherData classes, the display models and a
+`WeatherEngine` that ingests readings. Headless workers import this module
+directly; the dashboard only reads the state it produces.
+
+Importing it loads nothing beyond the standard library: numpy and the
+modules built on it are imported where a display, a batch, a derived
+metric or the engine's history first needs them.
+"""
+import importlib
+import math
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple
+
+
+def _module(name: str):
+    """`name`, imported on first use. For per-reading paths, where an import
+    statement would cost microseconds even once the module is loaded."""
+    return sys.modules.get(name) or importlib.import_module(name)
+
+
+# --- Observer Pattern Base Classes ---
+class Subject:
+    """The Subject interface (Publisher)."""
+    def __init__(self):
+        self._observers = []
+        # Optional ThreadedDispatcher/AsyncioDispatcher; observers attached to it
+        # are updated off the caller's thread, everyone else stays synchronous.
+        self.dispatcher = None
+        # Optional Instrumentation; None keeps notify() on its untimed path
+        self.instruments = None
+        # Optional NotifyGate (deadband/coalescing); None updates every observer every time
+        self.gate = None
+
+    def register(self, observer: 'Observer'):
+        if observer not in self._observers:
+            self._observers.append(observer)
+
+    def remove(self, observer: 'Observer'):
+        if observer in self._observers:
+            self._observers.remove(observer)
+
+    def notify(self):
+        instruments, gate = self.instruments, self.gate
+        started = time.perf_counter_ns() if instruments is not None else 0
+        # Iterate over a copy to prevent modification issues during iteration
+        self._update(list(self._observers) if gate is None else gate.admit(self, self._observers))
+        if instruments is not None:
+            instruments.time_notify('notify', started)
+
+    def _update(self, observers: list):
+        dispatcher, snapshot, instruments = self.dispatcher, None, self.instruments
+        for observer in observers:
+            if dispatcher is not None and dispatcher.handles(observer):
+                snapshot = snapshot or _module('dispatch').Snapshot(self)
+                dispatcher.submit(observer, snapshot)
+            elif instruments is None:
+                observer.update(self)
+            else:
+                instruments.call(observer, 'update', self)
+
+    def notify_batch(self, batch: 'ReadingBatch'):
+        """Delivers a whole block of readings with one call per observer.
+
+        Observers coalesced by the gate get at most an `update` with the last
+        reading; observers attached to the dispatcher get a Snapshot of the
+        last reading on their own thread, never a call on the caller's.
+        """
+        if not len(batch):
+            return
+        instruments, gate, dispatcher = self.instruments, self.gate, self.dispatcher
+        observers, latest = list(self._observers), []
+        if gate is not None:
+            admitted = gate.admit(self, observers, len(batch))
+            observers = [observer for observer in observers if not gate.handles(observer)]
+            latest = [observer for observer in admitted if gate.handles(observer)]
+        if dispatcher is not None:
+            latest += [observer for observer in observers if dispatcher.handles(observer)]
+            observers = [observer for observer in observers if not dispatcher.handles(observer)]
+        if instruments is None:
+            for observer in observers:
+                observer.update_batch(self, batch)
+            self._update(latest)
+            return
+        started = time.perf_counter_ns()
+        for observer in observers:
+            instruments.call(observer, 'update_batch', self, batch)
+        self._update(latest)
+        instruments.time_notify('notify_batch', started)
+
+    def flush(self):
+        """Updates the observers the gate is still holding a reading back from."""
+        if self.gate is not None:
+            self._update(self.gate.flush(self, force=True))
+
+
+class Observer:
+    """The Observer interface (Subscriber)."""
+    def update(self, subject: Subject):
+        """Called by the Subject when its state changes."""
+        pass
+
+    def update_batch(self, subject: Subject, batch: 'ReadingBatch'):
+        """Called with a block of readings; the subject already holds the latest one.
+
+        Observers that only care about the current state can rely on this default.
+        """
+        self.update(subject)
+
+
+# --- Concrete Subject ---
+class WeatherData(Subject):
+    """The Concrete Subject that holds the weather state."""
+    def __init__(self):
+        super().__init__()
+        self.temperature = 0.0
+        self.humidity = 0.0
+        self.pressure = 0.0
+        self.timestamp = None
+        # Number of readings applied so far. Bumped only after observers have
+        # been notified, so state read for version N is at least that fresh.
+        self.version = 0
+        # Station parameters for derived metrics, e.g. {'elevation': 350.0} (metres)
+        self.derived_options = {}
+        self._derived = None        # view of the current reading, built on first use
+        self._batch_derived = None  # (batch, view) while a batch is being notified
+
+    def set_measurements(self, temperature: float, humidity: float, pressure: float,
+                         timestamp: datetime = None):
+        """Updates measurements and notifies observers."""
+        self.temperature = temperature
+        self.humidity = humidity
+        self.pressure = pressure
+        self.timestamp = timestamp or datetime.now()
+        self._derived = None
+        try:
+            self.notify()
+        finally:
+            self.version += 1  # the subject holds the new reading even if an observer failed
+
+    def set_measurements_batch(self, readings):
+        """Applies many readings at once (DataFrame, (n, 3) array or three arrays).
+
+        The subject ends up holding the last reading and observers get a single
+        `update_batch` call instead of one `notify()` round-trip per reading.
+        """
+        from readings import as_reading_batch
+
+        batch = as_reading_batch(readings)
+        if not len(batch):
+            return
+        self.temperature, self.humidity, self.pressure = batch.last()
+        self.timestamp = batch.timestamp[-1] if batch.timestamp is not None else datetime.now()
+        self._derived = None
+        try:
+            self.notify_batch(batch)
+        finally:
+            self._batch_derived = None  # do not keep the batch's arrays alive
+            self.version += len(batch)
+
+    @property
+    def derived(self) -> 'DerivedMetrics':
+        """Derived metrics of the current reading, computed once for all observers."""
+        if self._derived is None:
+            self._derived = _module('derived').DerivedMetrics.of_reading(self, **self.derived_options)
+        return self._derived
+
+    def derived_for(self, batch: 'ReadingBatch') -> 'DerivedMetrics':
+        """Derived metrics over `batch`, shared by every observer of that batch."""
+        cached = self._batch_derived
+        if cached is None or cached[0] is not batch:
+            view = _module('derived').DerivedMetrics.of_batch(batch, **self.derived_options)
+            cached = self._batch_derived = (batch, view)
+        return cached[1]
+
+    @property
+    def reading(self) -> 'Reading':
+        """The current measurements as one Reading."""
+        from readings import Reading
+
+        return Reading(self.temperature, self.humidity, self.pressure, self.timestamp)
+
+    def set_reading(self, reading: 'Reading'):
+        self.set_measurements(reading.temperature, reading.humidity, reading.pressure, reading.timestamp)
+
+
+# --- Display Models ---
+class Panel(NamedTuple):
+    """What a display shows, independent of how it is drawn.
+
+    `kind` names the Streamlit callout (info/success/warning/error).
+    """
+    kind: str
+    title: str
+    lines: tuple = ()
+    captions: tuple = ()
+
+
+class DisplayElement:
+    """Python counterpart of DisplayElement.java, with a memoized render path.
+
+    `display()` builds a Panel from the display's state and must not change
+    it. `render(version)` caches that Panel per WeatherData version, so
+    page reruns without new readings cost a single comparison.
+    """
+    _rendered_version = None
+    _rendered = None
+
+    def display(self) -> Panel:
+        raise NotImplementedError
+
+    def render(self, version: int) -> Panel:
+        if version != self._rendered_version:
+            self._rendered = self.display()
+            self._rendered_version = version
+        return self._rendered
+
+
+def _derived(subject, batch: 'ReadingBatch' = None) -> 'DerivedMetrics':
+    return _module('derived').derived_view(subject, batch)
+
+
+class CurrentConditionsDisplay(Observer, DisplayElement):
+    """Keeps the current temperature, humidity and dew point."""
+    def __init__(self):
+        self.temperature = None
+        self.humidity = None
+        self.dew_point = None
+
+    def update(self, subject: WeatherData):
+        self.temperature = subject.temperature
+        self.humidity = subject.humidity
+        self.dew_point = _derived(subject)['dew_point']
+
+    def display(self) -> Panel:
+        if self.temperature is None:
+            return Panel('info', "🌡️ **Current Conditions**", ("*No data yet*",))
+        return Panel('info', "🌡️ **Current Conditions**", (
+            f"**Temperature:** {self.temperature:.1f}°C",
+            f"**Humidity:** {self.humidity:.1f}%",
+            f"**Dew Point:** {self.dew_point:.1f}°C",
+        ))
+
+
+class StatisticsDisplay(Observer, DisplayElement):
+    """Keeps the average, maximum, and minimum temperatures over time,
+    plus rolling percentiles over the last `quantile_span` seconds."""
+    def __init__(self, quantile_span: float = 3600):
+        from statistics_engine import MetricStatistics
+
+        # Streaming accumulator: O(1) time and memory per reading, no history list
+        self.stats = MetricStatistics(quantile_span=quantile_span)
+
+    def update(self, subject: WeatherData):
+        # Not every subject carries a reading time; those without one count as now
+        self.stats.add(subject.temperature, subject.humidity, subject.pressure,
+                       getattr(subject, 'timestamp', None))
+
+    def update_batch(self, subject: WeatherData, batch: 'ReadingBatch'):
+        self.stats.add_many(batch.temperature, batch.humidity, batch.pressure, batch.timestamp)
+
+    def percentiles(self, metric: str = 'temperature') -> tuple:
+        """(p50, p95, p99) of `metric` over the rolling window; NaN while empty."""
+        if self.stats.quantiles is None:
+            return (math.nan,) * 3
+        return tuple(self.stats.quantiles[metric].quantiles((0.5, 0.95, 0.99)).tolist())
+
+    def display(self) -> Panel:
+        temps = self.stats['temperature']
+        if not temps.count:
+            return Panel('success', "📊 **Statistics**", ("*No data yet*",))
+        lines = (
+            f"**Avg Temp:** {temps.mean:.1f}°C",
+            f"**Max Temp:** {temps.max:.1f}°C",
+            f"**Min Temp:** {temps.min:.1f}°C",
+        )
+        if self.stats.quantiles is not None:
+            p50, p95, p99 = self.percentiles()
+            lines += (f"**p50/p95/p99 Temp:** {p50:.1f} / {p95:.1f} / {p99:.1f}°C",)
+        return Panel('success', "📊 **Statistics**", lines)
+
+
+class ForecastDisplay(Observer, DisplayElement):
+    """Keeps a weather forecast based on the pressure tendency.
+
+    The tendency is a least-squares slope (hPa/h) over the last `span_hours`
+    classified with hysteresis, so sensor noise around a threshold does not
+    flip it; it reads "n/a" until a sixth of the span is covered.
+    """
+    def __init__(self, span_hours: float = 3.0):
+        from forecast import TrendForecaster
+
+        self.forecaster = TrendForecaster(metrics=('pressure',), span_hours=span_hours)
+        self.current_pressure = None
+
+    def update(self, subject: WeatherData):
+        self.forecaster.update(subject)
+        self.current_pressure = subject.pressure
+
+    def update_batch(self, subject: WeatherData, batch: 'ReadingBatch'):
+        self.forecaster.update_batch(subject, batch)
+        self.current_pressure = subject.pressure
+
+    def display(self) -> Panel:
+        from forecast import FALLING, RISING
+
+        if self.current_pressure is None:
+            return Panel('warning', "🔮 **Forecast**", ("*No data yet*",))
+        trend = self.forecaster.trend('pressure')
+        if trend == RISING:
+            forecast = "☀️ Improving weather (Rising Pressure)"
+        elif trend == FALLING:
+            forecast = "🌧️ Cooler, rainy weather coming (Falling Pressure)"
+        else:
+            forecast = "🌤️ No significant change"
+        slope = self.forecaster.slope('pressure')
+        tendency = "n/a" if slope != slope else f"{slope:+.2f} hPa/h"
+        return Panel('warning', "🔮 **Forecast**", (
+            f"**Trend:** {forecast}",
+            f"**Pressure:** {self.current_pressure:.1f} hPa ({tendency})",
+        ))
+
+
+class HeatIndexDisplay(Observer, DisplayElement):
+    """Keeps the calculated Heat Index.
+
+    Warnings come from the heat-index rules of an AlertEngine, if one is given.
+    """
+    def __init__(self, alerts: 'AlertEngine' = None, station_id='default'):
+        self.heat_index = None
+        self.peak = None
+        self.alerts = alerts
+        self.station_id = station_id
+
+    def compute_heat_index(self, t: float, rh: float) -> float:
+        """Approximation of 'Feels Like' temperature (Simplified for Celsius)."""
+        from heat_index import simplified_scalar
+
+        return simplified_scalar(t, rh)
+
+    def update(self, subject: WeatherData):
+        self.heat_index = _derived(subject)['heat_index']
+        self.peak = None
+
+    def update_batch(self, subject: WeatherData, batch: 'ReadingBatch'):
+        heat_index = _derived(subject, batch)['heat_index']
+        self.heat_index = float(heat_index[-1])
+        self.peak = float(heat_index.max())
+
+    def display(self) -> Panel:
+        if self.heat_index is None:
+            return Panel('error', "🔥 **Heat Index**", ("*No data yet*",))
+        captions = []
+        if self.alerts is not None:
+            captions += [rule.message for rule in self.alerts.active(self.station_id, 'heat_index')]
+        if self.peak is not None and self.peak > self.heat_index:
+            captions.append(f"Peak in batch: {self.peak:.1f}°C")
+        return Panel('error', "🔥 **Heat Index**",
+                     (f"**Feels Like:** {self.heat_index:.1f}°C",), tuple(captions))
+
+
+# --- Engine ---
+class EngineSnapshot(NamedTuple):
+    """Immutable view of the engine at one WeatherData version.
+
+    Shared by every reader of that version; nothing in it changes afterwards.
+    """
+    version: int
+    reading: 'Reading'    # latest measurements
+    panels: dict          # display name -> Panel
+    history: dict         # column name -> read-only array, oldest first
+    rollups: dict         # level name -> (unit, bucket records)
+    alerts: tuple = ()    # messages of the rules firing at this version
+    derived: 'DerivedMetrics' = None  # derived metrics over `history`, computed on first use
+
+
+# Displays that only show the latest value; the others aggregate every reading
+LATEST_VALUE_DISPLAYS = ('current', 'heat')
+
+
+class WeatherEngine:
+    """One WeatherData pipeline plus its displays and history.
+
+    All writes go through `ingest`/`ingest_batch` under a lock (single writer).
+    Readers never touch the live objects: `snapshot()` hands out an immutable
+    EngineSnapshot, built at most once per version and published by swapping
+    one reference (read-copy-update), so any number of dashboards share it.
+
+    The observers, history and archive are built on first use (the first
+    reading or snapshot), so creating an engine is cheap and imports nothing.
+    """
+    def __init__(self, history_capacity: int = 10_000, archive_dir: str = None, rules=None):
+        self.weather_data = WeatherData()
+        self.history_capacity = history_capacity
+        self.archive_dir = archive_dir
+        self.rules = rules  # None: alerts.DEFAULT_RULES
+        self.alerts = self.displays = self.history = self.rollups = self.archive = None
+        self.station_id = 'default'
+        self.instruments = None
+        self.errors = 0  # readings `run()` skipped because ingesting them raised
+        self._lock = threading.Lock()
+        self._published = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _build(self):
+        """Creates the observers, history and archive; called once, under the lock."""
+        from alerts import DEFAULT_RULES, AlertEngine
+        from measurement_store import MeasurementStore
+        from rollup import Rollups
+
+        # Evaluated before the displays so they render this reading's alerts
+        self.alerts = AlertEngine(DEFAULT_RULES if self.rules is None else self.rules)
+        self.weather_data.register(self.alerts)
+        displays = {
+            'current': CurrentConditionsDisplay(),
+            'stats': StatisticsDisplay(),
+            'forecast': ForecastDisplay(),
+            'heat': HeatIndexDisplay(self.alerts),
+        }
+        for display in displays.values():
+            self.weather_data.register(display)
+        self.history = MeasurementStore(capacity=self.history_capacity)
+        self.rollups = Rollups()
+        self.weather_data.register(self.rollups)
+        if self.archive_dir:
+            from archive import MeasurementArchive
+            from readings import ReadingBatch
+
+            # After a restart, replay the newest archived readings through every
+            # observer (not yet the archive itself), so the reading, version,
+            # displays, alerts, history and rollups all agree
+            self.archive = MeasurementArchive(self.archive_dir)
+            recent = self.archive.tail(self.history_capacity)
+            if len(recent):
+                recent = ReadingBatch.from_records(recent)
+                self.weather_data.set_measurements_batch(recent)
+                self.history.extend(recent)
+            self.weather_data.register(self.archive)
+            self.station_id = self.archive.station_id
+        self.displays = displays  # last: marks the engine as built
+
+    def instrument(self, enabled: bool = True, track_allocations: bool = False) -> 'Instrumentation':
+        """Turns hot-path instrumentation on or off; returns the active Instrumentation or None.
+
+        Turning it off and on again starts from empty histograms.
+        """
+        with self._lock:
+            if not enabled:
+                self.instruments = None
+            elif self.instruments is None:
+                from instrumentation import Instrumentation
+
+                self.instruments = Instrumentation(track_allocations)
+                if self.weather_data.dispatcher is not None:
+                    self.instruments.watch(self.weather_data.dispatcher)
+                if self.weather_data.gate is not None:
+                    self.instruments.watch_gate(self.weather_data.gate)
+            self.weather_data.instruments = self.instruments
+        return self.instruments
+
+    def throttle(self, interval: float = 0.5, deadband: dict = None, enabled: bool = True) -> 'NotifyGate':
+        """Coalesces the latest-value displays to one update per `interval` seconds,
+        skipping readings within `deadband` (per metric) of what they show.
+
+        Alerts, statistics, forecast, history and archive still get every
+        reading, and `snapshot()` flushes held readings, so readers never see
+        stale panels. Returns the active NotifyGate, or None when disabled.
+        """
+        with self._lock:
+            if self.displays is None:
+                self._build()
+            wd = self.weather_data
+            wd.flush()  # deliver what the previous gate was holding back
+            if wd.gate is not None and self.instruments is not None:
+                self.instruments.unwatch_gate(wd.gate)  # one set of gate series at a time
+            wd.gate = None
+            if enabled:
+                from notify_gate import NotifyGate
+
+                wd.gate = NotifyGate(deadband)
+                for name in LATEST_VALUE_DISPLAYS:
+                    wd.gate.coalesce(self.displays[name], interval)
+                if self.instruments is not None:
+                    self.instruments.watch_gate(wd.gate)
+        return wd.gate
+
+    def snapshot(self) -> EngineSnapshot:
+        """The latest published snapshot; rebuilt only if a reading arrived since."""
+        published = self._published
+        if published is not None and published.version == self.weather_data.version:
+            return published  # fast path: no lock, no copy
+        with self._lock:
+            if self.displays is None:
+                self._build()
+            wd = self.weather_data
+            published = self._published
+            if published is None or published.version != wd.version:
+                from derived import DerivedMetrics
+
+                wd.flush()
+                history = self.history.snapshot()
+                published = EngineSnapshot(
+                    version=wd.version,
+                    reading=wd.reading,
+                    panels={name: display.render(wd.version) for name, display in self.displays.items()},
+                    history=history,
+                    rollups={name: (level.unit, level.buckets())
+                             for name, level in self.rollups.levels.items()},
+                    alerts=tuple(rule.message for rule in self.alerts.active()),
+                    derived=DerivedMetrics(history, **wd.derived_options),
+                )
+                self._published = published
+        return published
+
+    def ingest(self, temperature: float, humidity: float, pressure: float, timestamp=None):
+        with self._lock:
+            if self.displays is None:
+                self._build()
+            try:
+                self.weather_data.set_measurements(temperature, humidity, pressure, timestamp)
+            finally:
+                # Keep the history in step with the subject even if an observer raised
+                self.history.append(temperature, humidity, pressure, self.weather_data.timestamp)
+            if self.instruments is not None:
+                self.instruments.count_ingest(self.station_id)
+
+    def ingest_batch(self, readings):
+        import numpy as np
+        from readings import ReadingBatch, as_reading_batch
+
+        batch = as_reading_batch(readings)
+        if not len(batch):
+            return
+        if batch.timestamp is None:
+            # Stamp once so history and archive agree on the arrival time
+            batch = ReadingBatch(batch.temperature, batch.humidity, batch.pressure,
+                                 np.full(len(batch), np.datetime64(datetime.now(), 'ms')))
+        with self._lock:
+            if self.displays is None:
+                self._build()
+            try:
+                self.weather_data.set_measurements_batch(batch)
+            finally:
+                self.history.extend(batch)
+            if self.instruments is not None:
+                self.instruments.count_ingest(self.station_id, len(batch))
+
+    def run(self, source, stop: threading.Event = None):
+        """Ingest loop: pulls readings (3-tuples) or batches from `source` until it ends or `stop` is set.
+
+        A reading that fails to ingest is counted in `errors` and skipped; the loop keeps going.
+        """
+        stop = stop or self._stop
+        for item in source:
+            if stop.is_set():
+                break
+            try:
+                if isinstance(item, tuple) and len(item) == 3 and not hasattr(item[0], '__len__'):
+                    self.ingest(*item)
+                else:
+                    self.ingest_batch(item)
+            except Exception:
+                self.errors += 1
+
+    def start(self, source):
+        """Runs `run(source)` on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError("ingest loop is already running")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, args=(source,), daemon=True,
+                                        name="weather-ingest")
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
@@ -317,146 +317,31 @@ st.divider()
 # --- GUI: Data History Section ---
 st.header("3. Measurement History")
 st.dataframe(st.session_state['data_history'], use_container_width=True)'''
+import importlib.util
+import io
+import os
+import threading
+from datetime import datetime
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 
-# --- Observer Pattern Base Classes ---
-class Subject:
-    """The Subject interface (Publisher)."""
-    def __init__(self):
-        # Use session state to store observers persistently
-        if 'observers' not in st.session_state:
-            st.session_state['observers'] = []
-        
-    def register(self, observer: 'Observer'):
-        if observer not in st.session_state['observers']:
-            st.session_state['observers'].append(observer)
-
-    def remove(self, observer: 'Observer'):
-        if observer in st.session_state['observers']:
-            st.session_state['observers'].remove(observer)
-
-    def notify(self):
-        # Iterate over a copy to prevent modification issues during iteration
-        for observer in list(st.session_state['observers']):
-            observer.update(self)
-
-
-class Observer:
-    """The Observer interface (Subscriber)."""
-    def update(self, subject: Subject):
-        """Called by the Subject when its state changes."""
-        pass
-
-
-# --- Concrete Subject ---
-class WeatherData(Subject):
-    """The Concrete Subject that holds the weather state."""
-    def __init__(self):
-        super().__init__()
-        # Initialize weather data attributes in session state
-        if 'temperature' not in st.session_state:
-            st.session_state['temperature'] = 0.0
-            st.session_state['humidity'] = 0.0
-            st.session_state['pressure'] = 0.0
-        
-    @property
-    def temperature(self) -> float: return st.session_state['temperature']
-    @property
-    def humidity(self) -> float: return st.session_state['humidity']
-    @property
-    def pressure(self) -> float: return st.session_state['pressure'] # <-- Fixed Syntax Error
+from export import export_history
+from ingest_service import simulated_sensor
+from measurement_store import MeasurementStore, columns_to_frame, select_between
+from rollup import buckets_to_frame, downsample
+from weather_core import Panel, WeatherEngine
+
+# --- Rendering ---
+def show_panel(panel: Panel):
+    """Draws a display's Panel; the only place observers meet Streamlit."""
+    getattr(st, panel.kind)(panel.title)
+    for line in panel.lines:
+        st.write(line)
+    for caption in panel.captions:
+        st.caption(caption)
 
-    def set_measurements(self, temperature: float, humidity: float, pressure: float):
-        """Updates measurements and notifies observers."""
-        st.session_state['temperature'] = temperature
-        st.session_state['humidity'] = humidity
-        st.session_state['pressure'] = pressure
-        self.notify()
-
-
-# --- Concrete Observers ---
-
-class CurrentConditionsDisplay(Observer):
-    """Displays the current temperature and humidity."""
-    def update(self, subject: WeatherData):
-        st.info(f"🌡️ **Current Conditions**")
-        st.write(f"**Temperature:** {subject.temperature:.1f}°C")
-        st.write(f"**Humidity:** {subject.humidity:.1f}%")
-
-class StatisticsDisplay(Observer):
-    """Displays the average, maximum, and minimum temperatures over time."""
-    def update(self, subject: WeatherData):
-        if 'temps_history' not in st.session_state:
-            st.session_state['temps_history'] = []
-
-        # Update history with the new temperature
-        st.session_state['temps_history'].append(subject.temperature)
-        temps = st.session_state['temps_history']
-        
-        if not temps:
-            st.success("📊 **Statistics**\n*No data yet*")
-            return
-
-        avg = sum(temps) / len(temps)
-        st.success(f"📊 **Statistics**")
-        st.write(f"**Avg Temp:** {avg:.1f}°C")
-        st.write(f"**Max Temp:** {max(temps):.1f}°C")
-        st.write(f"**Min Temp:** {min(temps):.1f}°C")
-
-class ForecastDisplay(Observer):
-    """Displays a simple weather forecast based on pressure trend."""
-    def update(self, subject: WeatherData):
-        if 'last_pressure' not in st.session_state:
-            st.session_state['last_pressure'] = 1013.25 # Initial reference pressure
-
-        current_pressure = subject.pressure
-        last_pressure = st.session_state['last_pressure']
-
-        if current_pressure > last_pressure:
-            forecast = "☀️ Improving weather (Rising Pressure)"
-            emoji = "☀️"
-        elif current_pressure == last_pressure:
-            forecast = "🌤️ No significant change"
-            emoji = "🌤️"
-        else:
-            forecast = "🌧️ Cooler, rainy weather coming (Falling Pressure)"
-            emoji = "🌧️"
-
-        st.warning(f"🔮 **Forecast**")
-        st.write(f"**Trend:** {forecast}")
-        st.write(f"**Last Pressure:** {last_pressure:.1f} hPa")
-        
-        # Update last pressure for the next calculation
-        st.session_state['last_pressure'] = current_pressure
-
-
-class HeatIndexDisplay(Observer):
-    """Displays the calculated Heat Index."""
-    
-    # IMPROVEMENT: Simplified Heat Index Calculation for better clarity in a Celsius presentation
-    def compute_heat_index(self, t: float, rh: float) -> float:
-        """Approximation of 'Feels Like' temperature (Simplified for Celsius)."""
-        if t < 15:
-            return t # No significant heat index below 15C
-        else:
-            # Formula is T_actual + factor_humidity_effect
-            # A simple factor to show the effect of humidity on perceived temperature
-            humidity_effect_factor = (rh / 100.0) * (t - 15.0) * 0.4 
-            return t + humidity_effect_factor
-
-
-    def update(self, subject: WeatherData):
-        t = subject.temperature
-        rh = subject.humidity
-        heat_index = self.compute_heat_index(t, rh)
-        
-        st.error(f"🔥 **Heat Index**")
-        st.write(f"**Feels Like:** {heat_index:.1f}°C")
-        if heat_index > 30: # Lowered threshold for presentation
-            st.caption("⚠️ Caution: Heat Index is Elevated!")
-        
 # --- Streamlit App Initialization ---
 st.set_page_config(layout="wide", page_title="Weather Monitoring System")
 st.title("💡 Observer Design Pattern: Weather Monitoring System")
@@ -464,29 +349,43 @@ st.markdown("A demonstration of the **Observer Pattern** where **`WeatherData` (
 st.divider()
 
 # --- Initialize or Retrieve Data and Objects ---
-# Initialize session state for history if not present
-if 'data_history' not in st.session_state:
-    st.session_state['data_history'] = pd.DataFrame(columns=["Time", "Temp (°C)", "Humidity (%)", "Pressure (hPa)"])
-
-# Instantiate the Subject and Observers once
+# One engine per server process: the Subject, its Observers and the history
+# live here. Sessions only read immutable snapshots of it; the only
+# per-session state is view preferences such as the history time range.
 @st.cache_resource
-def get_weather_system():
-    # Only called on first run
-    wd = WeatherData()
-    displays = {
-        'current': CurrentConditionsDisplay(),
-        'stats': StatisticsDisplay(),
-        'forecast': ForecastDisplay(),
-        'heat': HeatIndexDisplay()
-    }
-    
-    # Register all observers with the Subject
-    for display in displays.values():
-        wd.register(display)
-        
-    return wd, displays
-
-weather_data, displays = get_weather_system()
+def get_engine() -> WeatherEngine:
+    # Set WEATHER_ARCHIVE_DIR to keep history on disk across restarts
+    return WeatherEngine(history_capacity=10_000, archive_dir=os.environ.get('WEATHER_ARCHIVE_DIR'))
+
+engine = get_engine()
+
+with st.sidebar:
+    st.subheader("Sensor Feed")
+    if engine.running:
+        if st.button("Stop simulated sensor"):
+            engine.stop()
+    elif st.button("Start simulated sensor (1 Hz)"):
+        engine.start(simulated_sensor(rate_hz=1.0))
+    st.caption("Readings are ingested in the background; turn on live updates to follow them.")
+
+    st.subheader("Live Updates")
+    live = st.toggle("Auto-refresh", value=False,
+                     help="Redraw the displays, history and diagnostics from the latest snapshot "
+                          "without rerunning the whole page.")
+    refresh_s = st.slider("Refresh every (s)", min_value=0.5, max_value=10.0, value=1.0, step=0.5,
+                          disabled=not live)
+    # Shared by every session; statistics, forecast, alerts and history stay lossless
+    coalesce = st.toggle("Coalesce display updates", value=engine.weather_data.gate is not None,
+                         help="Update Current Conditions and Heat Index at most twice a second, "
+                              "and skip repeated readings.")
+    if coalesce != (engine.weather_data.gate is not None):
+        engine.throttle(enabled=coalesce)
+
+    st.subheader("Diagnostics")
+    # Instrumentation is shared by every session, like the engine itself
+    diagnostics = st.toggle("Instrument notify/update", value=engine.instruments is not None)
+    if diagnostics != (engine.instruments is not None):
+        engine.instrument(diagnostics)
 
 # --- GUI: User Input Section ---
 st.header("1. Input Weather Measurements")
@@ -500,19 +399,43 @@ with col3:
     pressure = st.number_input("Pressure (hPa)", min_value=900.0, max_value=1100.0, value=1013.0, step=0.1)
 
 if st.button("Update Weather Data", type="primary", use_container_width=True):
-    # 1. Update the Subject's state (which triggers notify())
-    weather_data.set_measurements(float(temp), float(humidity), float(pressure))
-    
-    # 2. Add to history for the table
-    new_row = pd.DataFrame([{
-        "Time": pd.Timestamp.now().strftime("%H:%M:%S"), 
-        "Temp (°C)": float(temp), 
-        "Humidity (%)": float(humidity), 
-        "Pressure (hPa)": float(pressure)
-    }])
-    st.session_state['data_history'] = pd.concat([new_row, st.session_state['data_history']], ignore_index=True)
-    
-    st.balloons()
+    # Update the Subject's state (which triggers notify()) and append to history
+    engine.ingest(float(temp), float(humidity), float(pressure))
+    if not live:
+        st.balloons()
+
+# --- Live Sections ---
+# Each section below is a fragment: in live mode it reruns on its own every
+# `refresh_s` seconds, without re-executing the rest of the script. A rerun
+# reads the current snapshot (one per section, so a section never mixes two
+# versions) and reuses the frames built for it while their inputs are
+# unchanged, so an idle refresh costs a version check per section.
+RUN_EVERY = refresh_s if live else None
+# Built frames kept for all sessions; a few versions cover sessions refreshing out of step
+RENDER_CACHE_SIZE = 16
+
+
+@st.cache_resource
+def render_cache() -> tuple:
+    """One server-wide {(section, key): built} dict (oldest first) and its lock."""
+    return {}, threading.Lock()
+
+
+def memoized(section: str, key, build):
+    """`build()` once per distinct `key` and section, shared by every session.
+
+    Keys include the snapshot version, so built values are never stale; they
+    must be treated as read-only.
+    """
+    cache, lock = render_cache()
+    built = cache.get((section, key))
+    if built is None:
+        built = build()  # outside the lock: a slow build must not block other sections
+        with lock:
+            cache[(section, key)] = built
+            while len(cache) > RENDER_CACHE_SIZE:
+                del cache[next(iter(cache))]
+    return built
 
 
 st.divider()
@@ -521,20 +444,140 @@ st.divider()
 st.header("2. Observer Displays (Automatic Updates)")
 st.markdown("When the button is clicked, **`weather_data.notify()`** is called, and all registered observers are automatically updated.")
 
-display_col1, display_col2, display_col3, display_col4 = st.columns(4)
 
-# Force update all displays immediately on load/rerun to show current state
-with display_col1:
-    displays['current'].update(weather_data)
-with display_col2:
-    displays['stats'].update(weather_data)
-with display_col3:
-    displays['forecast'].update(weather_data)
-with display_col4:
-    displays['heat'].update(weather_data)
+@st.fragment(run_every=RUN_EVERY)
+def observer_displays():
+    snapshot = engine.snapshot()
+    display_col1, display_col2, display_col3, display_col4 = st.columns(4)
+
+    # Alerts on other metrics (heat index warnings already show in its panel)
+    for message in snapshot.alerts:
+        if message not in snapshot.panels['heat'].captions:
+            st.warning(message)
+
+    # Panels were rendered once for this version and are shared by every session
+    with display_col1:
+        show_panel(snapshot.panels['current'])
+    with display_col2:
+        show_panel(snapshot.panels['stats'])
+    with display_col3:
+        show_panel(snapshot.panels['forecast'])
+    with display_col4:
+        show_panel(snapshot.panels['heat'])
+    gate = engine.weather_data.gate
+    if gate is not None:
+        totals = gate.totals()
+        st.caption(f"Coalescing saved {totals['saved']:,} of {totals['offered']:,} display updates "
+                   f"({totals['deadband']:,} repeats, {totals['coalesced']:,} superseded within the window).")
+
+
+observer_displays()
 
 st.divider()
 
 # --- GUI: Data History Section ---
 st.header("3. Measurement History")
-st.dataframe(st.session_state['data_history'], use_container_width=True)
\ No newline at end of file
+
+# Never ship more than MAX_POINTS rows/points to the browser, whatever the range
+MAX_POINTS = 500
+HISTORY_RANGES = {
+    "Last hour": np.timedelta64(1, 'h'),
+    "Last day": np.timedelta64(1, 'D'),
+    "Last week": np.timedelta64(7, 'D'),
+    "All": None,
+}
+
+
+def build_history(snapshot, span, start) -> dict:
+    """Chart and table frames for one (version, range); the costly part of a redraw."""
+    raw = select_between(snapshot.history, start)
+    built = {'chart': None, 'table': None, 'caption': None}
+    if len(raw['timestamp']):
+        points = downsample(raw, MAX_POINTS)
+        built['chart'] = pd.DataFrame({MeasurementStore.LABELS[name]: values
+                                       for name, values in points.items()}).set_index("Time")
+    if len(raw['timestamp']) <= MAX_POINTS:
+        built['table'] = columns_to_frame(raw, newest_first=True)
+    else:
+        # Too many raw rows: show the finest rollup that fits instead
+        covered = span if span is not None else raw['timestamp'][-1] - raw['timestamp'][0]
+        level = engine.rollups.level_for(covered, MAX_POINTS)
+        since = engine.rollups.since
+        built['caption'] = (f"{len(raw['timestamp']):,} readings in range; showing per-{level.name} aggregates"
+                            + (f" since {np.datetime_as_string(since, unit='m')}." if since is not None else "."))
+        unit, buckets = snapshot.rollups[level.name]
+        built['table'] = buckets_to_frame(buckets, unit, start=start).head(MAX_POINTS)
+    return built
+
+
+# The Parquet download needs pyarrow; without it the section just has no button
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+def history_parquet(snapshot, start) -> bytes:
+    """The raw readings from `start` on as a zstd-compressed Parquet file."""
+    buffer = io.BytesIO()
+    export_history(snapshot.history, buffer, station=engine.station_id, start=start)
+    return buffer.getvalue()
+
+
+@st.fragment(run_every=RUN_EVERY)
+def measurement_history():
+    snapshot = engine.snapshot()
+    range_label = st.selectbox("Time range", list(HISTORY_RANGES))
+    span = HISTORY_RANGES[range_label]
+    # Whole minutes, so an idle refresh does not slide the window and rebuild
+    start = np.datetime64(datetime.now(), 'm').astype('datetime64[ms]') - span if span is not None else None
+    built = memoized('history', (snapshot.version, range_label, start),
+                     lambda: build_history(snapshot, span, start))
+
+    chart = built['chart']
+    if chart is not None:
+        chart_col1, chart_col2 = st.columns(2)
+        with chart_col1:
+            st.line_chart(chart[["Temp (°C)", "Humidity (%)"]])
+        with chart_col2:
+            st.line_chart(chart[["Pressure (hPa)"]])
+    if built['caption'] is None:
+        st.dataframe(
+            built['table'],
+            use_container_width=True,
+            column_config={"Time": st.column_config.DatetimeColumn(format="HH:mm:ss")},
+        )
+    else:
+        st.caption(built['caption'])
+        st.dataframe(built['table'], use_container_width=True)
+    if HAS_PYARROW:
+        # Serialised only when asked for, once per version and range for all sessions;
+        # the session keeps what it prepared until it prepares another range or version
+        if st.button("Prepare Parquet export"):
+            st.session_state['export'] = (range_label, snapshot.version, memoized(
+                'export', (snapshot.version, start), lambda: history_parquet(snapshot, start)))
+        prepared = st.session_state.get('export')
+        if prepared is not None and prepared[0] == range_label:
+            st.download_button("Download range as Parquet", prepared[2],
+                               file_name="weather_history.parquet", mime="application/vnd.apache.parquet")
+            if prepared[1] != snapshot.version:
+                st.caption("The export predates the latest readings; prepare it again to include them.")
+
+
+measurement_history()
+
+# --- GUI: Diagnostics Section ---
+@st.fragment(run_every=RUN_EVERY)
+def diagnostics_section():
+    instruments = engine.instruments
+    if instruments is None:
+        return
+    st.divider()
+    st.header("4. Diagnostics")
+    st.markdown("Per-observer **update** latency (HDR histogram percentiles) and net allocated memory blocks per call.")
+    st.dataframe(pd.DataFrame(instruments.summary()), use_container_width=True)
+    rates = {str(station): meter.rate for station, meter in instruments.ingest.items()}
+    if rates:
+        st.caption("Ingest rate (readings/s): " + ", ".join(f"{s}: {r:.1f}" for s, r in rates.items()))
+    with st.expander("Prometheus metrics"):
+        st.code(instruments.to_prometheus(), language="text")
+
+
+diagnostics_section()